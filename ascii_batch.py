@@ -0,0 +1,195 @@
+"""
+Multi-scale ASCII export - walk a layout once, render it at many scales
+
+The tree is flattened once (see geometry.geometry_arrays) and the scaled,
+clipped box of every node is worked out for all targets together with
+NumPy. Each target is then drawn from its own list of visible boxes,
+optionally in worker processes. Every output is identical to what
+ASCIIExporter.export / export_to_ascii give at the same scale.
+
+Without NumPy the targets are simply exported one after the other.
+"""
+
+from ascii_exporter import ASCIIExporter, ascii_header, calculate_optimal_scale
+from ascii_surface import numpy_available
+from geometry import CONTAINER_TYPE_CODE, geometry_arrays
+
+
+def _numpy():
+    """Import NumPy, with a helpful message if it is missing"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Single-pass batch export requires NumPy (pip install numpy)") from e
+    return numpy
+
+
+def resolve_scale(ui_layout, target):
+    """Get the scale factor for a target: a scale or a (max_width, max_height) pair"""
+    if isinstance(target, (tuple, list)):
+        max_width, max_height = target
+        return calculate_optimal_scale(ui_layout, max_width, max_height)
+    return target
+
+
+def canvas_size(ui_layout, scale_factor):
+    """Get the (width, height) in characters of an export at a scale"""
+    root = ui_layout.root_container
+    return (max(int(root.width * scale_factor), 60),
+            max(int(root.height * scale_factor), 40))
+
+
+class FlatLayout:
+    """
+    A layout flattened once for exporting at many scales
+
+    Holds the geometry arrays in pre-order along with each node's label,
+    element type (None for containers) and the end of its subtree.
+    """
+
+    def __init__(self, ui_layout):
+        np = _numpy()
+        self.ui_layout = ui_layout
+        self.arrays = arrays = geometry_arrays(ui_layout)
+        self.is_container = arrays.type_code == CONTAINER_TYPE_CODE
+
+        self.labels = []
+        self.element_types = []
+        for node, is_container in zip(arrays.nodes, self.is_container.tolist()):
+            if is_container:
+                self.labels.append(node.name)
+                self.element_types.append(None)
+            else:
+                self.labels.append(node.text if node.text else node.name)
+                self.element_types.append(node.element_type)
+
+        # Pre-order puts every subtree at index .. index + size - 1
+        parent = arrays.parent.tolist()
+        size = [1] * len(parent)
+        for index in range(len(parent) - 1, 0, -1):
+            size[parent[index]] += size[index]
+        self.subtree_end = np.arange(len(parent)) + np.asarray(size)
+
+    def visible_boxes(self, scales, widths, heights):
+        """
+        Scale and clip every node for every target at once
+
+        Returns (x, y, w, h, shown) arrays of shape (targets, nodes); shown
+        marks the nodes the exporter would draw at each target.
+        """
+        np = _numpy()
+
+        arrays = self.arrays
+        scale = np.asarray(scales, dtype=np.float64)[:, None]
+        width = np.asarray(widths, dtype=np.int64)[:, None]
+        height = np.asarray(heights, dtype=np.int64)[:, None]
+
+        # int() truncates toward zero, like np.trunc
+        x = np.trunc(arrays.abs_x * scale).astype(np.int64)
+        y = np.trunc(arrays.abs_y * scale).astype(np.int64)
+        w = np.minimum(np.trunc(arrays.width * scale).astype(np.int64), width - x)
+        h = np.minimum(np.trunc(arrays.height * scale).astype(np.int64), height - y)
+        shown = (x < width) & (y < height) & (w >= 2) & (h >= 2)
+
+        # A container that is not drawn hides its whole subtree
+        targets, hidden = np.nonzero(~shown & self.is_container)
+        cover = np.zeros((len(scales), len(arrays) + 1), dtype=np.int64)
+        np.add.at(cover, (targets, hidden + 1), 1)
+        np.add.at(cover, (targets, self.subtree_end[hidden]), -1)
+        shown &= np.cumsum(cover[:, :-1], axis=1) == 0
+        return x, y, w, h, shown
+
+    def jobs(self, scales, engine="auto"):
+        """Get one render job per scale (see render_job)"""
+        np = _numpy()
+
+        sizes = [canvas_size(self.ui_layout, scale) for scale in scales]
+        widths = [size[0] for size in sizes]
+        heights = [size[1] for size in sizes]
+        x, y, w, h, shown = self.visible_boxes(scales, widths, heights)
+
+        jobs = []
+        for target, (width, height) in enumerate(sizes):
+            drawn = np.flatnonzero(shown[target])
+            labels = [self.labels[i] for i in drawn.tolist()]
+            element_types = [self.element_types[i] for i in drawn.tolist()]
+            boxes = list(zip(x[target, drawn].tolist(), y[target, drawn].tolist(),
+                             w[target, drawn].tolist(), h[target, drawn].tolist(),
+                             labels, element_types))
+            jobs.append((engine, width, height, boxes))
+        return jobs
+
+
+def render_job(job):
+    """
+    Draw one target and return its text
+
+    job is (engine, width, height, boxes), boxes being the visible
+    (x, y, w, h, label, element_type) in drawing order. The surface draws
+    them in one call, which the numpy engine does with array arithmetic.
+    """
+    engine, width, height, boxes = job
+    exporter = ASCIIExporter(None, engine=engine)
+    place_label = exporter._place_label
+
+    draws = []
+    for x, y, w, h, label, element_type in boxes:
+        if label:
+            label_x, label_y, label = place_label(x, y, w, h, label, element_type)
+        else:
+            label_x, label_y = x, y
+        draws.append((x, y, min(x + w, width), min(y + h, height), label_x, label_y, label))
+
+    surface = exporter.surface_class(width, height)
+    surface.draw_boxes(draws)
+    return surface.to_string()
+
+
+def export_ascii_batch(ui_layout, targets, engine="auto", workers=None):
+    """
+    Export a layout at several scales, walking the tree only once
+
+    Args:
+        ui_layout: The UILayout to export
+        targets: Scale factors and/or (max_width, max_height) pairs
+        engine: Rendering engine, see ASCIIExporter
+        workers: Render in this many worker processes (None renders here)
+
+    Returns:
+        List of ASCII art strings, one per target
+    """
+    scales = [resolve_scale(ui_layout, target) for target in targets]
+    if not numpy_available():
+        return [ASCIIExporter(ui_layout, scale, engine).export() for scale in scales]
+
+    jobs = FlatLayout(ui_layout).jobs(scales, engine)
+    if workers is None or len(jobs) < 2:
+        return [render_job(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor  # Loads multiprocessing
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_job, jobs))
+
+
+def export_to_ascii_batch(ui_layout, outputs, engine="auto", workers=None):
+    """
+    Write a layout to several ASCII art files, walking the tree only once
+
+    Args:
+        ui_layout: The UILayout to export
+        outputs: (filename, target) pairs, targets as in export_ascii_batch
+        engine: Rendering engine, see ASCIIExporter
+        workers: Render in this many worker processes (None renders here)
+
+    Returns:
+        List of the full file contents, as export_to_ascii returns them
+    """
+    targets = [target for _, target in outputs]
+    arts = export_ascii_batch(ui_layout, targets, engine, workers)
+
+    results = []
+    for (filename, target), art in zip(outputs, arts):
+        full_output = ascii_header(ui_layout, resolve_scale(ui_layout, target)) + art
+        with open(filename, 'w') as f:
+            f.write(full_output)
+        results.append(full_output)
+    return results
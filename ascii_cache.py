@@ -0,0 +1,217 @@
+"""
+ASCII render cache - reuse the drawing of unchanged subtrees between exports
+
+For every visible container the cache keeps the cells its whole subtree
+wrote (flat canvas indices and code points, with later writes already
+applied over earlier ones), along with the container's revision and
+absolute position. On the next export a subtree whose revision and
+position are unchanged is pasted back in one step instead of being walked
+and drawn again, so only the containers on the path to an edit are
+rebuilt (the root is always recomposited from its children). The output
+is identical to an uncached export.
+
+Requires NumPy, which is an optional dependency of the builder.
+"""
+
+from ui_elements import Container, advance_revisions
+from traversal import walk
+from ascii_surface import NumpySurface
+
+
+# Marks unwritten cells of the scratch grid (larger than any code point)
+BLANK = 0xFFFFFFFF
+
+
+def _numpy():
+    """Import NumPy, with a helpful message if it is missing"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("The ASCII render cache requires NumPy (pip install numpy)") from e
+    return numpy
+
+
+class _CellRecorder:
+    """Surface stand-in that draws one node at a time and hands back its cells"""
+
+    def __init__(self, np, width, height):
+        self._np = np
+        self.width = width
+        self.height = height
+        self.surface = NumpySurface(width, height)
+        self.surface.grid[:] = BLANK
+        self.rect = None  # Canvas area drawn since the last take()
+
+    def _extend(self, x1, y1, x2, y2):
+        """Grow the drawn area to include the rectangle"""
+        if self.rect is not None:
+            old_x1, old_y1, old_x2, old_y2 = self.rect
+            x1, y1 = min(x1, old_x1), min(y1, old_y1)
+            x2, y2 = max(x2, old_x2), max(y2, old_y2)
+        self.rect = (x1, y1, x2, y2)
+
+    def set_char(self, x, y, char):
+        """Draw a single character"""
+        self.surface.set_char(x, y, char)
+        self._extend(x, y, x + 1, y + 1)
+
+    def draw_box(self, x, y, max_x, max_y):
+        """Draw a box border"""
+        self.surface.draw_box(x, y, max_x, max_y)
+        self._extend(x, y, max_x, max_y)
+
+    def draw_text(self, x, y, text, limit_x):
+        """Draw a run of text"""
+        self.surface.draw_text(x, y, text, limit_x)
+        self._extend(x, y, limit_x, y + 1)
+
+    def take(self):
+        """Get (indices, codes) of the cells drawn since the last call and clear them"""
+        np = self._np
+        if self.rect is None:
+            return None
+        x1, y1, x2, y2 = self.rect
+        self.rect = None
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, self.width), min(y2, self.height)
+        if x1 >= x2 or y1 >= y2:
+            return None
+
+        area = self.surface.grid[y1:y2, x1:x2]
+        rows, cols = np.nonzero(area != BLANK)
+        codes = area[rows, cols]
+        area[rows, cols] = BLANK
+        return (rows + y1) * self.width + (cols + x1), codes
+
+
+class ASCIIRenderCache:
+    """
+    Rendered cells of container subtrees, kept between ASCII exports
+
+    Pass one instance to every ASCIIExporter (or export_to_ascii call) of a
+    design session. Changing the scale or canvas size starts it afresh.
+    After each export, reused and rebuilt count the containers that were
+    pasted from the cache and drawn again.
+    """
+
+    def __init__(self):
+        self._np = _numpy()
+        self._settings = None
+        self._entries = {}
+        self.reused = 0
+        self.rebuilt = 0
+
+    def clear(self):
+        """Forget every cached subtree"""
+        self._settings = None
+        self._entries = {}
+
+    def _reset(self, settings, width, height):
+        """Start afresh for a new scale or canvas size"""
+        np = self._np
+        self._settings = settings
+        self._entries = {}
+        self._recorder = _CellRecorder(np, width, height)
+        self._codes = np.empty(width * height, dtype='<u4')
+        self._slots = np.empty(width * height, dtype=np.intp)
+
+    def _combine(self, parts):
+        """Merge (indices, codes) parts drawn in order into one, later parts winning"""
+        np = self._np
+        parts = [part for part in parts if part is not None]
+        if len(parts) <= 1:
+            return parts[0] if parts else None
+
+        codes = self._codes
+        for indices, part_codes in parts:
+            codes[indices] = part_codes
+
+        # Keep one occurrence of every index; codes already holds the winner
+        indices = np.concatenate([part[0] for part in parts])
+        order = np.arange(len(indices))
+        self._slots[indices] = order
+        indices = indices[self._slots[indices] == order]
+        return indices, codes[indices]
+
+    def render(self, exporter):
+        """Draw the exporter's layout and return it as a NumpySurface"""
+        width, height = exporter.width, exporter.height
+        settings = (exporter.scale_factor, width, height)
+        if settings != self._settings:
+            self._reset(settings, width, height)
+
+        root = exporter.ui_layout.root_container
+        old_entries = self._entries
+        entries = {}
+        recorder = self._recorder
+        # (parts, child container ids) of the containers being rebuilt; the
+        # cells drawn since the last take() belong to the innermost one
+        frames = [([], [])]
+        self.reused = self.rebuilt = 0
+
+        def keep(key):
+            # Carry a reused entry and the entries below it over
+            pending = [key]
+            while pending:
+                key = pending.pop()
+                entry = old_entries.get(key)
+                if entry is not None:
+                    entries[key] = entry
+                    pending.extend(entry[3])
+
+        def enter(node, abs_x, abs_y):
+            if not isinstance(node, Container):
+                exporter._draw_node(node, abs_x, abs_y)
+                return True
+
+            key = (node.revision, abs_x, abs_y)
+            entry = old_entries.get(id(node))
+            if (node is not root and entry is not None and entry[0] is node
+                    and entry[1] == key):
+                parts, child_ids = frames[-1]
+                parts.append(recorder.take())
+                parts.append(entry[2])
+                child_ids.append(id(node))
+                keep(id(node))
+                self.reused += 1
+                return False
+
+            frames[-1][0].append(recorder.take())
+            if not exporter._draw_container(node, abs_x, abs_y):
+                return False
+            frames.append(([], []))
+            return True
+
+        def leave(node, abs_x, abs_y):
+            if not isinstance(node, Container):
+                return
+            parts, child_ids = frames.pop()
+            parts.append(recorder.take())
+            if node is root:
+                frames[-1][0].extend(parts)
+                frames[-1][1].extend(child_ids)
+                return
+            block = self._combine(parts)
+            entries[id(node)] = (node, (node.revision, abs_x, abs_y), block, child_ids)
+            frames[-1][0].append(block)
+            frames[-1][1].append(id(node))
+            self.rebuilt += 1
+
+        surface = exporter.surface
+        exporter.surface = recorder
+        try:
+            walk(root, enter, leave)
+        finally:
+            exporter.surface = surface
+        self._entries = entries
+
+        # Edits from now on get a revision the entries have not seen
+        advance_revisions()
+
+        # Paint the root's parts in drawing order
+        result = NumpySurface(width, height)
+        cells = result.grid.reshape(-1)
+        for part in frames[0][0]:
+            if part is not None:
+                cells[part[0]] = part[1]
+        return result
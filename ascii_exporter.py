@@ -3,21 +3,44 @@ ASCII Art Exporter - Creates visual text representations of UI layouts
 """
 
 from ui_elements import UIElement, Container, UILayout
+from traversal import walk
+from ascii_surface import BandRecorder, surface_class
+
+
+# Rows rasterized at a time when streaming
+BAND_ROWS = 256
 
 
 class ASCIIExporter:
-    """Export UI layouts as ASCII art / text-based visual representations"""
+    """
+    Export UI layouts as ASCII art / text-based visual representations
+
+    engine selects the character surface: "list" (pure Python), "numpy"
+    (array based, much faster on big canvases) or "auto" (numpy when it is
+    installed). All engines produce identical text.
+
+    export() builds the whole canvas at once; iter_lines() and write()
+    rasterize it in bands of rows so memory stays bounded by the band.
 
-    def __init__(self, ui_layout, scale_factor=1.0):
+    cache is an optional ASCIIRenderCache shared between exports; export()
+    then redraws only the subtrees changed since the previous export. It
+    needs the numpy engine and is not used when streaming.
+    """
+
+    def __init__(self, ui_layout, scale_factor=1.0, engine="auto", cache=None):
+        if cache is not None and engine == "list":
+            raise ValueError("The ASCII render cache needs the numpy engine")
         self.ui_layout = ui_layout
         self.scale_factor = scale_factor
+        self.surface_class = surface_class(engine)
+        self.cache = cache
+        self.surface = None
         self.grid = []
         self.width = 0
         self.height = 0
 
-    def export(self):
-        """Export the layout as ASCII art"""
-        # Calculate dimensions based on root container with scaling
+    def _set_dimensions(self):
+        """Calculate the canvas size from the scaled root container"""
         root = self.ui_layout.root_container
         scaled_width = int(root.width * self.scale_factor)
         scaled_height = int(root.height * self.scale_factor)
@@ -25,49 +48,88 @@ class ASCIIExporter:
         self.width = max(scaled_width, 60)
         self.height = max(scaled_height, 40)
 
+    def export(self):
+        """Export the layout as ASCII art"""
+        self._set_dimensions()
+
+        if self.cache is not None:
+            # Draw only what changed since the cache's last export
+            self.surface = self.cache.render(self)
+            self.grid = self.surface.grid
+            return self._grid_to_string()
+
         # Initialize grid with spaces
-        self.grid = [[' ' for _ in range(self.width)] for _ in range(self.height)]
+        self.surface = self.surface_class(self.width, self.height)
+        self.grid = self.surface.grid
 
         # Draw the layout
-        self._draw_container(root, 0, 0)
+        walk(self.ui_layout.root_container, self._draw_node)
 
         # Convert grid to string
         return self._grid_to_string()
+
+    def iter_bands(self, band_rows=BAND_ROWS):
+        """Yield the ASCII art as lists of lines, band_rows lines at a time"""
+        self._set_dimensions()
+
+        # Record the draw calls per band, then paint one band at a time
+        self.surface = BandRecorder(self.width, self.height, band_rows)
+        self.grid = []
+        walk(self.ui_layout.root_container, self._draw_node)
+        recorder, self.surface = self.surface, None
+
+        for surface in recorder.iter_surfaces(self.surface_class):
+            yield surface.lines()
+
+    def iter_lines(self, band_rows=BAND_ROWS):
+        """Yield the ASCII art one line at a time"""
+        for lines in self.iter_bands(band_rows):
+            yield from lines
+
+    def write(self, f, band_rows=BAND_ROWS):
+        """Write the ASCII art to a text file band by band (same text as export())"""
+        separator = ''
+        for lines in self.iter_bands(band_rows):
+            f.write(separator)
+            f.write('\n'.join(lines))
+            separator = '\n'
     
-    def _draw_container(self, container, offset_x, offset_y):
-        """Draw a container and its children"""
+    def _draw_node(self, node, abs_x, abs_y):
+        """Draw one node during the walk; False skips a container's children"""
+        if isinstance(node, Container):
+            return self._draw_container(node, abs_x, abs_y)
+        if isinstance(node, UIElement):
+            self._draw_element(node, abs_x, abs_y)
+        return True
+
+    def _draw_container(self, container, abs_x, abs_y):
+        """Draw a container border; returns False if it is not visible"""
         # Apply scaling to positions and dimensions
-        x = int((offset_x + container.x) * self.scale_factor)
-        y = int((offset_y + container.y) * self.scale_factor)
+        x = int(abs_x * self.scale_factor)
+        y = int(abs_y * self.scale_factor)
         w = int(container.width * self.scale_factor)
         h = int(container.height * self.scale_factor)
 
         # Ensure dimensions are within bounds
         if x >= self.width or y >= self.height:
-            return
+            return False
 
         # Adjust dimensions if they exceed grid
         w = min(w, self.width - x)
         h = min(h, self.height - y)
 
         if w < 2 or h < 2:
-            return
+            return False
 
         # Draw container border
         self._draw_box(x, y, w, h, container.name)
-
-        # Draw children (pass original offset for recursive scaling)
-        for child in container.children:
-            if isinstance(child, Container):
-                self._draw_container(child, offset_x + container.x, offset_y + container.y)
-            elif isinstance(child, UIElement):
-                self._draw_element(child, offset_x + container.x, offset_y + container.y)
+        return True
     
-    def _draw_element(self, element, offset_x, offset_y):
+    def _draw_element(self, element, abs_x, abs_y):
         """Draw a UI element"""
         # Apply scaling to positions and dimensions
-        x = int((offset_x + element.x) * self.scale_factor)
-        y = int((offset_y + element.y) * self.scale_factor)
+        x = int(abs_x * self.scale_factor)
+        y = int(abs_y * self.scale_factor)
         w = int(element.width * self.scale_factor)
         h = int(element.height * self.scale_factor)
 
@@ -100,50 +162,32 @@ class ASCIIExporter:
         max_x = min(x + w, self.width)
         max_y = min(y + h, self.height)
         
-        # Draw top border
-        if y < self.height:
-            self._set_char(x, y, '+')
-            for i in range(x + 1, max_x - 1):
-                self._set_char(i, y, '-')
-            if max_x - 1 > x:
-                self._set_char(max_x - 1, y, '+')
-        
-        # Draw bottom border
-        if max_y - 1 < self.height and max_y - 1 > y:
-            self._set_char(x, max_y - 1, '+')
-            for i in range(x + 1, max_x - 1):
-                self._set_char(i, max_y - 1, '-')
-            if max_x - 1 > x:
-                self._set_char(max_x - 1, max_y - 1, '+')
-        
-        # Draw side borders
-        for j in range(y + 1, max_y - 1):
-            if j < self.height:
-                self._set_char(x, j, '|')
-                if max_x - 1 > x:
-                    self._set_char(max_x - 1, j, '|')
+        self.surface.draw_box(x, y, max_x, max_y)
         
         # Add label in the middle or top
         if label:
-            # Truncate label if too long
-            max_label_len = w - 4
-            if len(label) > max_label_len:
-                label = label[:max_label_len - 2] + ".."
-            
-            # Position label
-            label_y = y + 1 if h > 2 else y
-            label_x = x + 2
-            
-            # Add element type prefix if it's an element
-            if element_type:
-                type_prefix = self._get_type_prefix(element_type)
-                label = f"{type_prefix} {label}"
+            label_x, label_y, label = self._place_label(x, y, w, h, label, element_type)
             
             # Write label
-            if label_y < self.height:
-                for i, char in enumerate(label):
-                    if label_x + i < max_x - 1:
-                        self._set_char(label_x + i, label_y, char)
+            self.surface.draw_text(label_x, label_y, label, max_x - 1)
+
+    def _place_label(self, x, y, w, h, label, element_type=None):
+        """Get (label_x, label_y, text) for the label of a box"""
+        # Truncate label if too long
+        max_label_len = w - 4
+        if len(label) > max_label_len:
+            label = label[:max_label_len - 2] + ".."
+        
+        # Position label
+        label_y = y + 1 if h > 2 else y
+        label_x = x + 2
+        
+        # Add element type prefix if it's an element
+        if element_type:
+            type_prefix = self._get_type_prefix(element_type)
+            label = f"{type_prefix} {label}"
+        
+        return label_x, label_y, label
     
     def _get_type_prefix(self, element_type):
         """Get a short prefix for element type"""
@@ -164,15 +208,11 @@ class ASCIIExporter:
     
     def _set_char(self, x, y, char):
         """Set a character in the grid"""
-        if 0 <= y < self.height and 0 <= x < self.width:
-            self.grid[y][x] = char
+        self.surface.set_char(x, y, char)
     
     def _grid_to_string(self):
         """Convert grid to string"""
-        lines = []
-        for row in self.grid:
-            lines.append(''.join(row))
-        return '\n'.join(lines)
+        return self.surface.to_string()
 
 
 def calculate_optimal_scale(ui_layout, max_width=120, max_height=60):
@@ -190,7 +230,16 @@ def calculate_optimal_scale(ui_layout, max_width=120, max_height=60):
     return min(optimal_scale, 1.0)
 
 
-def export_to_ascii(ui_layout, filename, scale_factor=None, max_width=120, max_height=60):
+def ascii_header(ui_layout, scale_factor):
+    """Get the comment header written above exported ASCII art"""
+    header = f"# UI Layout: {ui_layout.name}\n"
+    header += f"# Scale: {scale_factor:.2f}x ({int(ui_layout.root_container.width * scale_factor)}x{int(ui_layout.root_container.height * scale_factor)} chars)\n"
+    header += f"# Original size: {ui_layout.root_container.width}x{ui_layout.root_container.height}px\n\n"
+    return header
+
+
+def export_to_ascii(ui_layout, filename, scale_factor=None, max_width=120, max_height=60,
+                    engine="auto", stream=False, band_rows=BAND_ROWS, cache=None):
     """
     Export a UI layout to ASCII art file
 
@@ -200,22 +249,31 @@ def export_to_ascii(ui_layout, filename, scale_factor=None, max_width=120, max_h
         scale_factor: Manual scale factor (0.0-1.0). If None, auto-calculates optimal scale
         max_width: Maximum width in characters (default 120, fits most IDE windows)
         max_height: Maximum height in lines (default 60, minimal scrolling)
+        engine: Rendering engine, see ASCIIExporter
+        stream: Rasterize and write band_rows rows at a time instead of
+            building the whole canvas (for poster-size exports)
+        band_rows: Rows per band when streaming
+        cache: Optional ASCIIRenderCache reused across exports (not streamed)
 
     Returns:
-        The ASCII art string
+        The ASCII art string, or None when streaming
     """
     # Auto-calculate scale if not provided
     if scale_factor is None:
         scale_factor = calculate_optimal_scale(ui_layout, max_width, max_height)
 
-    exporter = ASCIIExporter(ui_layout, scale_factor)
-    ascii_art = exporter.export()
+    exporter = ASCIIExporter(ui_layout, scale_factor, engine, cache)
 
     # Add header with scale info
-    header = f"# UI Layout: {ui_layout.name}\n"
-    header += f"# Scale: {scale_factor:.2f}x ({int(ui_layout.root_container.width * scale_factor)}x{int(ui_layout.root_container.height * scale_factor)} chars)\n"
-    header += f"# Original size: {ui_layout.root_container.width}x{ui_layout.root_container.height}px\n\n"
+    header = ascii_header(ui_layout, scale_factor)
 
+    if stream:
+        with open(filename, 'w') as f:
+            f.write(header)
+            exporter.write(f, band_rows)
+        return None
+
+    ascii_art = exporter.export()
     full_output = header + ascii_art
 
     with open(filename, 'w') as f:
@@ -0,0 +1,347 @@
+"""
+Character surfaces the ASCII exporter paints on
+
+A surface covers the full canvas width and a range of rows starting at
+top (the whole canvas, or one band of it). Writes outside the surface are
+ignored, like writes outside the canvas always were.
+
+ListSurface keeps the grid as lists of characters and is always available.
+NumpySurface keeps it as a 2-D array of code points, paints runs with slice
+assignment and converts all rows to text at once; it needs NumPy and gives
+exactly the same text. BandRecorder takes the same draw calls and replays
+them one band at a time, so huge canvases never exist in memory at once.
+"""
+
+
+def _numpy():
+    """Import NumPy, with a helpful message if it is missing"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("The numpy ASCII engine requires NumPy (pip install numpy)") from e
+    return numpy
+
+
+def numpy_available():
+    """Check if the numpy engine can be used"""
+    try:
+        _numpy()
+    except ImportError:
+        return False
+    return True
+
+
+class ListSurface:
+    """Character grid stored as a list of row lists"""
+
+    def __init__(self, width, rows, top=0):
+        self.width = width
+        self.rows = rows
+        self.top = top
+        self.grid = [[' ' for _ in range(width)] for _ in range(rows)]
+
+    def set_char(self, x, y, char):
+        """Set a character at canvas coordinates"""
+        row = y - self.top
+        if 0 <= row < self.rows and 0 <= x < self.width:
+            self.grid[row][x] = char
+
+    def draw_box(self, x, y, max_x, max_y):
+        """Draw the border of the box from (x, y) to (max_x - 1, max_y - 1)"""
+        set_char = self.set_char
+
+        # Draw top border
+        set_char(x, y, '+')
+        for i in range(x + 1, max_x - 1):
+            set_char(i, y, '-')
+        if max_x - 1 > x:
+            set_char(max_x - 1, y, '+')
+
+        # Draw bottom border
+        if max_y - 1 > y:
+            set_char(x, max_y - 1, '+')
+            for i in range(x + 1, max_x - 1):
+                set_char(i, max_y - 1, '-')
+            if max_x - 1 > x:
+                set_char(max_x - 1, max_y - 1, '+')
+
+        # Draw side borders
+        for j in range(y + 1, max_y - 1):
+            set_char(x, j, '|')
+            if max_x - 1 > x:
+                set_char(max_x - 1, j, '|')
+
+    def draw_text(self, x, y, text, limit_x):
+        """Write text from (x, y), stopping before column limit_x"""
+        for i, char in enumerate(text):
+            if x + i < limit_x:
+                self.set_char(x + i, y, char)
+
+    def draw_boxes(self, boxes):
+        """
+        Draw labelled boxes in order
+
+        boxes holds (x, y, max_x, max_y, text_x, text_y, text) tuples; each
+        text stops before the box's right border.
+        """
+        for x, y, max_x, max_y, text_x, text_y, text in boxes:
+            self.draw_box(x, y, max_x, max_y)
+            self.draw_text(text_x, text_y, text, max_x - 1)
+
+    def lines(self):
+        """Get the rows as strings"""
+        return [''.join(row) for row in self.grid]
+
+    def to_string(self):
+        """Get the surface as text"""
+        return '\n'.join(self.lines())
+
+
+class NumpySurface:
+    """Character grid stored as a 2-D array of code points"""
+
+    # draw_boxes works cell by cell, which beats one slice assignment per
+    # box only while boxes are small; past this many border cells per box
+    # on average it draws them one at a time instead
+    BATCH_CELLS_PER_BOX = 128
+
+    def __init__(self, width, rows, top=0):
+        np = _numpy()
+        self._np = np
+        self.width = width
+        self.rows = rows
+        self.top = top
+        self.grid = np.full((rows, width), ord(' '), dtype='<u4')
+        self._borders = {}
+
+    def set_char(self, x, y, char):
+        """Set a character at canvas coordinates"""
+        row = y - self.top
+        if 0 <= row < self.rows and 0 <= x < self.width:
+            self.grid[row, x] = ord(char)
+
+    def _border(self, length):
+        """Get the code points of a '+---+' border row of this length"""
+        border = self._borders.get(length)
+        if border is None:
+            border = self._np.full(length, ord('-'), dtype='<u4')
+            border[0] = border[-1] = ord('+')
+            self._borders[length] = border
+        return border
+
+    def draw_box(self, x, y, max_x, max_y):
+        """Draw the border of the box from (x, y) to (max_x - 1, max_y - 1)"""
+        grid = self.grid
+        right = max_x - 1
+        bottom = max_y - 1
+        span = max(max_x - x, 1)  # A box with no width still gets its left column
+        x1 = max(x, 0)
+        x2 = min(x + span, self.width)
+        if x1 >= x2:
+            return
+
+        # Top and bottom borders, one slice assignment per row
+        border = self._border(span)[x1 - x:x2 - x]
+        for row in ((y, bottom) if bottom > y else (y,)):
+            row -= self.top
+            if 0 <= row < self.rows:
+                grid[row, x1:x2] = border
+
+        # Side borders, both columns in one strided slice when they are visible
+        row1 = max(y + 1 - self.top, 0)
+        row2 = min(bottom - self.top, self.rows)
+        if row1 >= row2:
+            return
+        left_in = x >= 0
+        right_in = right > x and right < self.width
+        if left_in and right_in:
+            grid[row1:row2, x:right + 1:right - x] = 124  # '|'
+        elif left_in:
+            grid[row1:row2, x] = 124
+        elif right_in:
+            grid[row1:row2, right] = 124
+
+    def draw_text(self, x, y, text, limit_x):
+        """Write text from (x, y), stopping before column limit_x"""
+        row = y - self.top
+        start = max(x, 0)
+        end = min(x + len(text), limit_x, self.width)
+        if not 0 <= row < self.rows or start >= end:
+            return
+        codes = self._np.frombuffer(
+            text[start - x:end - x].encode('utf-32-le', 'surrogatepass'), dtype='<u4'
+        )
+        self.grid[row, start:end] = codes
+
+    def draw_boxes(self, boxes):
+        """
+        Draw labelled boxes in order, all at once
+
+        boxes holds (x, y, max_x, max_y, text_x, text_y, text) tuples; each
+        text stops before the box's right border. Every cell write is
+        generated with array arithmetic and, where boxes overlap, the one
+        drawn last wins, exactly as if they were drawn one by one.
+        """
+        np = self._np
+        if not boxes:
+            return
+        x, y, max_x, max_y, text_x, text_y = (
+            np.array(column, dtype=np.int64) for column in list(zip(*boxes))[:6]
+        )
+        width, top, rows = self.width, self.top, self.rows
+        right = max_x - 1
+        bottom = max_y - 1
+
+        border_cells = (2 * np.minimum(max_x - x, width) + 2 * np.minimum(bottom - y, rows)).sum()
+        if border_cells > self.BATCH_CELLS_PER_BOX * len(boxes):
+            for box_x, box_y, box_max_x, box_max_y, label_x, label_y, text in boxes:
+                self.draw_box(box_x, box_y, box_max_x, box_max_y)
+                self.draw_text(label_x, label_y, text, box_max_x - 1)
+            return
+
+        texts = [box[6] for box in boxes]
+        # Box i draws in step 2i and its text in step 2i + 1
+        step = np.arange(len(boxes), dtype=np.int64) * 2
+
+        cells, steps, codes = [], [], []
+
+        # Top and bottom borders
+        span = np.maximum(max_x - x, 1)
+        has_bottom = bottom > y
+        row = np.concatenate([y, bottom[has_bottom]])
+        left = np.concatenate([x, x[has_bottom]])
+        end = np.concatenate([x + span, (x + span)[has_bottom]])
+        corner = np.concatenate([right, right[has_bottom]])
+        owner = np.concatenate([step, step[has_bottom]])
+        start = np.maximum(left, 0)
+        length = np.minimum(end, width) - start
+        keep = (length > 0) & (row >= top) & (row < top + rows)
+        col, run = _ragged(np, start[keep], length[keep])
+        cells.append((row[keep] - top)[run] * width + col)
+        steps.append(owner[keep][run])
+        edge = (col == left[keep][run]) | (col == corner[keep][run])
+        codes.append(np.where(edge, ord('+'), ord('-')).astype('<u4'))
+
+        # Side borders
+        first = np.maximum(y + 1 - top, 0)
+        length = np.minimum(bottom - top, rows) - first
+        has_right = right > x
+        side_col = np.concatenate([x, right[has_right]])
+        side_first = np.concatenate([first, first[has_right]])
+        side_length = np.concatenate([length, length[has_right]])
+        owner = np.concatenate([step, step[has_right]])
+        keep = (side_length > 0) & (side_col >= 0) & (side_col < width)
+        row, run = _ragged(np, side_first[keep], side_length[keep])
+        cells.append(row * width + side_col[keep][run])
+        steps.append(owner[keep][run])
+        codes.append(np.full(len(row), ord('|'), dtype='<u4'))
+
+        # Texts, clipped to the surface and before the right border
+        length = np.array([len(text) for text in texts], dtype=np.int64)
+        text_codes = np.frombuffer(
+            ''.join(texts).encode('utf-32-le', 'surrogatepass'), dtype='<u4'
+        )
+        col, run = _ragged(np, text_x, length)
+        text_row = (text_y - top)[run]
+        keep = ((col >= 0) & (col < width) & (col < right[run])
+                & (text_row >= 0) & (text_row < rows))
+        cells.append(text_row[keep] * width + col[keep])
+        steps.append((step + 1)[run][keep])
+        codes.append(text_codes[keep])
+
+        # Resolve overlaps: each cell keeps the write from the latest step
+        cells = np.concatenate(cells)
+        steps = np.concatenate(steps)
+        codes = np.concatenate(codes)
+        latest = np.full(rows * width, -1, dtype=np.int64)
+        np.maximum.at(latest, cells, steps)
+        keep = latest[cells] == steps
+        self.grid.reshape(-1)[cells[keep]] = codes[keep]
+
+    def lines(self):
+        """Get the rows as strings"""
+        grid = self.grid
+        if self.width == 0 or self.rows == 0:
+            return [''] * self.rows
+        if grid[:, -1].all():
+            # A row of code points is exactly a fixed-width NumPy string,
+            # which only drops trailing NULs (and every row ends in non-NUL)
+            return grid.view(f'<U{self.width}')[:, 0].tolist()
+        return [''.join(map(chr, row)) for row in grid.tolist()]
+
+    def to_string(self):
+        """Get the surface as text"""
+        return '\n'.join(self.lines())
+
+
+class BandRecorder:
+    """
+    Surface stand-in that records draw calls for later, band by band
+
+    Each call is filed under every band of band_rows rows that it touches,
+    in drawing order, so replaying a band onto a real surface of just those
+    rows gives exactly the rows a full-canvas surface would have.
+    """
+
+    def __init__(self, width, rows, band_rows):
+        if band_rows < 1:
+            raise ValueError("band_rows must be at least 1")
+        self.width = width
+        self.rows = rows
+        self.band_rows = band_rows
+        self.bands = [[] for _ in range(-(-rows // band_rows))]
+
+    def _record(self, first_row, last_row, call):
+        """File a call under the bands covering rows first_row..last_row"""
+        first_row = max(first_row, 0)
+        last_row = min(last_row, self.rows - 1)
+        if first_row > last_row:
+            return
+        for band in range(first_row // self.band_rows, last_row // self.band_rows + 1):
+            self.bands[band].append(call)
+
+    def set_char(self, x, y, char):
+        """Record a single character"""
+        self._record(y, y, ("set_char", (x, y, char)))
+
+    def draw_box(self, x, y, max_x, max_y):
+        """Record a box border"""
+        self._record(y, max_y - 1, ("draw_box", (x, y, max_x, max_y)))
+
+    def draw_text(self, x, y, text, limit_x):
+        """Record a run of text"""
+        self._record(y, y, ("draw_text", (x, y, text, limit_x)))
+
+    def iter_surfaces(self, surface_class):
+        """Paint each band on its own surface and yield them top to bottom"""
+        for index, calls in enumerate(self.bands):
+            top = index * self.band_rows
+            surface = surface_class(self.width, min(self.band_rows, self.rows - top), top)
+            for method, args in calls:
+                getattr(surface, method)(*args)
+            # Drop the band's calls once painted
+            self.bands[index] = None
+            yield surface
+
+
+def _ragged(np, starts, lengths):
+    """Get (starts[i] + k for k < lengths[i], owning i) for all i, flattened"""
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.arange(len(owner)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owner] + offsets, owner
+
+
+ENGINES = {
+    "list": ListSurface,
+    "numpy": NumpySurface,
+}
+
+
+def surface_class(engine="auto"):
+    """Get the surface class for an engine name ("auto" prefers numpy)"""
+    if engine == "auto":
+        engine = "numpy" if numpy_available() else "list"
+    try:
+        return ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown ASCII engine: {engine}") from None
@@ -0,0 +1,177 @@
+"""
+Background tasks - save and export on a worker thread without blocking Tk
+
+Jobs run one at a time on a single worker thread against the worker's own
+replica of the layout, never the layout the GUI is editing. The replica is
+kept in step by replaying the same operations the autosave journal
+records (see journal.py), queued in order with the jobs, so every job
+sees the layout exactly as it was when the job was submitted. Submitting
+is O(1) on the Tk thread; only replacing the whole layout (new or loaded
+project) copies it, with to_dict().
+
+Progress messages, results and errors are passed back through a queue
+that the Tk thread polls with after(), so callbacks always run on the Tk
+thread. A job that has not started yet is superseded by a newer job with
+the same key (saving the same file twice only writes the newer state).
+
+Usage:
+    tasks = TaskRunner(root_widget)
+    tasks.reset(layout)
+    history.listeners.append(lambda command, undone:
+                             tasks.apply(command_operation(command, undone)))
+    tasks.submit(("save", path), lambda layout, progress: layout.save_to_json(path),
+                 on_done=..., on_error=..., on_progress=...)
+"""
+
+import queue
+import threading
+from collections import deque
+
+from ui_elements import UILayout
+
+
+POLL_INTERVAL = 50  # Milliseconds between checks for finished jobs
+
+
+class Job:
+    """
+    A unit of background work.
+
+    Attributes:
+        key: Jobs with equal keys supersede each other while queued
+        work: Called on the worker as work(layout, progress); progress(message)
+            reports a status message back to the Tk thread
+        on_done, on_error, on_progress: Called on the Tk thread with the
+            result, the exception or a progress message
+        superseded: Set when a newer job with the same key replaced it
+    """
+
+    __slots__ = ("key", "work", "on_done", "on_error", "on_progress", "superseded")
+
+    def __init__(self, key, work, on_done=None, on_error=None, on_progress=None):
+        self.key = key
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.superseded = False
+
+
+class TaskRunner:
+    """Worker thread with a replica of the layout, reporting back through Tk's after()"""
+
+    def __init__(self, widget, poll_interval=POLL_INTERVAL):
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self._inbox = deque()  # ("reset", dict) / ("apply", operation) / ("job", Job) / ("stop", None)
+        self._condition = threading.Condition()
+        self._queued = {}  # key -> Job not started yet
+        self._results = queue.SimpleQueue()  # (callback, argument, finished) for the Tk thread
+        self._outstanding = 0  # Jobs submitted whose callbacks have not run
+        self._poll_job = None
+        self._layout = UILayout()  # Replica; only touched by the worker
+        self._replica_error = None  # Set if an edit could not be replayed
+        self._thread = threading.Thread(target=self._run, name="background-tasks", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        """Whether jobs are queued, running or waiting for their callbacks"""
+        return self._outstanding > 0
+
+    def reset(self, layout):
+        """Replace the replica with a copy of a layout (after loading or a new project)"""
+        self._put("reset", layout.to_dict())
+
+    def apply(self, operation):
+        """Replay an edit on the replica (a journal operation)"""
+        self._put("apply", operation)
+
+    def submit(self, key, work, on_done=None, on_error=None, on_progress=None):
+        """Queue a job against the layout as it is now; returns the Job"""
+        job = Job(key, work, on_done, on_error, on_progress)
+        with self._condition:
+            previous = self._queued.get(key)
+            if previous is not None:
+                previous.superseded = True
+                self._outstanding -= 1
+            self._queued[key] = job
+            self._inbox.append(("job", job))
+            self._outstanding += 1
+            self._condition.notify()
+        self._schedule_poll()
+        return job
+
+    def shutdown(self, wait=True):
+        """Stop the worker after the queued jobs; their callbacks are not run"""
+        self._put("stop", None)
+        if wait:
+            self._thread.join()
+        if self._poll_job is not None:
+            self.widget.after_cancel(self._poll_job)
+            self._poll_job = None
+
+    def _put(self, kind, item):
+        with self._condition:
+            self._inbox.append((kind, item))
+            self._condition.notify()
+
+    def _run(self):
+        """Worker thread: apply edits and run jobs in submission order"""
+        from journal import apply_operation
+        while True:
+            with self._condition:
+                while not self._inbox:
+                    self._condition.wait()
+                kind, item = self._inbox.popleft()
+                if kind == "job":
+                    if item.superseded:
+                        continue
+                    del self._queued[item.key]
+            if kind == "stop":
+                return
+            if kind == "reset":
+                self._layout = UILayout.from_dict(item)
+                self._replica_error = None
+            elif kind == "apply":
+                if self._replica_error is None:
+                    try:
+                        apply_operation(self._layout, item)
+                    except Exception as e:
+                        self._replica_error = e
+            else:
+                self._run_job(item)
+
+    def _run_job(self, job):
+        def progress(message):
+            if job.on_progress is not None:
+                self._results.put((job.on_progress, message, False))
+        try:
+            if self._replica_error is not None:
+                # Never write out a layout that differs from the edited one
+                raise RuntimeError(f"background copy of the layout is out of date: "
+                                   f"{self._replica_error}")
+            result = job.work(self._layout, progress)
+        except Exception as e:
+            self._results.put((job.on_error, e, True))
+        else:
+            self._results.put((job.on_done, result, True))
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            self._poll_job = self.widget.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """Tk thread: run the callbacks of finished jobs and progress messages"""
+        self._poll_job = None
+        while True:
+            try:
+                callback, argument, finished = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if finished:
+                self._outstanding -= 1
+            if callback is not None:
+                callback(argument)
+        if self._outstanding > 0:
+            self._schedule_poll()
@@ -0,0 +1,275 @@
+"""
+Headless batch converter - regenerate markdown and ASCII exports for a
+whole directory tree of projects
+
+Every project file (*.json and binary *.uibp) under the input directory is
+loaded and written out as <name>.md (UILayout.save_to_file) and
+<name>.txt (export_to_ascii), next to the project or, with --output, in
+the same relative place under another directory. Projects are converted
+in a process pool. Projects whose outputs would overwrite each other
+(a.json and a.uibp in one directory) are not converted but reported as
+failures.
+
+A manifest (.batch_convert.json in the output directory) records the
+size, modification time and SHA-256 hash of every converted input. An
+input is skipped when its size and mtime are unchanged, or when they
+changed but its hash did not, and its outputs still exist. Changing the
+export options converts everything again. Failed inputs are not recorded,
+so they are retried on the next run.
+
+One line is printed per converted file with its time, failures are
+listed with their error, and the exit status is 1 if anything failed.
+
+Usage:
+    python batch_convert.py INPUT_DIR [--output DIR] [--workers N] [--force]
+        [--scale FACTOR | --max-width N --max-height N]
+        [--no-markdown] [--no-ascii]
+"""
+
+import json
+import os
+import sys
+import time
+
+from ui_elements import UILayout
+from ascii_exporter import export_to_ascii
+from binary_format import EXTENSION as BINARY_EXTENSION, is_binary_project
+
+
+MANIFEST_NAME = ".batch_convert.json"
+MANIFEST_VERSION = 1
+PROJECT_EXTENSIONS = (".json", BINARY_EXTENSION)
+
+
+def find_projects(input_dir):
+    """Get the project files under input_dir, relative to it and sorted"""
+    found = []
+    for directory, subdirectories, filenames in os.walk(input_dir):
+        # Skip hidden directories and files (the manifest among them)
+        subdirectories[:] = sorted(d for d in subdirectories if not d.startswith("."))
+        for filename in filenames:
+            if not filename.startswith(".") and filename.endswith(PROJECT_EXTENSIONS):
+                path = os.path.join(directory, filename)
+                found.append(os.path.relpath(path, input_dir))
+    return sorted(found)
+
+
+def file_hash(path):
+    """Get the SHA-256 hex digest of a file"""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path):
+    """Get the size, mtime and hash of a file, as recorded in the manifest"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_hash(path)}
+
+
+def load_project(path):
+    """Load a JSON or binary project"""
+    if is_binary_project(path):
+        return UILayout.load_from_binary(path)
+    return UILayout.load_from_json(path)
+
+
+def output_paths(relative, output_dir, options):
+    """Get the output files of a project (markdown first, then ASCII)"""
+    base = os.path.splitext(os.path.join(output_dir, relative))[0]
+    paths = []
+    if options["markdown"]:
+        paths.append(base + ".md")
+    if options["ascii"]:
+        paths.append(base + ".txt")
+    return paths
+
+
+def output_clashes(projects):
+    """Get {project: error} for the projects whose outputs would overwrite each other's"""
+    by_base = {}
+    for relative in projects:
+        by_base.setdefault(os.path.normcase(os.path.splitext(relative)[0]), []).append(relative)
+    clashes = {}
+    for group in by_base.values():
+        if len(group) > 1:
+            for relative in group:
+                others = ", ".join(other for other in group if other != relative)
+                clashes[relative] = f"same output names as {others}"
+    return clashes
+
+
+def convert_project(source, outputs, options):
+    """
+    Convert one project (runs in a worker process)
+
+    Returns (seconds, error, fingerprint); error is None on success. The
+    fingerprint is taken before loading, so a project edited while it
+    converts is converted again next time.
+    """
+    start = time.perf_counter()
+    try:
+        taken = fingerprint(source)
+        layout = load_project(source)
+        for path in outputs:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if path.endswith(".md"):
+                layout.save_to_file(path)
+            else:
+                export_to_ascii(layout, path, options["scale_factor"],
+                                options["max_width"], options["max_height"])
+    except Exception as e:
+        return time.perf_counter() - start, f"{type(e).__name__}: {e}", None
+    return time.perf_counter() - start, None, taken
+
+
+class Manifest:
+    """Record of converted inputs, used to skip unchanged ones"""
+
+    def __init__(self, path, options):
+        self.path = path
+        self.options = options
+        self.files = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Entries made with other options are of no use
+        if data.get("version") == MANIFEST_VERSION and data.get("options") == options:
+            self.files = data.get("files", {})
+
+    def is_current(self, relative, source, outputs):
+        """Check if a project's outputs are up to date, refreshing its stat if only that changed"""
+        entry = self.files.get(relative)
+        if entry is None or not all(os.path.exists(path) for path in outputs):
+            return False
+        stat = os.stat(source)
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        # Touched or copied: only the content decides
+        if entry["sha256"] == file_hash(source):
+            entry["size"] = stat.st_size
+            entry["mtime_ns"] = stat.st_mtime_ns
+            return True
+        return False
+
+    def record(self, relative, taken):
+        """Remember a successfully converted project by its fingerprint from before converting"""
+        self.files[relative] = taken
+
+    def save(self, present):
+        """Write the manifest, dropping projects that no longer exist"""
+        files = {relative: entry for relative, entry in self.files.items() if relative in present}
+        data = {"version": MANIFEST_VERSION, "options": self.options, "files": files}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+def convert_tree(input_dir, output_dir=None, workers=None, force=False, scale_factor=None,
+                 max_width=120, max_height=60, markdown=True, ascii=True, report=print):
+    """
+    Convert every project under input_dir
+
+    Args:
+        input_dir: Directory searched recursively for projects
+        output_dir: Where outputs go (default: next to each project)
+        workers: Worker processes (default: one per CPU; 1 converts in this process)
+        force: Convert even unchanged projects
+        scale_factor, max_width, max_height: ASCII export options, as in export_to_ascii
+        markdown, ascii: Which outputs to write
+        report: Called with each line of progress
+
+    Returns:
+        Dict with "converted", "skipped" and "failed" lists of relative
+        paths, "failures" (path -> error), "times" (path -> seconds) and
+        "elapsed" (seconds)
+    """
+    start = time.perf_counter()
+    output_dir = output_dir or input_dir
+    options = {"scale_factor": scale_factor, "max_width": max_width,
+               "max_height": max_height, "markdown": markdown, "ascii": ascii}
+    manifest = Manifest(os.path.join(output_dir, MANIFEST_NAME), options)
+    result = {"converted": [], "skipped": [], "failed": [], "failures": {}, "times": {}}
+
+    def finished(relative, seconds, error, taken=None):
+        result["times"][relative] = seconds
+        if error is None:
+            manifest.record(relative, taken)
+            result["converted"].append(relative)
+            report(f"{seconds * 1000:9.1f} ms  {relative}")
+        else:
+            result["failed"].append(relative)
+            result["failures"][relative] = error
+            report(f"   FAILED     {relative}: {error}")
+
+    projects = find_projects(input_dir)
+    clashes = output_clashes(projects)
+    pending = []
+    for relative in projects:
+        source = os.path.join(input_dir, relative)
+        outputs = output_paths(relative, output_dir, options)
+        if relative in clashes:
+            finished(relative, 0.0, clashes[relative])
+        elif not force and manifest.is_current(relative, source, outputs):
+            result["skipped"].append(relative)
+        else:
+            pending.append((relative, source, outputs))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        for relative, source, outputs in pending:
+            finished(relative, *convert_project(source, outputs, options))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(convert_project, source, outputs, options): relative
+                for relative, source, outputs in pending
+            }
+            for future in as_completed(futures):
+                finished(futures[future], *future.result())
+
+    manifest.save(set(projects))
+    result["elapsed"] = time.perf_counter() - start
+    for key in ("converted", "failed"):
+        result[key].sort()
+
+    report(f"Converted {len(result['converted'])}, skipped {len(result['skipped'])} unchanged, "
+           f"failed {len(result['failed'])} in {result['elapsed']:.2f} s")
+    for relative in result["failed"]:
+        report(f"  {relative}: {result['failures'][relative]}")
+    return result
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Regenerate markdown and ASCII exports for a directory tree of projects")
+    parser.add_argument("input_dir", help="directory searched recursively for *.json / *.uibp")
+    parser.add_argument("--output", help="write outputs under this directory instead of next to the inputs")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="convert unchanged projects too")
+    parser.add_argument("--scale", type=float, help="ASCII scale factor (default: fit the maximum size)")
+    parser.add_argument("--max-width", type=int, default=120, help="ASCII width limit in characters")
+    parser.add_argument("--max-height", type=int, default=60, help="ASCII height limit in lines")
+    parser.add_argument("--no-markdown", action="store_true", help="skip the markdown output")
+    parser.add_argument("--no-ascii", action="store_true", help="skip the ASCII output")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"not a directory: {args.input_dir}")
+    result = convert_tree(args.input_dir, args.output, args.workers, args.force, args.scale,
+                          args.max_width, args.max_height,
+                          markdown=not args.no_markdown, ascii=not args.no_ascii)
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Multi-scale ASCII export benchmark - one export per target versus one batch
+
+Usage:
+    python bench_ascii_batch.py [node_count] [workers]
+"""
+
+import sys
+import time
+
+from ascii_exporter import ASCIIExporter
+from ascii_batch import export_ascii_batch, resolve_scale
+from layout_fixtures import build_random_layout
+
+
+TARGET_SETS = {
+    "docs (IDE, wiki, 0.1, 0.2)": [(120, 60), (200, 100), 0.1, 0.2],
+    "with full size (1.0, IDE, 0.5, 0.25)": [1.0, (120, 60), 0.5, 0.25],
+}
+
+
+def timed(function):
+    """Run function and return (result, seconds)"""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    layout = build_random_layout(count, seed=1)
+    layout.root_container.height = 3000
+
+    print(f"{count:,} nodes, 5000x3000 layout\n")
+    for name, targets in TARGET_SETS.items():
+        separate, separate_time = timed(lambda: [
+            ASCIIExporter(layout, resolve_scale(layout, target)).export() for target in targets
+        ])
+        batch, batch_time = timed(lambda: export_ascii_batch(layout, targets, workers=workers))
+        assert batch == separate, "batch output differs"
+        print(name)
+        print(f"  one export per target  {separate_time * 1000:8.1f} ms")
+        print(f"  batch                  {batch_time * 1000:8.1f} ms")
+    print("\nOutputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+ASCII render cache benchmark - repeated exports during an editing session
+
+Exports a random layout uncached, then with an ASCIIRenderCache: once cold
+and then after each of a series of single-element edits.
+
+Usage:
+    python bench_ascii_cache.py [node_count]
+"""
+
+import random
+import sys
+import time
+
+from ascii_exporter import ASCIIExporter
+from ascii_cache import ASCIIRenderCache
+from layout_fixtures import build_random_layout
+
+
+def timed(function):
+    """Run function and return (result, seconds)"""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    edits = 20
+    layout = build_random_layout(count, seed=1)
+    layout.root_container.height = 3000
+    elements = layout.get_all_elements()
+    rng = random.Random(2)
+
+    print(f"{count:,} nodes, 1000x600 characters\n")
+    _, fresh = timed(lambda: ASCIIExporter(layout, 0.2).export())
+    print(f"uncached export        {fresh * 1000:8.1f} ms")
+
+    cache = ASCIIRenderCache()
+    _, cold = timed(lambda: ASCIIExporter(layout, 0.2, cache=cache).export())
+    print(f"cached, cold           {cold * 1000:8.1f} ms")
+
+    total = 0.0
+    for _ in range(edits):
+        element = rng.choice(elements)
+        element.x += rng.randint(-20, 20)
+        element.text = "edited"
+        text, seconds = timed(lambda: ASCIIExporter(layout, 0.2, cache=cache).export())
+        total += seconds
+    print(f"cached, after an edit  {total / edits * 1000:8.1f} ms (mean of {edits})")
+
+    assert text == ASCIIExporter(layout, 0.2).export(), "cached output differs"
+    print("\nOutputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+ASCII engine benchmark - list engine versus numpy engine
+
+Builds a random nested 5000x3000 layout and exports it at scale 0.2
+(a 1000x600-character grid) with each engine.
+
+Usage:
+    python bench_ascii_engines.py [node_count]
+"""
+
+import sys
+import time
+
+from ascii_exporter import ASCIIExporter
+from ascii_surface import numpy_available
+from layout_fixtures import build_random_layout
+
+
+def best_time(function, repeat=3):
+    """Run function a few times and return (result, fastest seconds)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    layout = build_random_layout(count, seed=1)
+    layout.root_container.height = 3000
+
+    engines = ["list"] + (["numpy"] if numpy_available() else [])
+    results = {}
+    print(f"{count:,} nodes, 1000x600 characters\n")
+    for engine in engines:
+        text, seconds = best_time(lambda: ASCIIExporter(layout, 0.2, engine).export())
+        results[engine] = text
+        print(f"{engine:6} {seconds * 1000:8.1f} ms")
+
+    if len(results) > 1:
+        assert results["list"] == results["numpy"], "engines disagree"
+        print("\nOutputs identical")
+    else:
+        print("\nNumPy is not installed; only the list engine was timed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+ASCII streaming benchmark - full canvas versus band-by-band export
+
+Exports a random 4000x3000 layout at scale 1.0 (12 million characters)
+to a file both ways and reports time and peak traced memory.
+
+Usage:
+    python bench_ascii_streaming.py [node_count] [engine]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from ascii_exporter import export_to_ascii
+from layout_fixtures import build_random_layout
+
+
+def measure(function):
+    """Return (seconds, peak traced bytes), timing an untraced run"""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+
+    # Tracing slows allocation-heavy code a lot, so measure memory separately
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    engine = sys.argv[2] if len(sys.argv) > 2 else "auto"
+    layout = build_random_layout(count, seed=1)
+    layout.root_container.width = 4000
+    layout.root_container.height = 3000
+
+    print(f"{count:,} nodes, 4000x3000 characters, engine {engine}\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for label, stream in (("full", False), ("stream", True)):
+            paths[label] = os.path.join(tmp, f"{label}.txt")
+            seconds, peak = measure(lambda: export_to_ascii(
+                layout, paths[label], scale_factor=1.0, engine=engine, stream=stream))
+            print(f"{label:7} {seconds:7.2f} s  peak {peak / 2**20:8.1f} MB")
+
+        with open(paths["full"]) as a, open(paths["stream"]) as b:
+            assert a.read() == b.read(), "outputs differ"
+    print("\nOutputs identical")
+
+
+if __name__ == "__main__":
+    main()
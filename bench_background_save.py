@@ -0,0 +1,58 @@
+"""
+Background save benchmark - how long the Tk thread is blocked by a save
+
+Saves a large layout once on the calling thread, then through TaskRunner
+while a Tcl event loop keeps running, and reports the time spent
+submitting and the longest gap between event loop iterations.
+
+Usage:
+    python bench_background_save.py [node_count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tkinter
+
+from background_tasks import TaskRunner
+from layout_fixtures import build_random_layout
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    layout = build_random_layout(count, seed=1)
+    tcl = tkinter.Tcl()
+    tasks = TaskRunner(tcl, poll_interval=10)
+    tasks.reset(layout)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "layout.json")
+        start = time.perf_counter()
+        layout.save_to_json(path)
+        blocking = time.perf_counter() - start
+
+        done = []
+        start = time.perf_counter()
+        tasks.submit("save", lambda replica, progress: replica.save_to_json(path),
+                     on_done=done.append)
+        submit = time.perf_counter() - start
+        longest_gap = 0.0
+        last = time.perf_counter()
+        while not done:
+            tcl.update()
+            time.sleep(0.001)  # An idle event loop
+            now = time.perf_counter()
+            longest_gap = max(longest_gap, now - last)
+            last = now
+        background = time.perf_counter() - start
+    tasks.shutdown()
+
+    print(f"{count:,} nodes, save_to_json\n")
+    print(f"  on the Tk thread          blocked {blocking * 1000:8.1f} ms")
+    print(f"  in the background         submit  {submit * 1000:8.3f} ms, "
+          f"longest event loop gap {longest_gap * 1000:6.1f} ms, done after {background * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
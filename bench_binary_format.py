@@ -0,0 +1,56 @@
+"""
+Binary format benchmark - save time, load time and file size versus JSON
+
+Usage:
+    python bench_binary_format.py [node_count]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from ui_elements import UILayout
+from bench_memory import replicate_layout
+
+
+def timed(function, *args):
+    """Run function and return (result, seconds)"""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    with open("web-bg-ui.json", "r", encoding="utf-8") as f:
+        layout = UILayout.from_dict(replicate_layout(json.load(f), target))
+    nodes = len(layout.get_all_elements()) + len(layout.get_all_containers())
+
+    directory = tempfile.mkdtemp()
+    json_file = os.path.join(directory, "project.json")
+    binary_file = os.path.join(directory, "project.uibp")
+    try:
+        _, json_save = timed(layout.save_to_json, json_file)
+        loaded, json_load = timed(UILayout.load_from_json, json_file)
+        _, binary_save = timed(layout.save_to_binary, binary_file)
+        loaded_binary, binary_load = timed(UILayout.load_from_binary, binary_file)
+        assert loaded_binary.to_dict() == loaded.to_dict()
+
+        json_size = os.path.getsize(json_file) / 1024 / 1024
+        binary_size = os.path.getsize(binary_file) / 1024 / 1024
+
+        print(f"Nodes: {nodes:,}\n")
+        print(f"{'':8} {'save':>8} {'load':>8} {'size':>10}")
+        print(f"{'JSON':8} {json_save:7.2f}s {json_load:7.2f}s {json_size:7.1f} MB")
+        print(f"{'Binary':8} {binary_save:7.2f}s {binary_load:7.2f}s {binary_size:7.1f} MB")
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Child list benchmark - removing children of a large container by index
+
+Alternates index() and remove() on a container with many children, as
+deleting items on the canvas does (the index is recorded for undo), and
+compares ChildList with a plain list.
+
+Usage:
+    python bench_children.py [children] [removals]
+"""
+
+import random
+import sys
+import time
+
+from ui_elements import UIElement, ChildList
+
+
+def remove_by_index(children, victims):
+    """Look up and remove each victim; get the seconds taken"""
+    start = time.perf_counter()
+    for item in victims:
+        children.index(item)
+        children.remove(item)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    removals = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    items = [UIElement("Button", f"B{i}") for i in range(count)]
+    victims = random.Random(1).sample(items, removals)
+
+    print(f"{removals} index + remove pairs on {count:,} children\n")
+    for name, children in (("list", list(items)), ("ChildList", ChildList(items))):
+        seconds = remove_by_index(children, victims)
+        print(f"  {name:10} {seconds * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
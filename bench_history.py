@@ -0,0 +1,112 @@
+"""
+Undo/redo benchmark - recorded commands versus whole-layout snapshots
+
+For layouts of growing size, times recording, undoing and redoing each
+kind of change, next to one UILayout.to_dict() snapshot (what a naive
+undo would take per change). The command times should stay flat as the
+layout grows.
+
+Usage:
+    python bench_history.py [steps]
+"""
+
+import sys
+import time
+
+from ui_elements import UIElement, Container
+from history import History, Move, Resize, SetAttribute, AddNode, RemoveNode
+from layout_fixtures import build_random_layout
+
+
+SIZES = (1000, 10000, 100000)
+
+
+def best_time(function, repeat=5):
+    """Get the best of several timings of function(), in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def change_steps(layout, steps):
+    """Get {kind: function making, recording, undoing and redoing steps changes}"""
+    elements = layout.get_all_elements()[:steps]
+    containers = [node for node in layout.get_all_containers()[1:] if node.children][:steps]
+
+    def move(history):
+        for node in containers:
+            old = node.x, node.y
+            node.x += 5
+            history.record(Move(node, *old))
+        for _ in containers:
+            history.undo()
+        for _ in containers:
+            history.redo()
+
+    def resize_drag(history):
+        node = elements[0]
+        for step in range(steps):
+            old = node.width, node.height
+            node.width += 1
+            history.record(Resize(node, *old), merge=True)
+        history.seal()
+        history.undo()
+        history.redo()
+
+    def set_text(history):
+        for node in elements:
+            old = node.text
+            node.text = "changed"
+            history.record(SetAttribute(node, "text", old))
+        for _ in elements:
+            history.undo()
+        for _ in elements:
+            history.redo()
+
+    def add_remove(history):
+        root = layout.root_container
+        for step in range(steps):
+            panel = Container(f"Added{step}", 10, 10, 100, 100)
+            panel.add_child(UIElement("Button", f"AddedButton{step}"))
+            root.add_child(panel)
+            history.record(AddNode(panel))
+            index = root.children.index(panel)
+            root.remove_child(panel)
+            history.record(RemoveNode(panel, root, index))
+        for _ in range(2 * steps):
+            history.undo()
+        for _ in range(2 * steps):
+            history.redo()
+
+    return {
+        "move container": (move, len(containers)),
+        "resize drag (merged)": (resize_drag, steps),
+        "set text": (set_text, len(elements)),
+        "add + remove subtree": (add_remove, 2 * steps),
+    }
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"Microseconds per change (record + undo + redo), {steps} changes per kind\n")
+    print(f"{'':24}" + "".join(f"{size:>12,}" for size in SIZES))
+
+    rows = {}
+    snapshots = []
+    for size in SIZES:
+        layout = build_random_layout(size, seed=1)
+        for kind, (function, count) in change_steps(layout, steps).items():
+            seconds = best_time(lambda: function(History()))
+            rows.setdefault(kind, []).append(seconds / count * 1e6)
+        snapshots.append(best_time(layout.to_dict, repeat=3) * 1e6)
+
+    for kind, values in rows.items():
+        print(f"{kind:24}" + "".join(f"{value:12.1f}" for value in values))
+    print(f"{'to_dict() snapshot':24}" + "".join(f"{value:12.0f}" for value in snapshots))
+
+
+if __name__ == "__main__":
+    main()
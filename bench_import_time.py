@@ -0,0 +1,64 @@
+"""
+Import time benchmark - the headless core versus the GUI application
+
+Runs each import in a fresh interpreter with -X importtime and reports the
+cumulative time of the top-level import (best of several runs) and how
+many modules it loaded.
+
+Usage:
+    python bench_import_time.py [runs]
+"""
+
+import subprocess
+import sys
+
+
+CASES = {
+    "mdui_core": "import mdui_core",
+    "mdui_core + UILayout": "import mdui_core; mdui_core.UILayout",
+    "mdui_core + export_to_ascii": "import mdui_core; mdui_core.export_to_ascii",
+    "mdui_core + convert_tree": "import mdui_core; mdui_core.convert_tree",
+    "main (GUI)": "import main",
+}
+
+
+def import_times(statement):
+    """Import in a fresh interpreter and map each top-level module to its cumulative microseconds"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.rstrip()] = int(cumulative)  # Nested modules keep their indent
+    return times
+
+
+def import_time(statement, startup):
+    """Get (microseconds, module count) of a statement beyond interpreter startup, or None on failure"""
+    times = import_times(statement)
+    if times is None:
+        return None
+    added = {name: micros for name, micros in times.items() if name not in startup}
+    total = sum(micros for name, micros in added.items() if not name.startswith("  "))
+    return total, len(added)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    startup = import_times("pass")
+    print(f"Best of {runs} runs (cumulative import time of the statement)\n")
+    for name, statement in CASES.items():
+        samples = [import_time(statement, startup) for _ in range(runs)]
+        if None in samples:
+            print(f"  {name:30} failed (missing dependency?)")
+            continue
+        best = min(micros for micros, _ in samples)
+        print(f"  {name:30} {best / 1000:8.1f} ms  {samples[0][1]:4} modules")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Autosave journal benchmark - appending operations versus full saves
+
+For layouts of growing size, times journaling typical edits (fsync'd in
+batches, as in the builder) next to one save_to_json. The append cost
+should stay flat as the layout grows.
+
+Usage:
+    python bench_journal.py [operations]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from history import History, Move, SetAttribute
+from journal import Journal, recover
+from layout_fixtures import build_random_layout
+
+
+SIZES = (1000, 10000, 100000)
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{operations} journaled edits per layout\n")
+    print(f"{'nodes':>9} {'append (us/op)':>15} {'save_to_json (ms)':>18} {'recover (ms)':>13}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            project = os.path.join(directory, f"layout{size}.json")
+            layout = build_random_layout(size, seed=1)
+            start = time.perf_counter()
+            layout.save_to_json(project)
+            save_time = time.perf_counter() - start
+
+            history = History()
+            journal = Journal(project)
+            journal.start(layout)
+            history.listeners.append(journal.record)
+            # Deep nodes make the longest paths
+            elements = layout.get_all_elements()[-50:]
+            start = time.perf_counter()
+            for i in range(operations):
+                element = elements[i % len(elements)]
+                if i % 2:
+                    old = element.x, element.y
+                    element.x += 1
+                    history.record(Move(element, *old))
+                else:
+                    old_text = element.text
+                    element.text = f"text {i}"
+                    history.record(SetAttribute(element, "text", old_text))
+            journal.sync()
+            append_time = (time.perf_counter() - start) / operations
+
+            start = time.perf_counter()
+            recovered, _ = recover(project)
+            recover_time = time.perf_counter() - start
+            assert recovered.to_dict() == layout.to_dict(), "recovered layout differs"
+            journal.close()
+
+            print(f"{size:>9,} {append_time * 1e6:15.1f} {save_time * 1000:18.1f} "
+                  f"{recover_time * 1000:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Loading benchmark - json.load + from_dict versus the streaming loader
+
+Writes a generated project of the requested size (default 200 MB) by
+replicating web-bg-ui.json, then loads it once with each loader in a
+fresh process and reports wall time and peak memory.
+
+Usage:
+    python bench_loading.py [size_mb] [project.json]
+"""
+
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_memory import rename_subtree
+
+
+def write_project(filename, size_mb):
+    """Write a large project file one top-level child at a time"""
+    with open("web-bg-ui.json", "r", encoding="utf-8") as f:
+        data = json.load(f)
+    root = data["root_container"]
+    template = root["children"]
+    header = {key: value for key, value in root.items() if key != "children"}
+    target = size_mb * 1024 * 1024
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write('{\n  "name": %s,\n  "root_container": ' % json.dumps(data["name"]))
+        f.write(json.dumps(header, indent=2)[:-2])
+        f.write(',\n    "children": [')
+
+        written = 0
+        copy_number = 0
+        while written < target:
+            for child in template:
+                clone = copy.deepcopy(child)
+                rename_subtree(clone, copy_number)
+                text = json.dumps(clone, indent=2)
+                f.write(",\n" if written else "\n")
+                f.write(text)
+                written += len(text)
+            copy_number += 1
+        f.write("\n    ]\n  }\n}\n")
+
+
+def run_loader(mode, filename):
+    """Load the file in this process and print time and peak memory"""
+    import resource
+    from ui_elements import UILayout
+
+    start = time.perf_counter()
+    if mode == "json":
+        with open(filename, "r", encoding="utf-8") as f:
+            layout = UILayout.from_dict(json.load(f))
+    else:
+        layout = UILayout.load_from_json(filename)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak,
+                      "nodes": len(layout.get_all_elements()) + len(layout.get_all_containers())}))
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--run":
+        run_loader(sys.argv[2], sys.argv[3])
+        return
+
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    if len(sys.argv) > 2:
+        filename = sys.argv[2]
+        cleanup = False
+    else:
+        fd, filename = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        cleanup = True
+
+    try:
+        if cleanup or not os.path.exists(filename):
+            print(f"Writing {size_mb} MB project to {filename}...")
+            write_project(filename, size_mb)
+        print(f"File size: {os.path.getsize(filename) / 1024 / 1024:.0f} MB\n")
+
+        for mode, label in (("json", "json.load + from_dict"), ("stream", "streaming loader")):
+            output = subprocess.run(
+                [sys.executable, __file__, "--run", mode, filename],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output)
+            print(f"{label:24} {result['seconds']:6.2f}s  "
+                  f"peak {result['peak_mb']:7.0f} MB  ({result['nodes']:,} nodes)")
+    finally:
+        if cleanup:
+            os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
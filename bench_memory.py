@@ -0,0 +1,158 @@
+"""
+Memory benchmark - bytes per node for very large layouts
+
+Loads web-bg-ui.json and replicates its contents until the layout holds
+the requested number of nodes, then reports how much memory the object
+tree takes per node, and the bytes per element of the slotted UIElement
+next to the original representation (plain classes with a __dict__ and
+an eagerly allocated properties dict).
+
+Usage:
+    python bench_memory.py [node_count]
+"""
+
+import copy
+import json
+import sys
+import time
+import tracemalloc
+
+from ui_elements import UILayout, UIElement
+
+
+class BaselineElement:
+    """An element as originally stored: instance __dict__, properties always allocated"""
+
+    def __init__(self, element_type, name, x=0, y=0, width=100, height=30):
+        self.element_type = element_type
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.text = ""
+        self.enabled = True
+        self.visible = True
+        self.properties = {}
+        self.parent = None
+
+    @staticmethod
+    def from_dict(data):
+        element = BaselineElement(data["element_type"], data["name"], data["x"], data["y"],
+                                  data["width"], data["height"])
+        element.text = data.get("text", "")
+        element.enabled = data.get("enabled", True)
+        element.visible = data.get("visible", True)
+        element.properties = data.get("properties", {}).copy()
+        return element
+
+
+def count_nodes(node_data):
+    """Count the nodes in a serialized subtree"""
+    count = 0
+    stack = [node_data]
+    while stack:
+        current = stack.pop()
+        count += 1
+        stack.extend(current.get("children", []))
+    return count
+
+
+def rename_subtree(node_data, suffix):
+    """Give every node in a serialized subtree a unique name"""
+    stack = [node_data]
+    while stack:
+        current = stack.pop()
+        current["name"] = f"{current['name']}_{suffix}"
+        stack.extend(current.get("children", []))
+
+
+def replicate_layout(data, target_nodes):
+    """Copy the root's children over and over until target_nodes is reached"""
+    root = data["root_container"]
+    template = root["children"]
+    per_copy = sum(count_nodes(child) for child in template)
+
+    children = []
+    copies = max(1, (target_nodes - 1) // per_copy)
+    for i in range(copies):
+        for child in template:
+            clone = copy.deepcopy(child)
+            rename_subtree(clone, i)
+            children.append(clone)
+
+    big = dict(data)
+    big["root_container"] = dict(root, children=children)
+    return big
+
+
+def measure(data):
+    """Build a layout from data and return (layout, bytes allocated, seconds)"""
+    tracemalloc.start()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    layout = UILayout.from_dict(data)
+    elapsed = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0] - start_bytes
+    tracemalloc.stop()
+    return layout, used, elapsed
+
+
+def _iter_containers(node_data):
+    """Yield every serialized container in a subtree"""
+    stack = [node_data]
+    while stack:
+        current = stack.pop()
+        if current.get("type") == "container":
+            yield current
+        stack.extend(current.get("children", []))
+
+
+
+def _iter_elements(node_data):
+    """Yield every serialized element in a subtree"""
+    stack = [node_data]
+    while stack:
+        current = stack.pop()
+        if current.get("type") != "container":
+            yield current
+        stack.extend(current.get("children", []))
+
+
+def bytes_per_element(element_class, element_data):
+    """Get the bytes allocated per element when building elements of a class"""
+    tracemalloc.start()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    elements = [element_class.from_dict(data) for data in element_data]
+    used = tracemalloc.get_traced_memory()[0] - start_bytes
+    tracemalloc.stop()
+    del elements
+    return used / len(element_data)
+
+
+def main():
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    with open("web-bg-ui.json", "r", encoding="utf-8") as f:
+        data = json.load(f)
+    big = replicate_layout(data, target)
+    nodes = count_nodes(big["root_container"])
+    elements = nodes - sum(1 for _ in _iter_containers(big["root_container"]))
+
+    layout, used, elapsed = measure(big)
+
+    print(f"Nodes:            {nodes:,} ({elements:,} elements)")
+    print(f"Build time:       {elapsed:.2f}s")
+    print(f"Memory:           {used / 1024 / 1024:.1f} MiB")
+    print(f"Bytes per node:   {used / nodes:.0f}")
+
+    element_data = list(_iter_elements(big["root_container"]))
+    baseline = bytes_per_element(BaselineElement, element_data)
+    slotted = bytes_per_element(UIElement, element_data)
+    print(f"\nBytes per element: {baseline:.0f} before (__dict__), {slotted:.0f} after (__slots__), "
+          f"{(1 - slotted / baseline) * 100:.0f}% less")
+    return layout
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Properties panel benchmark - time to show the selected item's properties
+
+Selects containers and elements with custom properties in turn, as when
+clicking through a design, and reports the time per selection including
+Tk's layout pass. Needs a display and customtkinter.
+
+Usage:
+    python bench_properties_panel.py [selections]
+"""
+
+import statistics
+import sys
+import time
+
+from ui_elements import UIElement, Container
+
+
+def sample_items():
+    """Get containers and elements with a varying number of custom properties"""
+    items = []
+    for i in range(4):
+        items.append(Container(f"Panel{i}", 10 * i, 10 * i, 200, 150,
+                               "vertical" if i % 2 else "horizontal"))
+        element = UIElement("Button", f"Button{i}", 10, 10, 100, 30)
+        element.text = f"Button {i}"
+        for key in range(i * 2):
+            element.set_property(f"key{key}", f"value{key}")
+        items.append(element)
+    return items
+
+
+def main():
+    selections = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    try:
+        import customtkinter as ctk
+        root = ctk.CTk()
+    except Exception as e:
+        print(f"Cannot create a window (no display or customtkinter?): {e}")
+        return 1
+    from properties_panel import PropertiesPanel
+
+    root.geometry("300x700")
+    panel = PropertiesPanel(root, lambda: None)
+    panel.pack(fill="both", expand=True)
+    root.update()
+
+    items = sample_items()
+    times = []
+    for step in range(selections):
+        start = time.perf_counter()
+        panel.load_item(items[step % len(items)])
+        root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    root.destroy()
+
+    print(f"{selections} selections of {len(items)} items\n")
+    print(f"  First selection  {times[0]:8.2f} ms")
+    print(f"  Median           {statistics.median(times):8.2f} ms")
+    print(f"  Worst            {max(times):8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+GUI startup benchmark - time to first frame and time to interactive
+
+Starts the application with --startup-timing several times (each in a
+fresh interpreter, so imports are included) and reports the best and
+median of both times. Needs a display and customtkinter.
+
+Usage:
+    python bench_startup.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+
+PHASES = ("Time to first frame", "Time to interactive")
+
+
+def startup_times():
+    """Run the application once and get {phase: milliseconds}, or None on failure"""
+    main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    result = subprocess.run([sys.executable, main, "--startup-timing"],
+                            capture_output=True, text=True, timeout=60)
+    times = {}
+    for line in result.stdout.splitlines():
+        phase, _, value = line.partition(":")
+        if phase in PHASES:
+            times[phase] = float(value.split()[0])
+    if result.returncode != 0 or len(times) != len(PHASES):
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no timing output")
+        return None
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = []
+    for _ in range(runs):
+        times = startup_times()
+        if times is None:
+            print("Startup failed (no display or customtkinter?)")
+            return 1
+        samples.append(times)
+
+    print(f"{runs} runs\n")
+    for phase in PHASES:
+        values = [times[phase] for times in samples]
+        print(f"  {phase}  best {min(values):8.1f} ms  median {statistics.median(values):8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,436 @@
+"""
+Compact binary project format
+
+A smaller and faster alternative to the JSON project files. The file holds
+every distinct string once in a table; nodes refer to strings by index,
+store their geometry as packed 32-bit integers when possible and use a
+one-byte type code instead of repeated keys. Decoding gives back exactly
+what UILayout.to_dict produced.
+
+File layout (integers are little-endian, varints are unsigned LEB128):
+    magic b"UIBP", version (u8)
+    string table: count (varint), then per string byte length (varint)
+        and UTF-8 bytes
+    layout name (value)
+    nodes in pre-order, starting with the root container, each starting
+    with a kind byte (KIND_CONTAINER or KIND_ELEMENT):
+        kind | PACKED: a fixed record (CONTAINER_RECORD / ELEMENT_RECORD)
+            with int32 geometry, string indexes and flags; elements are
+            followed by their properties (value)
+        kind: x, y, width, height and the remaining fields as values;
+            containers are followed by their child count (varint)
+
+Values start with a tag byte (TAG_*). Integers are zigzag varints, floats
+are float64, strings are string table indexes. Nodes whose fields all fit
+the fixed record (the usual case) are packed, anything else still
+round-trips through the tagged values.
+
+Usage:
+    python binary_format.py input.json output.uibp
+    python binary_format.py input.uibp output.json
+"""
+
+import gc
+import struct
+import sys
+
+from ui_elements import UIElement, Container, UILayout
+
+
+MAGIC = b"UIBP"
+VERSION = 1
+EXTENSION = ".uibp"
+
+KIND_CONTAINER = 0
+KIND_ELEMENT = 1
+PACKED = 0x80
+
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STRING = 5
+TAG_LIST = 6
+TAG_DICT = 7
+
+# x, y, width, height, name, orientation, padding, background, child count
+CONTAINER_RECORD = struct.Struct("<iiiiIIiII")
+# x, y, width, height, element_type, name, text, flags (ENABLED | VISIBLE)
+ELEMENT_RECORD = struct.Struct("<iiiiIIIB")
+ENABLED = 1
+VISIBLE = 2
+
+_FLOAT = struct.Struct("<d")
+_INT32_MIN = -2 ** 31
+_INT32_MAX = 2 ** 31 - 1
+
+
+class BinaryFormatError(ValueError):
+    """Raised for files that are not valid binary projects"""
+
+
+def _is_int32(value):
+    """Check if a value fits a packed int32 field"""
+    return type(value) is int and _INT32_MIN <= value <= _INT32_MAX
+
+
+class _Encoder:
+    """Writes values and nodes into a byte buffer while interning strings"""
+
+    def __init__(self):
+        self.out = bytearray()
+        self.strings = {}  # string -> index
+
+    def varint(self, value):
+        out = self.out
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def string(self, value):
+        self.varint(self.index(value))
+
+    def value(self, value):
+        out = self.out
+        if value is None:
+            out.append(TAG_NONE)
+        elif value is False:
+            out.append(TAG_FALSE)
+        elif value is True:
+            out.append(TAG_TRUE)
+        elif isinstance(value, int):
+            out.append(TAG_INT)
+            self.varint(value << 1 if value >= 0 else (-value << 1) - 1)
+        elif isinstance(value, float):
+            out.append(TAG_FLOAT)
+            out += _FLOAT.pack(value)
+        elif isinstance(value, str):
+            out.append(TAG_STRING)
+            self.string(value)
+        elif isinstance(value, (list, tuple)):
+            out.append(TAG_LIST)
+            self.varint(len(value))
+            for item in value:
+                self.value(item)
+        elif isinstance(value, dict):
+            out.append(TAG_DICT)
+            self.varint(len(value))
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"Property keys must be strings, not {type(key).__name__}")
+                self.string(key)
+                self.value(item)
+        else:
+            raise TypeError(f"Cannot store {type(value).__name__} values in a binary project")
+
+    def index(self, value):
+        """Get the string table index of a string"""
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def node(self, node):
+        geometry = (node.x, node.y, node.width, node.height)
+        packable = all(_is_int32(v) for v in geometry)
+
+        if isinstance(node, Container):
+            if (packable and _is_int32(node.padding) and
+                    type(node.name) is str and type(node.orientation) is str and
+                    type(node.background) is str):
+                self.out.append(KIND_CONTAINER | PACKED)
+                self.out += CONTAINER_RECORD.pack(
+                    *geometry, self.index(node.name), self.index(node.orientation),
+                    node.padding, self.index(node.background), len(node.children)
+                )
+                return
+
+            self.out.append(KIND_CONTAINER)
+            for value in geometry:
+                self.value(value)
+            self.value(node.name)
+            self.value(node.orientation)
+            self.value(node.padding)
+            self.value(node.background)
+            self.varint(len(node.children))
+        else:
+            if (packable and type(node.element_type) is str and type(node.name) is str and
+                    type(node.text) is str and type(node.enabled) is bool and
+                    type(node.visible) is bool):
+                self.out.append(KIND_ELEMENT | PACKED)
+                flags = (ENABLED if node.enabled else 0) | (VISIBLE if node.visible else 0)
+                self.out += ELEMENT_RECORD.pack(
+                    *geometry, self.index(node.element_type), self.index(node.name),
+                    self.index(node.text), flags
+                )
+            else:
+                self.out.append(KIND_ELEMENT)
+                for value in geometry:
+                    self.value(value)
+                self.value(node.element_type)
+                self.value(node.name)
+                self.value(node.text)
+                self.value(node.enabled)
+                self.value(node.visible)
+            self.value(node._properties or {})
+
+    def string_table(self):
+        table = bytearray()
+        out, self.out = self.out, table
+        self.varint(len(self.strings))
+        for string in self.strings:
+            data = string.encode("utf-8")
+            self.varint(len(data))
+            table += data
+        self.out = out
+        return table
+
+
+class _Decoder:
+    """Reads values and nodes back from a byte buffer"""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.strings = []
+
+    def byte(self):
+        try:
+            value = self.data[self.pos]
+        except IndexError:
+            raise BinaryFormatError("Unexpected end of file") from None
+        self.pos += 1
+        return value
+
+    def varint(self):
+        data = self.data
+        pos = self.pos
+        result = 0
+        shift = 0
+        try:
+            while True:
+                byte = data[pos]
+                pos += 1
+                result |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+        except IndexError:
+            raise BinaryFormatError("Unexpected end of file") from None
+        self.pos = pos
+        return result
+
+    def string(self):
+        index = self.varint()
+        try:
+            return self.strings[index]
+        except IndexError:
+            raise BinaryFormatError(f"String index {index} out of range") from None
+
+    def value(self):
+        tag = self.byte()
+        if tag == TAG_INT:
+            value = self.varint()
+            return -((value + 1) >> 1) if value & 1 else value >> 1
+        if tag == TAG_STRING:
+            return self.string()
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_NONE:
+            return None
+        if tag == TAG_FLOAT:
+            if self.pos + 8 > len(self.data):
+                raise BinaryFormatError("Unexpected end of file")
+            value = _FLOAT.unpack_from(self.data, self.pos)[0]
+            self.pos += 8
+            return value
+        if tag == TAG_LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == TAG_DICT:
+            result = {}
+            for _ in range(self.varint()):
+                key = self.string()
+                result[key] = self.value()
+            return result
+        raise BinaryFormatError(f"Unknown value tag {tag}")
+
+    def string_table(self):
+        data = self.data
+        for _ in range(self.varint()):
+            length = self.varint()
+            end = self.pos + length
+            if end > len(data):
+                raise BinaryFormatError("Unexpected end of file")
+            self.strings.append(data[self.pos:end].decode("utf-8"))
+            self.pos = end
+
+    def record(self, record):
+        """Read a fixed record"""
+        pos = self.pos
+        if pos + record.size > len(self.data):
+            raise BinaryFormatError("Unexpected end of file")
+        self.pos = pos + record.size
+        return record.unpack_from(self.data, pos)
+
+    def properties(self):
+        """Read an element's properties, skipping the common empty dict"""
+        data = self.data
+        pos = self.pos
+        if data[pos:pos + 2] == b"\x07\x00":  # TAG_DICT, 0 items
+            self.pos = pos + 2
+            return None
+        return self.value()
+
+    def node(self):
+        """Read one node; returns (node, child count)"""
+        kind = self.byte()
+        strings = self.strings
+        try:
+            if kind == KIND_ELEMENT | PACKED:
+                x, y, width, height, element_type, name, text, flags = self.record(ELEMENT_RECORD)
+                element = UIElement(strings[element_type], strings[name], x, y, width, height)
+                element.text = strings[text]
+                element.enabled = bool(flags & ENABLED)
+                element.visible = bool(flags & VISIBLE)
+                properties = self.properties()
+                if properties:
+                    element._properties = properties
+                return element, 0
+
+            if kind == KIND_CONTAINER | PACKED:
+                (x, y, width, height, name, orientation, padding, background,
+                 child_count) = self.record(CONTAINER_RECORD)
+                container = Container(strings[name], x, y, width, height, strings[orientation])
+                container.padding = padding
+                container.background = strings[background]
+                return container, child_count
+        except IndexError:
+            raise BinaryFormatError("String index out of range") from None
+
+        if kind == KIND_CONTAINER:
+            x, y, width, height = self.value(), self.value(), self.value(), self.value()
+            name = self.value()
+            container = Container(name, x, y, width, height, self.value())
+            container.padding = self.value()
+            container.background = self.value()
+            return container, self.varint()
+        if kind == KIND_ELEMENT:
+            x, y, width, height = self.value(), self.value(), self.value(), self.value()
+            element_type = self.value()
+            element = UIElement(element_type, self.value(), x, y, width, height)
+            element.text = self.value()
+            element.enabled = self.value()
+            element.visible = self.value()
+            properties = self.value()
+            if properties:
+                element._properties = properties
+            return element, 0
+        raise BinaryFormatError(f"Unknown node kind {kind}")
+
+
+def dumps(layout):
+    """Encode a layout as binary project bytes"""
+    encoder = _Encoder()
+    encoder.value(layout.name)
+
+    stack = [layout.root_container]
+    while stack:
+        node = stack.pop()
+        encoder.node(node)
+        if isinstance(node, Container):
+            stack.extend(reversed(node.children))
+
+    header = MAGIC + bytes([VERSION])
+    return header + encoder.string_table() + encoder.out
+
+
+def loads(data):
+    """Decode binary project bytes into a layout"""
+    if data[:len(MAGIC)] != MAGIC:
+        raise BinaryFormatError("Not a binary UI project")
+    version = data[len(MAGIC)] if len(data) > len(MAGIC) else None
+    if version != VERSION:
+        raise BinaryFormatError(f"Unsupported binary project version {version}")
+
+    decoder = _Decoder(data)
+    decoder.pos = len(MAGIC) + 1
+    decoder.string_table()
+    name = decoder.value()
+
+    gc_was_enabled = gc.isenabled()
+    # Building many objects triggers a lot of pointless collections
+    gc.disable()
+    try:
+        root, remaining = decoder.node()
+        if not isinstance(root, Container):
+            raise BinaryFormatError("Root node must be a container")
+
+        # (container, children still to read). A container is attached to
+        # its parent once its own subtree is complete, so add_child never
+        # has to walk up a long chain of ancestors
+        stack = [(root, remaining)]
+        while stack:
+            container, remaining = stack[-1]
+            if not remaining:
+                stack.pop()
+                if stack:
+                    stack[-1][0].add_child(container)
+                continue
+            stack[-1] = (container, remaining - 1)
+            child, child_count = decoder.node()
+            if child_count:
+                stack.append((child, child_count))
+            else:
+                container.add_child(child)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if decoder.pos != len(data):
+        raise BinaryFormatError("Trailing data after the last node")
+
+    layout = UILayout(name)
+    layout.root_container = root
+    return layout
+
+
+def save(layout, filename):
+    """Save a layout to a binary project file"""
+    with open(filename, "wb") as f:
+        f.write(dumps(layout))
+
+
+def load(filename):
+    """Load a layout from a binary project file"""
+    with open(filename, "rb") as f:
+        return loads(f.read())
+
+
+def is_binary_project(filename):
+    """Check if a file starts with the binary project magic"""
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def convert(source, destination):
+    """Convert between JSON and binary project files"""
+    if is_binary_project(source):
+        load(source).save_to_json(destination)
+    else:
+        save(UILayout.load_from_json(source), destination)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2])
+    print(f"Converted {sys.argv[1]} -> {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
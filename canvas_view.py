@@ -2,9 +2,15 @@
 Canvas View for visual UI building
 """
 
+import time
+from collections import deque
 import customtkinter as ctk
 import tkinter as tk
 from ui_elements import UIElement, Container
+from spatial_index import SpatialIndex
+from scene_graph import SceneGraph
+from traversal import iter_edges, iter_preorder
+from history import History, Move, Resize, AddNode, RemoveNode
 
 
 class CanvasView(ctk.CTkFrame):
@@ -16,12 +22,24 @@ class CanvasView(ctk.CTkFrame):
     ELEMENT_COLOR = "#e74c3c"
     SELECTED_COLOR = "#f39c12"
     BACKGROUND_COLOR = "#2b2b2b"
+    GRID_COLOR = "#3a3a3a"
     
-    def __init__(self, parent, ui_layout, on_item_selected):
+    # Canvas extent and grid spacing
+    SCROLL_REGION = (0, 0, 2000, 2000)
+    GRID_SIZE = 20
+    
+    # Drag and resize updates are coalesced to at most one per frame
+    FRAME_INTERVAL = 1 / 60
+    
+    # Items this far outside the visible window are still drawn
+    VIEWPORT_MARGIN = 200
+    
+    def __init__(self, parent, ui_layout, on_item_selected, defer_grid=False, history=None):
         super().__init__(parent)
         
         self.ui_layout = ui_layout
         self.on_item_selected = on_item_selected
+        self.history = history if history is not None else History()  # Undo/redo of canvas edits
         self.adding_mode = None  # What we're adding (element type or "Container")
         self.selected_item = None
         self.dragging_item = None
@@ -30,8 +48,22 @@ class CanvasView(ctk.CTkFrame):
         self.drag_start_y = 0
         self.original_width = 0
         self.original_height = 0
+        self.drag_offset = (0, 0)  # Offset already applied to the canvas
+        self.drag_target = (0, 0)  # Offset requested by the latest motion event
+        self._frame_job = None
+        self._last_frame = 0.0
+        self.frame_times = deque(maxlen=240)  # Seconds spent per drag/resize frame
+        self._viewport_job = None
         self.copied_item = None  # Store the copied item for pasting
         self.resize_handle_size = 10  # Size of the resize handle
+        self.grid_size = self.GRID_SIZE
+        self.scroll_region = self.SCROLL_REGION
+        self._grid_key = None  # (scroll region, grid size) the grid was drawn for
+        self._grid_deferred = defer_grid  # Left to the first explicit draw_grid()
+
+        # Spatial index used for hit-testing
+        self.spatial_index = SpatialIndex()
+        self.spatial_index.rebuild(self.ui_layout.root_container)
         
         # Scrollbars (pack first so they don't get covered)
         self.v_scrollbar = ctk.CTkScrollbar(self, orientation="vertical")
@@ -45,21 +77,32 @@ class CanvasView(ctk.CTkFrame):
             self,
             bg=self.BACKGROUND_COLOR,
             highlightthickness=0,
-            xscrollcommand=self.h_scrollbar.set,
-            yscrollcommand=self.v_scrollbar.set
+            xscrollcommand=self.on_xscroll,
+            yscrollcommand=self.on_yscroll
         )
         self.canvas.pack(fill="both", expand=True)
 
         # Configure scrollbars
         self.h_scrollbar.configure(command=self.canvas.xview)
         self.v_scrollbar.configure(command=self.canvas.yview)
-        self.canvas.configure(scrollregion=(0, 0, 2000, 2000))
+        self.canvas.configure(scrollregion=self.scroll_region)
+
+        # Retained canvas items for every container and element
+        self.scene = SceneGraph(
+            self.canvas,
+            container_color=self.CONTAINER_COLOR,
+            container_horizontal_color=self.CONTAINER_HORIZONTAL_COLOR,
+            element_color=self.ELEMENT_COLOR,
+            selected_color=self.SELECTED_COLOR,
+            resize_handle_size=self.resize_handle_size
+        )
         
         # Bind events
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
         self.canvas.bind("<Motion>", self.on_canvas_motion)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_viewport_update())
         
         # Draw initial layout
         self.redraw()
@@ -68,7 +111,68 @@ class CanvasView(ctk.CTkFrame):
         """Set a new layout"""
         self.ui_layout = ui_layout
         self.selected_item = None
+        self.scene.selected_item = None
+        self.history.clear()  # Its commands refer to the old layout
+        self.spatial_index.rebuild(ui_layout.root_container)
         self.redraw()
+
+    def select_item(self, item):
+        """Change the selection, redrawing only the affected items"""
+        previous = self.selected_item
+        self.selected_item = item
+        self.scene.selected_item = item
+        for changed in (previous, item):
+            if changed is not None:
+                self.scene.refresh(changed, *self._parent_offset(changed))
+
+    def refresh_item(self, item):
+        """Refresh an item after its properties were edited"""
+        if item is not None and item in self.spatial_index:
+            self.spatial_index.update_subtree(item)
+            self.scene.refresh(item, *self._parent_offset(item), subtree=True)
+            # Edits can move items into or out of the visible area
+            x1, y1, x2, y2 = self.spatial_index.bbox(item)
+            vx1, vy1, vx2, vy2 = self.get_viewport()
+            visible = x1 <= vx2 and vx1 <= x2 and y1 <= vy2 and vy1 <= y2
+            if visible != (item in self.scene):
+                self.redraw()
+        else:
+            self.redraw()
+
+    def remove_item(self, item):
+        """Remove an item from its parent container"""
+        parent = item.parent
+        if parent:
+            if self.selected_item is item:
+                self.select_item(None)
+            self.spatial_index.remove_subtree(item)
+            index = parent.children.index(item)
+            parent.remove_child(item)
+            self.history.record(RemoveNode(item, parent, index))
+            self.redraw()
+
+    def undo(self):
+        """Undo the latest change; returns its command, or None if there was nothing to undo"""
+        return self._after_history_step(self.history.undo())
+
+    def redo(self):
+        """Redo the latest undone change; returns its command, or None if there was nothing to redo"""
+        return self._after_history_step(self.history.redo())
+
+    def _after_history_step(self, command):
+        """Bring the index, selection and canvas in line after an undo or redo"""
+        if command is None:
+            return None
+        node = command.node
+        if node.parent is not None:
+            self.spatial_index.update_subtree(node)
+        else:
+            # Removed again (the root itself is never part of a command)
+            self.spatial_index.remove_subtree(node)
+        if self.selected_item is not None and self.selected_item not in self.spatial_index:
+            self.select_item(None)
+        self.redraw()
+        return command
         
     def set_adding_mode(self, item_type):
         """Set the mode for adding new items"""
@@ -81,107 +185,78 @@ class CanvasView(ctk.CTkFrame):
         self.canvas.configure(cursor="")
         
     def redraw(self):
-        """Redraw the entire canvas"""
-        self.canvas.delete("all")
-        
-        # Draw grid
-        self.draw_grid()
-        
-        # Draw root container and all children
-        self.draw_container(self.ui_layout.root_container)
+        """Bring the canvas in line with the layout"""
+        # The grid is only recreated when its size or extent changed
+        if not self._grid_deferred:
+            self.draw_grid()
+        
+        # Create, update or delete only the items that changed
+        self.scene.sync(self.ui_layout.root_container, self.get_viewport())
+        
+    def get_viewport(self):
+        """Get the visible canvas area, plus a margin, in canvas coordinates"""
+        margin = self.VIEWPORT_MARGIN
+        x1 = self.canvas.canvasx(0)
+        y1 = self.canvas.canvasy(0)
+        x2 = self.canvas.canvasx(self.canvas.winfo_width())
+        y2 = self.canvas.canvasy(self.canvas.winfo_height())
+        return (x1 - margin, y1 - margin, x2 + margin, y2 + margin)
+        
+    def on_xscroll(self, first, last):
+        """Update the horizontal scrollbar and the drawn area"""
+        self.h_scrollbar.set(first, last)
+        self.schedule_viewport_update()
+        
+    def on_yscroll(self, first, last):
+        """Update the vertical scrollbar and the drawn area"""
+        self.v_scrollbar.set(first, last)
+        self.schedule_viewport_update()
+        
+    def schedule_viewport_update(self):
+        """Draw newly exposed items once scrolling has settled"""
+        if self._viewport_job is None:
+            self._viewport_job = self.after_idle(self._update_viewport)
+            
+    def _update_viewport(self):
+        """Materialize items that scrolled into view and drop far away ones"""
+        self._viewport_job = None
+        # Subtrees being dragged are committed (and redrawn) on release
+        if not self.dragging_item:
+            self.scene.sync(self.ui_layout.root_container, self.get_viewport())
         
     def draw_grid(self):
-        """Draw a grid on the canvas"""
-        grid_size = 20
-        width = 2000
-        height = 2000
+        """Draw the background grid layer if it is missing or out of date"""
+        self._grid_deferred = False
+        key = (tuple(self.scroll_region), self.grid_size)
+        if key == self._grid_key:
+            return
+        
+        self.canvas.delete("grid")
+        x1, y1, x2, y2 = self.scroll_region
         
         # Vertical lines
-        for x in range(0, width, grid_size):
-            self.canvas.create_line(x, 0, x, height, fill="#3a3a3a", width=1)
+        for x in range(x1, x2, self.grid_size):
+            self.canvas.create_line(x, y1, x, y2, fill=self.GRID_COLOR, width=1, tags="grid")
         
         # Horizontal lines
-        for y in range(0, height, grid_size):
-            self.canvas.create_line(0, y, width, y, fill="#3a3a3a", width=1)
-            
-    def draw_container(self, container, parent_x=0, parent_y=0):
-        """Draw a container and all its children"""
-        x = parent_x + container.x
-        y = parent_y + container.y
-        
-        # Choose color based on orientation
-        if container == self.selected_item:
-            color = self.SELECTED_COLOR
-        elif container.orientation == "horizontal":
-            color = self.CONTAINER_HORIZONTAL_COLOR
-        else:
-            color = self.CONTAINER_COLOR
-        
-        # Draw container rectangle
-        self.canvas.create_rectangle(
-            x, y, x + container.width, y + container.height,
-            outline=color,
-            width=3,
-            fill="",
-            tags=("container", f"item_{id(container)}")
-        )
-        
-        # Draw label
-        self.canvas.create_text(
-            x + 5, y + 5,
-            text=f"{container.name} ({container.orientation})",
-            anchor="nw",
-            fill="white",
-            font=("Arial", 10, "bold"),
-            tags=("label", f"item_{id(container)}")
-        )
+        for y in range(y1, y2, self.grid_size):
+            self.canvas.create_line(x1, y, x2, y, fill=self.GRID_COLOR, width=1, tags="grid")
         
-        # Draw children
-        for child in container.children:
-            if isinstance(child, Container):
-                self.draw_container(child, x, y)
-            elif isinstance(child, UIElement):
-                self.draw_element(child, x, y)
-                
-    def draw_element(self, element, parent_x=0, parent_y=0):
-        """Draw a UI element"""
-        x = parent_x + element.x
-        y = parent_y + element.y
-        
-        # Determine element color based on selection
-        is_selected = element == self.selected_item
-        color = self.SELECTED_COLOR if is_selected else self.ELEMENT_COLOR
-        
-        # Draw element
-        self.canvas.create_rectangle(
-            x, y, x + element.width, y + element.height,
-            outline=color,
-            width=2,
-            fill="#34495e",
-            tags=("element", f"item_{id(element)}")
-        )
-        
-        # Draw resize handle if selected
-        if is_selected:
-            self.draw_resize_handle(x, y, element, parent_x, parent_y)
-        
-        # Draw element type and name
-        self.canvas.create_text(
-            x + element.width / 2, y + element.height / 2 - 8,
-            text=element.element_type,
-            fill="white",
-            font=("Arial", 9, "bold"),
-            tags=("label", f"item_{id(element)}")
-        )
+        # Keep the grid below all content
+        self.canvas.tag_lower("grid")
+        self._grid_key = key
         
-        self.canvas.create_text(
-            x + element.width / 2, y + element.height / 2 + 8,
-            text=element.name,
-            fill="#bdc3c7",
-            font=("Arial", 8),
-            tags=("label", f"item_{id(element)}")
-        )
+    def set_grid_size(self, grid_size):
+        """Change the grid spacing"""
+        self.grid_size = grid_size
+        self.draw_grid()
         
+    def set_scroll_region(self, scroll_region):
+        """Change the scrollable area of the canvas"""
+        self.scroll_region = tuple(scroll_region)
+        self.canvas.configure(scrollregion=self.scroll_region)
+        self.draw_grid()
+            
     def on_canvas_motion(self, event):
         """Handle mouse motion on canvas"""
         if not self.selected_item:
@@ -214,109 +289,166 @@ class CanvasView(ctk.CTkFrame):
                 self.drag_start_y = canvas_y
                 self.original_width = self.selected_item.width
                 self.original_height = self.selected_item.height
+                self.drag_target = (0, 0)
             else:
                 # Select item
                 item = self.find_item_at(canvas_x, canvas_y)
                 if item:
-                    self.selected_item = item
+                    self.select_item(item)
                     self.dragging_item = item
+                    self.scene.begin_drag(item)
                     self.drag_start_x = canvas_x
                     self.drag_start_y = canvas_y
+                    self.drag_offset = (0, 0)
+                    self.drag_target = (0, 0)
                     self.on_item_selected(item)
-                    self.redraw()
                 
     def on_canvas_drag(self, event):
         """Handle canvas drag"""
+        if not (self.dragging_item or self.resizing_item):
+            return
+            
         canvas_x = self.canvas.canvasx(event.x)
         canvas_y = self.canvas.canvasy(event.y)
         
-        if self.dragging_item:
-            # Handle moving the item
-            dx = canvas_x - self.drag_start_x
-            dy = canvas_y - self.drag_start_y
-            
-            self.dragging_item.x += int(dx)
-            self.dragging_item.y += int(dy)
-            
-            self.drag_start_x = canvas_x
-            self.drag_start_y = canvas_y
+        # Only remember where the pointer is; the frame callback does the work
+        self.drag_target = (int(canvas_x - self.drag_start_x), int(canvas_y - self.drag_start_y))
+        self._schedule_frame()
+        
+    def _schedule_frame(self):
+        """Schedule a drag/resize update for the next frame"""
+        if self._frame_job is not None:
+            return
+        delay = self._last_frame + self.FRAME_INTERVAL - time.perf_counter()
+        if delay > 0:
+            self._frame_job = self.after(int(delay * 1000) + 1, self._render_frame)
+        else:
+            self._frame_job = self.after_idle(self._render_frame)
             
-            self.redraw()
+    def _cancel_frame(self):
+        """Cancel a scheduled drag/resize update"""
+        if self._frame_job is not None:
+            self.after_cancel(self._frame_job)
+            self._frame_job = None
             
+    def _render_frame(self):
+        """Apply the latest pointer position to the canvas"""
+        self._frame_job = None
+        start = time.perf_counter()
+        dx, dy = self.drag_target
+        
+        if self.dragging_item:
+            # Translate the subtree's canvas items; the model is committed on release
+            applied_x, applied_y = self.drag_offset
+            if (dx, dy) != (applied_x, applied_y):
+                self.scene.translate(dx - applied_x, dy - applied_y)
+                self.drag_offset = (dx, dy)
+                
         elif self.resizing_item:
-            # Handle resizing the item
-            dx = canvas_x - self.drag_start_x
-            dy = canvas_y - self.drag_start_y
-            
             # Calculate new dimensions
             new_width = max(30, self.original_width + dx)
             new_height = max(30, self.original_height + dy)
             
-            # Update the item's size
+            # Update the item's size (the whole drag is one undo step)
+            old_size = self.resizing_item.width, self.resizing_item.height
             self.resizing_item.width = int(new_width)
             self.resizing_item.height = int(new_height)
+            self.history.record(Resize(self.resizing_item, *old_size), merge=True)
             
             # Update the property panel if it's open
             if hasattr(self, 'on_property_changed'):
                 self.on_property_changed()
             
-            self.redraw()
+            self.scene.refresh(self.resizing_item, *self._parent_offset(self.resizing_item))
             
+        # Include Tk's own repaint in the measured frame time
+        self.canvas.update_idletasks()
+        self._last_frame = time.perf_counter()
+        self.frame_times.append(self._last_frame - start)
+        
+    def frame_stats(self):
+        """Get timing statistics for recent drag/resize frames"""
+        if not self.frame_times:
+            return {"frames": 0, "mean_ms": 0.0, "max_ms": 0.0, "fps": 0.0}
+        mean = sum(self.frame_times) / len(self.frame_times)
+        return {
+            "frames": len(self.frame_times),
+            "mean_ms": mean * 1000,
+            "max_ms": max(self.frame_times) * 1000,
+            "fps": 1 / mean if mean > 0 else float("inf"),
+        }
+        
+    def _commit_drag(self):
+        """Write the dragged offset back into the model"""
+        item = self.dragging_item
+        dx, dy = self.drag_offset
+        self.scene.end_drag()
+        if dx or dy:
+            old_x, old_y = item.x, item.y
+            item.x += dx
+            item.y += dy
+            self.history.record(Move(item, old_x, old_y))
+            self.scene.commit_translation(item, dx, dy)
+            self.spatial_index.update_subtree(item)
+        self.drag_offset = (0, 0)
+        self.dragging_item = None
+        
+        # Draw whatever the drag uncovered and drop what left the viewport
+        self.redraw()
+        
     def copy_item(self, item, parent_x=0, parent_y=0):
         """Create a deep copy of an item"""
         if item is None:
             return None
-            
-        if isinstance(item, Container):
-            # Calculate the position relative to the parent container
-            relative_x = item.x - parent_x
-            relative_y = item.y - parent_y
-            
-            # Create a new container with the same properties
-            new_container = Container(
-                f"{item.name}_copy",
-                relative_x + 20,  # Offset slightly from original
-                relative_y + 20,
-                item.width,
-                item.height,
-                item.orientation
-            )
-            new_container.padding = item.padding
-            new_container.background = item.background
-            
-            # Store the new container's position for child positioning
-            new_parent_x = parent_x + relative_x
-            new_parent_y = parent_y + relative_y
-            
-            # Recursively copy all children with updated parent position
-            for child in item.children:
-                copied_child = self.copy_item(child, new_parent_x, new_parent_y)
-                if copied_child:
-                    new_container.add_child(copied_child)
-            return new_container
-            
-        elif isinstance(item, UIElement):
+
+        result = None
+        copies = {}  # original container -> its copy
+        for parent, node in iter_edges(item):
             # Calculate the position relative to the parent container
-            relative_x = item.x - parent_x
-            relative_y = item.y - parent_y
-            
-            # Create a new element with the same properties
-            new_element = UIElement(
-                item.element_type,
-                f"{item.name}_copy",
-                relative_x + 20,  # Offset slightly from original
-                relative_y + 20,
-                item.width,
-                item.height
-            )
-            # Copy all attributes
-            new_element.text = item.text
-            new_element.enabled = item.enabled
-            new_element.visible = item.visible
-            new_element.properties = item.properties.copy()
-            return new_element
-            
-        return None
+            # (children are measured from the original parent's position)
+            if parent is None:
+                relative_x = node.x - parent_x
+                relative_y = node.y - parent_y
+            else:
+                relative_x = node.x - parent.x
+                relative_y = node.y - parent.y
+
+            if isinstance(node, Container):
+                # Create a new container with the same properties
+                new_node = Container(
+                    f"{node.name}_copy",
+                    relative_x + 20,  # Offset slightly from original
+                    relative_y + 20,
+                    node.width,
+                    node.height,
+                    node.orientation
+                )
+                new_node.padding = node.padding
+                new_node.background = node.background
+                copies[node] = new_node
+            elif isinstance(node, UIElement):
+                # Create a new element with the same properties
+                new_node = UIElement(
+                    node.element_type,
+                    f"{node.name}_copy",
+                    relative_x + 20,  # Offset slightly from original
+                    relative_y + 20,
+                    node.width,
+                    node.height
+                )
+                # Copy all attributes
+                new_node.text = node.text
+                new_node.enabled = node.enabled
+                new_node.visible = node.visible
+                new_node.properties = node.properties.copy()
+            else:
+                continue
+
+            if parent is None:
+                result = new_node
+            else:
+                copies[parent].add_child(new_node)
+        return result
         
     def copy_selected(self):
         """Copy the currently selected item"""
@@ -350,46 +482,28 @@ class CanvasView(ctk.CTkFrame):
                 container.add_child(new_item)
             else:
                 self.ui_layout.root_container.add_child(new_item)
+        self.spatial_index.insert_subtree(new_item)
+        self.history.record(AddNode(new_item, "Paste"))
         
         # Select the new item
-        self.selected_item = new_item
-        self.on_item_selected(new_item)
         self.redraw()
+        self.select_item(new_item)
+        self.on_item_selected(new_item)
         return True
         
     def _move_item(self, item, dx, dy):
-        """Recursively move an item and its children"""
-        item.x += dx
-        item.y += dy
-        if hasattr(item, 'children'):
-            for child in item.children:
-                self._move_item(child, dx, dy)
+        """Move an item and all of its descendants"""
+        for node in iter_preorder(item):
+            node.x += dx
+            node.y += dy
 
-    def draw_resize_handle(self, x, y, element, parent_x=0, parent_y=0):
-        """Draw a resize handle for the given element"""
-        # Calculate absolute position
-        abs_x = x + element.width - self.resize_handle_size
-        abs_y = y + element.height - self.resize_handle_size
-        
-        # Draw the resize handle (a small square in the bottom-right corner)
-        self.canvas.create_rectangle(
-            abs_x, abs_y,
-            abs_x + self.resize_handle_size,
-            abs_y + self.resize_handle_size,
-            fill=self.SELECTED_COLOR,
-            outline="white",
-            width=1,
-            tags=("resize_handle", f"handle_{id(element)}")
-        )
-    
     def is_over_resize_handle(self, x, y, item):
         """Check if the mouse is over the resize handle of an item"""
         if not item:
             return False
             
         # Get the item's position and size
-        item_x = item.x
-        item_y = item.y
+        item_x, item_y = self.get_absolute_position(item)
         item_width = item.width
         item_height = item.height
         
@@ -406,6 +520,17 @@ class CanvasView(ctk.CTkFrame):
     
     def on_canvas_release(self, event):
         """Handle mouse release"""
+        # Apply the final pointer position before committing
+        if self._frame_job is not None:
+            self._cancel_frame()
+            self._render_frame()
+            
+        if self.dragging_item:
+            self._commit_drag()
+        elif self.resizing_item:
+            self.spatial_index.update(self.resizing_item)
+            self.history.seal()
+            
         self.dragging_item = None
         self.resizing_item = None
         
@@ -424,90 +549,37 @@ class CanvasView(ctk.CTkFrame):
         
         if self.adding_mode == "Container":
             # Add new container
-            name = f"Container{len(self.ui_layout.get_all_containers()) + 1}"
+            name = self.ui_layout.unique_name("Container")
             new_container = Container(name, rel_x, rel_y, 300, 200)
             target_container.add_child(new_container)
+            self.spatial_index.insert(new_container)
+            self.history.record(AddNode(new_container))
         else:
             # Add new element
-            element_count = len(self.ui_layout.get_all_elements()) + 1
-            name = f"{self.adding_mode}{element_count}"
+            name = self.ui_layout.unique_name(self.adding_mode)
             new_element = UIElement(self.adding_mode, name, rel_x, rel_y)
             new_element.text = name
             target_container.add_child(new_element)
+            self.spatial_index.insert(new_element)
+            self.history.record(AddNode(new_element))
             
         self.redraw()
         
     def find_item_at(self, x, y):
         """Find the item at the specified position"""
-        # Check all containers and elements
-        all_items = []
-        
-        def collect_items(container, parent_x=0, parent_y=0):
-            abs_x = parent_x + container.x
-            abs_y = parent_y + container.y
-            
-            for child in container.children:
-                if isinstance(child, Container):
-                    collect_items(child, abs_x, abs_y)
-                    child_x = abs_x + child.x
-                    child_y = abs_y + child.y
-                    all_items.append((child, child_x, child_y, child.width, child.height))
-                elif isinstance(child, UIElement):
-                    child_x = abs_x + child.x
-                    child_y = abs_y + child.y
-                    all_items.append((child, child_x, child_y, child.width, child.height))
-            
-            # Add container itself
-            all_items.append((container, abs_x, abs_y, container.width, container.height))
-        
-        collect_items(self.ui_layout.root_container)
-        
-        # Find the smallest item that contains the point (most specific)
-        matching_items = []
-        for item, item_x, item_y, item_w, item_h in all_items:
-            if item_x <= x <= item_x + item_w and item_y <= y <= item_y + item_h:
-                matching_items.append((item, item_w * item_h))
-        
-        if matching_items:
-            # Return the item with smallest area (most specific)
-            matching_items.sort(key=lambda i: i[1])
-            return matching_items[0][0]
-        
-        return None
+        # The smallest item containing the point is the most specific one
+        return self.spatial_index.item_at(x, y)
     
     def find_container_at(self, x, y):
         """Find the deepest container at the specified position"""
-        containers = []
-        
-        def collect_containers(container, parent_x=0, parent_y=0):
-            abs_x = parent_x + container.x
-            abs_y = parent_y + container.y
-            
-            if abs_x <= x <= abs_x + container.width and abs_y <= y <= abs_y + container.height:
-                containers.append((container, container.width * container.height))
-            
-            for child in container.children:
-                if isinstance(child, Container):
-                    collect_containers(child, abs_x, abs_y)
-        
-        collect_containers(self.ui_layout.root_container)
-        
-        if containers:
-            # Return the smallest container (most specific)
-            containers.sort(key=lambda c: c[1])
-            return containers[0][0]
-        
-        return None
+        return self.spatial_index.container_at(x, y)
     
     def get_absolute_position(self, item):
         """Get the absolute position of an item"""
-        x, y = item.x, item.y
-        current = item.parent
-        
-        while current:
-            x += current.x
-            y += current.y
-            current = current.parent
-            
-        return x, y
+        return item.absolute_position()
 
+    def _parent_offset(self, item):
+        """Get the absolute position of an item's parent"""
+        if item.parent is None:
+            return 0, 0
+        return self.get_absolute_position(item.parent)
@@ -0,0 +1,186 @@
+"""
+Columnar geometry arrays for bulk layout analysis and transforms
+
+Requires NumPy, which is an optional dependency of the builder.
+"""
+
+from ui_elements import UIElement, Container
+
+
+# Type codes: 0 for containers, then the built-in element types in order.
+# Custom element types get UNKNOWN_TYPE_CODE.
+CONTAINER_TYPE_CODE = 0
+UNKNOWN_TYPE_CODE = -1
+TYPE_CODES = {"Container": CONTAINER_TYPE_CODE}
+TYPE_CODES.update({name: i + 1 for i, name in enumerate(UIElement.ELEMENT_TYPES)})
+
+
+def _numpy():
+    """Import NumPy, with a helpful message if it is missing"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Geometry arrays require NumPy (pip install numpy)") from e
+    return numpy
+
+
+class GeometryArrays:
+    """
+    Flattened geometry of a layout, one entry per node in pre-order.
+
+    Attributes:
+        nodes: The UIElement/Container objects (index = node ID)
+        ids: Node IDs (0..n-1)
+        parent: Index of each node's parent, -1 for the root
+        type_code: Type code of each node (see TYPE_CODES)
+        x, y: Position relative to the parent
+        abs_x, abs_y: Absolute position
+        width, height: Size
+    """
+
+    def __init__(self, nodes, parent, type_code, x, y, abs_x, abs_y, width, height):
+        np = _numpy()
+        self.nodes = nodes
+        self.ids = np.arange(len(nodes))
+        self.parent = np.asarray(parent, dtype=np.int64)
+        self.type_code = np.asarray(type_code, dtype=np.int16)
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.abs_x = np.asarray(abs_x, dtype=np.float64)
+        self.abs_y = np.asarray(abs_y, dtype=np.float64)
+        self.width = np.asarray(width, dtype=np.float64)
+        self.height = np.asarray(height, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def boxes(self, absolute=True):
+        """Get an (n, 4) array of x1, y1, x2, y2 boxes"""
+        np = _numpy()
+        x = self.abs_x if absolute else self.x
+        y = self.abs_y if absolute else self.y
+        return np.stack([x, y, x + self.width, y + self.height], axis=1)
+
+    def update_relative(self):
+        """Recompute x/y from the absolute positions"""
+        has_parent = self.parent >= 0
+        parents = self.parent[has_parent]
+        self.x = self.abs_x.copy()
+        self.y = self.abs_y.copy()
+        self.x[has_parent] -= self.abs_x[parents]
+        self.y[has_parent] -= self.abs_y[parents]
+
+    def update_absolute(self):
+        """Recompute abs_x/abs_y from the relative positions"""
+        # Resolve one depth level per iteration
+        np = _numpy()
+        abs_x = self.x.copy()
+        abs_y = self.y.copy()
+        pending = self.parent >= 0
+        resolved = ~pending
+        while pending.any():
+            ready = pending & resolved[np.maximum(self.parent, 0)]
+            parents = self.parent[ready]
+            abs_x[ready] += abs_x[parents]
+            abs_y[ready] += abs_y[parents]
+            resolved |= ready
+            pending &= ~ready
+        self.abs_x = abs_x
+        self.abs_y = abs_y
+
+
+def geometry_arrays(ui_layout):
+    """Flatten a layout's geometry into NumPy arrays in one pass"""
+    nodes = []
+    parent = []
+    type_code = []
+    x = []
+    y = []
+    abs_x = []
+    abs_y = []
+    width = []
+    height = []
+
+    # (node, parent index, parent absolute x, parent absolute y)
+    stack = [(ui_layout.root_container, -1, 0, 0)]
+    while stack:
+        node, parent_index, parent_x, parent_y = stack.pop()
+        index = len(nodes)
+        node_x = parent_x + node.x
+        node_y = parent_y + node.y
+
+        nodes.append(node)
+        parent.append(parent_index)
+        if isinstance(node, Container):
+            type_code.append(CONTAINER_TYPE_CODE)
+        else:
+            type_code.append(TYPE_CODES.get(node.element_type, UNKNOWN_TYPE_CODE))
+        x.append(node.x)
+        y.append(node.y)
+        abs_x.append(node_x)
+        abs_y.append(node_y)
+        width.append(node.width)
+        height.append(node.height)
+
+        if isinstance(node, Container):
+            for child in reversed(node.children):
+                stack.append((child, index, node_x, node_y))
+
+    return GeometryArrays(nodes, parent, type_code, x, y, abs_x, abs_y, width, height)
+
+
+def apply_geometry(arrays, absolute=True, integer=True):
+    """
+    Write geometry arrays back into the layout nodes.
+
+    Args:
+        arrays: GeometryArrays from geometry_arrays()
+        absolute: Derive relative positions from abs_x/abs_y (True) or
+            write x/y as they are (False)
+        integer: Round values to whole pixels like the editor does
+    """
+    np = _numpy()
+    if absolute:
+        arrays.update_relative()
+
+    columns = [arrays.x, arrays.y, arrays.width, arrays.height]
+    if integer:
+        columns = [np.rint(column).astype(np.int64) for column in columns]
+    xs, ys, widths, heights = (column.tolist() for column in columns)
+
+    # Pre-order means the root is written first and clears every cached
+    # absolute position in one walk; later writes find nothing to clear
+    for node, x, y, width, height in zip(arrays.nodes, xs, ys, widths, heights):
+        node.x = x
+        node.y = y
+        node.width = width
+        node.height = height
+
+    if not absolute:
+        arrays.update_absolute()
+
+
+def scale(arrays, factor_x, factor_y=None):
+    """Scale every absolute position and size"""
+    if factor_y is None:
+        factor_y = factor_x
+    arrays.abs_x *= factor_x
+    arrays.abs_y *= factor_y
+    arrays.width *= factor_x
+    arrays.height *= factor_y
+
+
+def translate(arrays, dx, dy):
+    """Move every node by the same offset"""
+    arrays.abs_x += dx
+    arrays.abs_y += dy
+
+
+def clamp(arrays, bounds):
+    """Keep every box inside bounds (x1, y1, x2, y2), shrinking if needed"""
+    np = _numpy()
+    x1, y1, x2, y2 = bounds
+    np.minimum(arrays.width, x2 - x1, out=arrays.width)
+    np.minimum(arrays.height, y2 - y1, out=arrays.height)
+    np.clip(arrays.abs_x, x1, x2 - arrays.width, out=arrays.abs_x)
+    np.clip(arrays.abs_y, y1, y2 - arrays.height, out=arrays.abs_y)
@@ -0,0 +1,337 @@
+"""
+Undo/redo history - small inverse operations instead of layout snapshots
+
+Every change is recorded, after it was made, as a command holding just
+enough to undo and redo it: the old and new values of the attributes it
+set, or the subtree it added or removed and where. Undoing or redoing a
+step therefore costs O(size of the change), however large the layout is,
+and goes through the normal node setters and add/remove methods, so
+revisions and the name index stay correct.
+
+Consecutive edits of the same attributes of the same node (a resize drag,
+typing into a property field) are merged into one entry until the entry
+is sealed. Entries are evicted oldest first once their estimated size
+exceeds the memory budget.
+
+Usage:
+    history = History()
+    old_x, old_y = node.x, node.y
+    node.x, node.y = 40, 60
+    history.record(Move(node, old_x, old_y))
+    history.undo()
+    history.redo()
+"""
+
+import abc
+import sys
+from collections import deque
+
+from ui_elements import Container
+
+
+DEFAULT_BUDGET = 32 * 1024 * 1024  # Bytes of history kept
+
+MISSING = object()  # Custom property value meaning "not set"
+
+
+def _size(value):
+    """Estimate the memory held by a recorded value"""
+    if value is MISSING or value is None or isinstance(value, (bool, int, float)):
+        return 0  # Shared or small
+    return sys.getsizeof(value)
+
+
+def subtree_size(node):
+    """Estimate the memory held by a node and its descendants"""
+    total = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        total += sys.getsizeof(current) + sys.getsizeof(current.name)
+        if isinstance(current, Container):
+            children = current.children
+            total += 8 * len(children)  # One reference per child
+            stack.extend(children)
+        else:
+            total += sys.getsizeof(current.text)
+            if current._properties:
+                total += sys.getsizeof(current._properties)
+    return total
+
+
+class Command(abc.ABC):
+    """A recorded change that can be undone and redone"""
+
+    __slots__ = ("node", "label", "size")
+
+    def __init__(self, node, label):
+        self.node = node  # Node whose subtree the command changes
+        self.label = label
+        self.size = sys.getsizeof(self)
+
+    @abc.abstractmethod
+    def undo(self):
+        """Revert the change"""
+
+    @abc.abstractmethod
+    def redo(self):
+        """Apply the change again"""
+
+    def merge(self, other):
+        """Absorb a later command into this one if possible; returns whether it did"""
+        return False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.label}, {self.node!r})"
+
+
+class _ValueChanges(Command):
+    """Values of one node changed; changes maps each key to (old, new)"""
+
+    __slots__ = ("changes",)
+
+    def merge(self, other):
+        # Keep the oldest value and take the newest
+        if (type(other) is not type(self) or other.node is not self.node
+                or other.changes.keys() != self.changes.keys()):
+            return False
+        self.changes = {key: (old, other.changes[key][1])
+                        for key, (old, _) in self.changes.items()}
+        return True
+
+
+class SetAttributes(_ValueChanges):
+    """Attributes of one node set to new values (name, text, padding, ...)"""
+
+    __slots__ = ()
+
+    def __init__(self, node, old_values, label="Edit"):
+        """old_values maps attribute names to their values before the change"""
+        super().__init__(node, label)
+        self.changes = {name: (old, getattr(node, name)) for name, old in old_values.items()}
+        self.size += sys.getsizeof(self.changes) + sum(
+            _size(old) + _size(new) for old, new in self.changes.values())
+
+    def undo(self):
+        for name, (old, _) in self.changes.items():
+            setattr(self.node, name, old)
+
+    def redo(self):
+        for name, (_, new) in self.changes.items():
+            setattr(self.node, name, new)
+
+
+class SetAttribute(SetAttributes):
+    """One attribute of a node set to a new value"""
+
+    __slots__ = ()
+
+    def __init__(self, node, name, old_value, label="Edit"):
+        super().__init__(node, {name: old_value}, label)
+
+
+class Move(SetAttributes):
+    """A node moved (its descendants move with it)"""
+
+    __slots__ = ()
+
+    def __init__(self, node, old_x, old_y, label="Move"):
+        super().__init__(node, {"x": old_x, "y": old_y}, label)
+
+
+class Resize(SetAttributes):
+    """A node resized"""
+
+    __slots__ = ()
+
+    def __init__(self, node, old_width, old_height, label="Resize"):
+        super().__init__(node, {"width": old_width, "height": old_height}, label)
+
+
+class SetProperties(_ValueChanges):
+    """Custom properties of an element set, added or deleted"""
+
+    __slots__ = ()
+
+    def __init__(self, element, old_values, label="Edit property"):
+        """old_values maps property keys to their values before the change (MISSING if unset)"""
+        super().__init__(element, label)
+        current = element._properties or {}
+        self.changes = {key: (old, current.get(key, MISSING)) for key, old in old_values.items()}
+        self.size += sys.getsizeof(self.changes) + sum(
+            _size(key) + _size(old) + _size(new) for key, (old, new) in self.changes.items())
+
+    def _apply(self, side):
+        properties = self.node.properties
+        for key, values in self.changes.items():
+            if values[side] is MISSING:
+                properties.pop(key, None)
+            else:
+                properties[key] = values[side]
+        self.node._touch()
+
+    def undo(self):
+        self._apply(0)
+
+    def redo(self):
+        self._apply(1)
+
+
+class _SubtreeChange(Command):
+    """A subtree attached to or detached from parent at index"""
+
+    __slots__ = ("parent", "index")
+
+    def __init__(self, node, parent, index, label):
+        super().__init__(node, label)
+        self.parent = parent
+        self.index = index
+        self.size += subtree_size(node)  # Kept alive by the history
+
+    def _attach(self):
+        self.parent.insert_child(self.index, self.node)
+
+    def _detach(self):
+        self.parent.remove_child(self.node)
+
+
+class AddNode(_SubtreeChange):
+    """A node (with its subtree) added to a container; also used for paste"""
+
+    __slots__ = ()
+
+    def __init__(self, node, label="Add"):
+        super().__init__(node, node.parent, node.parent.children.index(node), label)
+
+    def undo(self):
+        self._detach()
+
+    def redo(self):
+        self._attach()
+
+
+class RemoveNode(_SubtreeChange):
+    """A node (with its subtree) removed from a container"""
+
+    __slots__ = ()
+
+    def __init__(self, node, parent, index, label="Delete"):
+        """parent and index are where the node was before it was removed"""
+        super().__init__(node, parent, index, label)
+
+    def undo(self):
+        self._attach()
+
+    def redo(self):
+        self._detach()
+
+
+class History:
+    """
+    Undo and redo stacks of commands with a memory budget.
+
+    Attributes:
+        budget: Estimated bytes of history to keep; the oldest entries go
+            first, but the latest entry is always kept
+        size: Estimated bytes currently held
+        listeners: Called with (command, undone) after every recorded,
+            undone or redone change; undone is True when it was reverted
+            (see journal.py)
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.size = 0
+        self.listeners = []
+        self._undo = deque()
+        self._redo = []
+        self._open = False  # Whether the latest entry still accepts merges
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def peek_undo(self):
+        """Get the command the next undo would revert, or None"""
+        return self._undo[-1] if self._undo else None
+
+    def peek_redo(self):
+        """Get the command the next redo would repeat, or None"""
+        return self._redo[-1] if self._redo else None
+
+    def record(self, command, merge=False):
+        """
+        Add a change that has already been made
+
+        With merge=True the command is folded into the latest entry when
+        that entry is still open and changes the same thing, so a drag or
+        a typed value becomes one step. Recording clears the redo stack.
+        """
+        self._clear_redo()
+        self._notify(command, False)
+        if merge and self._open and self._undo:
+            latest = self._undo[-1]
+            old_size = latest.size
+            if latest.merge(command):
+                latest.size = max(old_size, command.size)
+                self.size += latest.size - old_size
+                self._evict()
+                return
+        self._undo.append(command)
+        self.size += command.size
+        self._open = merge
+        self._evict()
+
+    def seal(self):
+        """Stop merging into the latest entry (end of a drag or an edit)"""
+        self._open = False
+
+    def undo(self):
+        """Revert the latest change; returns its command, or None if there is none"""
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        command.undo()
+        self._redo.append(command)
+        self._open = False
+        self._notify(command, True)
+        return command
+
+    def redo(self):
+        """Repeat the latest undone change; returns its command, or None if there is none"""
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        command.redo()
+        self._undo.append(command)
+        self._open = False
+        self._notify(command, False)
+        return command
+
+    def clear(self):
+        """Forget all history"""
+        self._undo.clear()
+        self._redo = []
+        self.size = 0
+        self._open = False
+
+    def _notify(self, command, undone):
+        for listener in self.listeners:
+            listener(command, undone)
+
+    def _clear_redo(self):
+        for command in self._redo:
+            self.size -= command.size
+        self._redo = []
+
+    def _evict(self):
+        """Drop the oldest entries until the history fits the budget"""
+        while self.size > self.budget and len(self._undo) > 1:
+            self.size -= self._undo.popleft().size
@@ -0,0 +1,440 @@
+"""
+Operation journal - autosave and crash recovery without full saves
+
+Every change recorded in the undo history (see history.py), including
+undos and redos, is appended as one JSON line to <project>.journal next
+to the project file. Nodes are addressed by their path of child indices
+from the root, so an append costs O(depth + size of the change) however
+large the layout is. Lines are written through a buffer and fsync'd in
+batches (every BATCH_SIZE operations or SYNC_INTERVAL seconds, and on
+sync()).
+
+The first line is a header naming the state the operations apply to: the
+project file (checked by size and mtime), a new empty layout for untitled
+work, or a full snapshot in <project>.autosave. Once the journal grows
+past COMPACT_OPERATIONS, a snapshot is written (on the background worker,
+from its copy of the layout; see write_snapshot()) and the journal
+restarts from it with the operations appended meanwhile. Every header has
+a unique id and the snapshot names the journal it continues and how many
+of its operations it holds, so a snapshot finished just before a crash
+is still used, with the rest of the journal replayed on top.
+
+A journal that still exists when the project is opened again means the
+builder did not shut down cleanly: recover() rebuilds the layout from its
+base and the operations, ignoring a torn last line. Saving the project
+restarts the journal from the saved file (rebase() keeps the edits made
+while a background save ran); closing cleanly removes the journal and the
+snapshot.
+
+Usage:
+    journal = Journal("design.json")
+    journal.start(layout)
+    history.listeners.append(journal.record)
+    ...
+    journal.sync()            # Periodically
+    if journal.needs_compaction:
+        token = journal.begin_compaction()
+        snapshot_id = write_snapshot(token, layout)   # May run on another thread
+        journal.finish_compaction(token, snapshot_id)
+    journal.close()           # On a clean shutdown
+
+    recovered = recover("design.json")   # None if there is nothing to recover
+"""
+
+import json
+import os
+import time
+
+from ui_elements import UIElement, Container, UILayout
+from history import SetAttributes, SetProperties, AddNode, RemoveNode, MISSING
+
+
+JOURNAL_VERSION = 2
+JOURNAL_SUFFIX = ".journal"
+AUTOSAVE_SUFFIX = ".autosave"
+
+# Where untitled work is journaled
+UNTITLED_PATH = os.path.join(os.path.expanduser("~"), ".md_ui_builder", "untitled.json")
+
+BATCH_SIZE = 64  # Operations between fsyncs
+SYNC_INTERVAL = 1.0  # Seconds between fsyncs while operations arrive
+COMPACT_OPERATIONS = 10000  # Journal length that asks for a snapshot
+
+
+def journal_path(project_path):
+    return project_path + JOURNAL_SUFFIX
+
+
+def autosave_path(project_path):
+    return project_path + AUTOSAVE_SUFFIX
+
+
+def node_path(node):
+    """Get the child indices leading from the root to a node"""
+    path = []
+    while node._parent is not None:
+        path.append(node._parent.children.index(node))
+        node = node._parent
+    path.reverse()
+    return path
+
+
+def resolve_path(root, path):
+    """Get the node at a path of child indices"""
+    node = root
+    for index in path:
+        node = node.children[index]
+    return node
+
+
+def node_from_dict(data):
+    """Create an element or container (with its subtree) from its dictionary"""
+    if data["type"] == "container":
+        return Container.from_dict(data)
+    return UIElement.from_dict(data)
+
+
+def command_operation(command, undone):
+    """Get the journal operation for a recorded, undone or redone command"""
+    if isinstance(command, SetAttributes):
+        side = 0 if undone else 1
+        values = {name: change[side] for name, change in command.changes.items()}
+        return {"op": "set", "path": node_path(command.node), "values": values}
+    if isinstance(command, SetProperties):
+        side = 0 if undone else 1
+        values = {key: change[side] for key, change in command.changes.items()}
+        return {
+            "op": "properties",
+            "path": node_path(command.node),
+            "set": {key: value for key, value in values.items() if value is not MISSING},
+            "delete": [key for key, value in values.items() if value is MISSING],
+        }
+    if isinstance(command, (AddNode, RemoveNode)):
+        # The command has already been applied: the node is where it ended up
+        if command.node.parent is not None:
+            return {"op": "add", "path": node_path(command.parent), "index": command.index,
+                    "node": command.node.to_dict()}
+        return {"op": "remove", "path": node_path(command.parent), "index": command.index}
+    raise TypeError(f"cannot journal {command!r}")
+
+
+def apply_operation(layout, operation):
+    """Apply one journal operation to a layout"""
+    node = resolve_path(layout.root_container, operation["path"])
+    kind = operation["op"]
+    if kind == "set":
+        for name, value in operation["values"].items():
+            setattr(node, name, value)
+    elif kind == "properties":
+        properties = node.properties
+        for key in operation["delete"]:
+            properties.pop(key, None)
+        properties.update(operation["set"])
+        node._touch()
+    elif kind == "add":
+        node.insert_child(operation["index"], node_from_dict(operation["node"]))
+    elif kind == "remove":
+        node.remove_child(node.children[operation["index"]])
+    else:
+        raise ValueError(f"unknown journal operation {kind!r}")
+
+
+def _project_stat(project_path):
+    """Get (size, mtime_ns) of a project file, or None if it does not exist"""
+    try:
+        stat = os.stat(project_path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _load_project(project_path):
+    from binary_format import is_binary_project
+    if is_binary_project(project_path):
+        return UILayout.load_from_binary(project_path)
+    return UILayout.load_from_json(project_path)
+
+
+def _write_synced(path, text):
+    """Replace a file with text, durably"""
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _new_id():
+    return os.urandom(8).hex()
+
+
+def _read_autosave(project_path):
+    """Get the snapshot dictionary, or None"""
+    try:
+        with open(autosave_path(project_path), "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        snapshot["id"], snapshot["layout"]
+        return snapshot
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_snapshot(token, layout):
+    """
+    Write a layout as the snapshot for a Journal.begin_compaction() token
+
+    layout must be in the state the token was taken in; it may be a copy
+    on another thread (the journal itself is not touched). Returns the
+    snapshot id for Journal.finish_compaction().
+    """
+    project_path, mark, operations = token
+    snapshot = {"id": _new_id(), "base": mark[0], "operations": operations,
+                "layout": layout.to_dict()}
+    _write_synced(autosave_path(project_path), json.dumps(snapshot, separators=(",", ":")))
+    return snapshot["id"]
+
+
+def has_journal(project_path):
+    """Check if a project has a journal left by an unclean shutdown"""
+    return os.path.exists(journal_path(project_path))
+
+
+def recover(project_path):
+    """
+    Rebuild the latest state of a project from its journal
+
+    Returns:
+        (layout, operations replayed), or None if there is no usable
+        journal (none at all, or the project file changed since it began)
+    """
+    try:
+        with open(journal_path(project_path), "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        header = json.loads(lines[0])
+        header_id = header["id"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if header.get("version") != JOURNAL_VERSION:
+        return None
+
+    snapshot = _read_autosave(project_path)
+    skipped = 0
+    if snapshot is not None and snapshot.get("base") == header_id:
+        # Compaction finished the snapshot but did not restart the journal
+        layout = UILayout.from_dict(snapshot["layout"])
+        skipped = snapshot["operations"]
+    elif "snapshot" in header:
+        if snapshot is None or snapshot["id"] != header["snapshot"]:
+            return None
+        layout = UILayout.from_dict(snapshot["layout"])
+    elif header.get("project") is not None:
+        if _project_stat(project_path) != header["project"]:
+            return None  # Saved or replaced since; the operations no longer apply
+        layout = _load_project(project_path)
+    else:
+        layout = UILayout(header.get("name", "My UI Design"))
+
+    replayed = 0
+    for line in lines[1 + skipped:]:
+        try:
+            operation = json.loads(line)
+            apply_operation(layout, operation)
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            break  # Torn or damaged tail: keep what came before
+        replayed += 1
+    return layout, replayed
+
+
+class Journal:
+    """
+    Append-only journal of the operations on one project.
+
+    Attributes:
+        project_path: The project file (it need not exist yet)
+        id: Id of the current journal file's header
+        operations: Operations in the current journal file
+        sequence: Operations appended over the journal's lifetime
+        compacting: Whether a compaction has begun and not finished
+    """
+
+    def __init__(self, project_path, batch_size=BATCH_SIZE, sync_interval=SYNC_INTERVAL,
+                 compact_operations=COMPACT_OPERATIONS):
+        self.project_path = project_path
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.compact_operations = compact_operations
+        self.id = None
+        self.operations = 0
+        self.sequence = 0
+        self.compacting = False
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @property
+    def needs_compaction(self):
+        return not self.compacting and self.operations >= self.compact_operations
+
+    def start(self, layout, snapshot=False):
+        """
+        Begin a fresh journal for a layout
+
+        Without snapshot the layout must be what the project file holds
+        (just loaded or saved, or a new untitled layout); with it, the
+        layout is written to the autosave snapshot first.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.project_path)), exist_ok=True)
+        self._close_file()
+        if snapshot:
+            self.compact(layout)
+            return
+        self._remove(autosave_path(self.project_path))
+        header = {"version": JOURNAL_VERSION, "id": _new_id(),
+                  "project": _project_stat(self.project_path), "name": layout.name}
+        self._begin(header)
+
+    def record(self, command, undone):
+        """History listener: journal a recorded, undone or redone command"""
+        self.append(command_operation(command, undone))
+
+    def append(self, operation):
+        """Append one operation (fsync'd with the next batch)"""
+        self._file.write(json.dumps(operation, separators=(",", ":")) + "\n")
+        self.operations += 1
+        self.sequence += 1
+        self._unsynced += 1
+        if (self._unsynced >= self.batch_size
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        """Make every appended operation durable"""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self, layout):
+        """Write the layout as a snapshot and restart the journal from it, on this thread"""
+        token = self.begin_compaction()
+        snapshot_id = write_snapshot(token, layout)
+        self.compacting = False
+        self._close_file()
+        self._begin({"version": JOURNAL_VERSION, "id": _new_id(), "snapshot": snapshot_id})
+
+    def begin_compaction(self):
+        """
+        Get a token for write_snapshot() of the layout as it is now
+
+        The snapshot is usually written on the background worker from its
+        copy of the layout; finish_compaction() then restarts the journal
+        from it, keeping the operations appended meanwhile.
+        """
+        self.sync()
+        self.compacting = True
+        return self.project_path, self.mark(), self.operations
+
+    def finish_compaction(self, token, snapshot_id):
+        """
+        Restart the journal from the snapshot written for a token
+
+        snapshot_id None means writing the snapshot failed. Returns whether
+        the journal was restarted: not if it was saved, moved or closed
+        since the token was taken, which makes the snapshot out of date.
+        """
+        self.compacting = False
+        project_path, mark, _ = token
+        if (snapshot_id is None or self._file is None or project_path != self.project_path
+                or mark[0] != self.id):
+            return False
+        header = {"version": JOURNAL_VERSION, "id": _new_id(), "snapshot": snapshot_id}
+        self._begin(header, self._tail(mark))
+        return True
+
+    def mark(self):
+        """Get the current position, for rebase() once a save of this state is done"""
+        if self._file is None:
+            return self.id, 0, self.sequence
+        self._file.flush()
+        return self.id, self._file.tell(), self.sequence
+
+    def rebase(self, mark, layout, project_path=None):
+        """
+        Restart the journal from a project file saved with the state at mark
+
+        Operations appended after mark (edits made while the save ran in
+        the background) are kept. project_path moves the journal next to
+        another file (Save As).
+        """
+        old_path = self.project_path
+        new_path = project_path or old_path
+        if mark[2] < self.sequence - self.operations:
+            # Compacted since mark: the snapshot is newer than the save, keep it
+            self._move(new_path)
+            return
+        tail = self._tail(mark)
+        if new_path != old_path:
+            self._remove(journal_path(old_path))
+            self._remove(autosave_path(old_path))
+        self.project_path = new_path
+        self._remove(autosave_path(new_path))
+        header = {"version": JOURNAL_VERSION, "id": _new_id(),
+                  "project": _project_stat(new_path), "name": layout.name}
+        self._begin(header, tail)
+
+    def close(self, clean=True):
+        """Stop journaling; a clean close removes the journal and the snapshot"""
+        self.sync()
+        self._close_file()
+        if clean:
+            self._remove(journal_path(self.project_path))
+            self._remove(autosave_path(self.project_path))
+
+    def _tail(self, mark):
+        """Get the operation lines appended after mark, and close the journal file"""
+        self.sync()
+        with open(journal_path(self.project_path), "r", encoding="utf-8") as f:
+            if mark[0] == self.id:
+                f.seek(mark[1])
+                tail = f.read()
+            else:
+                # Restarted since mark (by an earlier save): count lines instead
+                lines = f.read().split("\n")
+                skipped = mark[2] - (self.sequence - self.operations)
+                tail = "\n".join(lines[1 + skipped:])
+        self._close_file()
+        return tail
+
+    def _move(self, project_path):
+        """Move the journal and its snapshot next to another project file"""
+        if project_path == self.project_path:
+            return
+        self.sync()
+        self._close_file()
+        os.replace(journal_path(self.project_path), journal_path(project_path))
+        os.replace(autosave_path(self.project_path), autosave_path(project_path))
+        self.project_path = project_path
+        self._file = open(journal_path(project_path), "a", encoding="utf-8")
+
+    def _begin(self, header, operations=""):
+        """Replace the journal with a header (and operation lines), and open it for appending"""
+        path = journal_path(self.project_path)
+        _write_synced(path, json.dumps(header) + "\n" + operations)
+        self._file = open(path, "a", encoding="utf-8")
+        self.id = header["id"]
+        self.operations = operations.count("\n")
+        self._unsynced = 0
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
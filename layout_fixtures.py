@@ -0,0 +1,39 @@
+"""
+Layout fixtures - generated layouts shared by the tests and benchmarks
+"""
+
+import random
+
+from ui_elements import UIElement, Container, UILayout
+
+
+def build_random_layout(count, seed=1):
+    """Build a random nested layout with roughly count items"""
+    rng = random.Random(seed)
+    layout = UILayout("Random")
+    layout.root_container.width = 5000
+    layout.root_container.height = 5000
+    containers = [layout.root_container]
+    for i in range(count):
+        parent = rng.choice(containers)
+        x = rng.randint(0, max(1, parent.width - 20))
+        y = rng.randint(0, max(1, parent.height - 20))
+        if rng.random() < 0.2:
+            child = Container(f"C{i}", x, y, rng.randint(50, 800), rng.randint(50, 800))
+            containers.append(child)
+        else:
+            child = UIElement("Button", f"B{i}", x, y, rng.randint(10, 200), rng.randint(10, 60))
+        parent.add_child(child)
+    return layout
+
+
+def build_deep_layout(depth):
+    """Build a chain of nested containers ending in one element"""
+    layout = UILayout("Deep")
+    parent = layout.root_container
+    for i in range(depth):
+        child = Container(f"C{i}", 1, 1, 2 * (depth - i) + 10, 2 * (depth - i) + 10)
+        parent.add_child(child)
+        parent = child
+    parent.add_child(UIElement("Label", "Leaf", 1, 1, 6, 6))
+    return layout
@@ -1,16 +1,33 @@
 """
 MD UI Builder - Main Application
 A visual UI builder that generates markdown representations
+
+Only what the first frame shows is built before the window appears; the
+grid and the properties panel follow once it has been drawn, and the
+exporters are imported on first use.
+
+Usage:
+    python main.py [--startup-timing]
+
+--startup-timing prints the time to the first frame and the time until
+the window is fully built (both from the start of this module), then
+exits.
 """
 
+import os
+import sys
+import time
+
+STARTED = time.perf_counter()  # Before the imports, which are part of startup
+
 import customtkinter as ctk
-from tkinter import filedialog, messagebox
-import json
+from tkinter import filedialog, messagebox, StringVar
 from ui_elements import UIElement, Container, UILayout
 from canvas_view import CanvasView
-from properties_panel import PropertiesPanel
 from element_palette import ElementPalette
-from ascii_exporter import export_to_ascii
+from binary_format import EXTENSION as BINARY_EXTENSION, is_binary_project
+from history import History
+from background_tasks import TaskRunner
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
@@ -19,7 +36,7 @@ ctk.set_default_color_theme("blue")
 class MDUIBuilder(ctk.CTk):
     """Main application window"""
     
-    def __init__(self):
+    def __init__(self, startup_timing=False):
         super().__init__()
         
         self.title("MD UI Builder")
@@ -28,6 +45,16 @@ class MDUIBuilder(ctk.CTk):
         # Initialize the UI layout
         self.ui_layout = UILayout("My UI Design")
         self.selected_item = None
+        self.ascii_cache = None  # Created by the first ASCII export, on the worker thread
+        self.history = History()  # Shared by the canvas and the properties panel
+        self.history.listeners.append(self.on_history_change)
+        self.tasks = TaskRunner(self)  # Saves and exports a copy of the layout in the background
+        self.tasks.reset(self.ui_layout)
+        self.journal = None  # Autosave journal of the open project (see journal.py)
+        self.project_path = None  # None while the work is untitled
+        self._properties_panel = None  # Built after the first frame or on first use
+        self.startup_timing = startup_timing
+        self.startup_times = {}  # "first_frame" / "interactive" -> seconds since STARTED
         
         # Setup UI
         self.setup_ui()
@@ -35,6 +62,9 @@ class MDUIBuilder(ctk.CTk):
         # Bind keyboard shortcuts
         self.bind("<Control-c>", self.on_copy)
         self.bind("<Control-v>", self.on_paste)
+        self.bind("<Control-z>", self.on_undo)
+        self.bind("<Control-y>", self.on_redo)
+        self.bind("<Control-Z>", self.on_redo)  # Ctrl+Shift+Z
         
         # Status bar for copy/paste feedback
         self.status_var = ctk.StringVar()
@@ -42,6 +72,145 @@ class MDUIBuilder(ctk.CTk):
         self.status_bar.grid(row=2, column=0, columnspan=3, sticky="ew", padx=5, pady=(0, 5))
         self.status_var.set("Ready")
         
+        # Finish building once the window has been drawn
+        self.bind("<Map>", self._on_map, add="+")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+    def _on_map(self, event):
+        """Note the first frame and schedule the deferred parts of the UI"""
+        if event.widget is not self or "first_frame" in self.startup_times:
+            return
+        self.update_idletasks()  # Flush the first paint
+        self.startup_times["first_frame"] = time.perf_counter() - STARTED
+        self.after_idle(self._finish_startup)
+        
+    def _finish_startup(self):
+        """Build what the first frame did not need"""
+        self.canvas_view.draw_grid()
+        self.properties_panel  # Builds it
+        self.update_idletasks()
+        self.startup_times["interactive"] = time.perf_counter() - STARTED
+        if self.startup_timing:
+            print(f"Time to first frame: {self.startup_times['first_frame'] * 1000:8.1f} ms")
+            print(f"Time to interactive: {self.startup_times['interactive'] * 1000:8.1f} ms")
+            self.after_idle(self.destroy)
+        else:
+            # Offers to recover untitled work if the last session crashed
+            self.open_journal(None)
+            self._journal_tick()
+            
+    @property
+    def properties_panel(self):
+        """The properties panel, built on first use"""
+        if self._properties_panel is None:
+            from properties_panel import PropertiesPanel
+            self._properties_panel = PropertiesPanel(
+                self.right_panel,
+                self.on_property_changed,
+                history=self.history
+            )
+            self._properties_panel.pack(fill="both", expand=True)
+        return self._properties_panel
+        
+    def open_journal(self, project_path, offer_recovery=True):
+        """Journal changes to a project (None: untitled work) for crash recovery"""
+        from journal import Journal, UNTITLED_PATH, has_journal, recover
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        path = project_path or UNTITLED_PATH
+        journal = Journal(path)
+        try:
+            recovered = recover(path) if offer_recovery and has_journal(path) else None
+            if recovered is not None and messagebox.askyesno(
+                    "Recover Changes",
+                    f"The builder did not shut down cleanly. Recover {recovered[1]} unsaved "
+                    f"change(s) to {os.path.basename(path)}?"):
+                self.set_layout(recovered[0])
+                journal.start(self.ui_layout, snapshot=True)
+            else:
+                journal.start(self.ui_layout)
+        except OSError as e:
+            self.status_var.set(f"Autosave disabled: {e}")
+            return
+        self.journal = journal
+        self.project_path = project_path
+
+    def on_history_change(self, command, undone):
+        """Pass an edit on to the journal and the background copy of the layout"""
+        from journal import command_operation
+        operation = command_operation(command, undone)
+        if self.journal is not None:
+            self.journal.append(operation)
+        self.tasks.apply(operation)
+
+    def run_in_background(self, key, description, work, on_done):
+        """Run work(layout, progress) on the worker thread against the layout as it is now"""
+        if self.tasks.busy:
+            self.status_var.set(f"{description} (queued)...")
+
+        def run(layout, progress):
+            progress(f"{description}...")
+            return work(layout, progress)
+
+        def failed(error):
+            self.status_var.set(f"{description} failed")
+            messagebox.showerror("Error", f"{description} failed: {error}")
+
+        # A queued job for the same file is replaced by this one
+        self.tasks.submit(key, run, on_done=on_done, on_error=failed,
+                          on_progress=self.status_var.set)
+
+    def _journal_tick(self):
+        """Flush the journal every second and compact it once it has grown long"""
+        if self.journal is not None:
+            try:
+                self.journal.sync()
+            except OSError as e:
+                self.status_var.set(f"Autosave failed: {e}")
+            if self.journal.needs_compaction:
+                self.compact_journal()
+        self.after(1000, self._journal_tick)
+
+    def compact_journal(self):
+        """Snapshot the layout on the worker thread and restart the journal from it"""
+        from journal import write_snapshot
+        journal = self.journal
+        try:
+            token = journal.begin_compaction()
+        except OSError as e:
+            self.status_var.set(f"Autosave failed: {e}")
+            return
+
+        def done(snapshot_id):
+            try:
+                journal.finish_compaction(token, snapshot_id)
+            except OSError as e:
+                self.status_var.set(f"Autosave failed: {e}")
+
+        def failed(error):
+            journal.finish_compaction(token, None)
+            self.status_var.set(f"Autosave failed: {error}")
+
+        self.tasks.submit(("compact", journal.project_path),
+                          lambda layout, progress: write_snapshot(token, layout),
+                          on_done=done, on_error=failed)
+
+    def on_close(self):
+        """Close the window; a clean exit needs no recovery"""
+        self.tasks.shutdown()  # Lets saves in progress finish
+        if self.journal is not None:
+            self.journal.close()
+        self.destroy()
+
+    def set_layout(self, ui_layout):
+        """Show a different layout"""
+        self.ui_layout = ui_layout
+        self.tasks.reset(ui_layout)
+        self.selected_item = None
+        self.properties_panel.clear()
+        self.canvas_view.set_layout(self.ui_layout)  # Redraws
+
     def setup_ui(self):
         """Setup the main application UI"""
         
@@ -85,25 +254,21 @@ class MDUIBuilder(ctk.CTk):
             height=28
         ).pack(side="left", padx=5)
 
-        # Canvas - takes all remaining space
+        # Canvas - takes all remaining space (the grid is drawn after the first frame)
         self.canvas_view = CanvasView(
             self.center_panel,
             self.ui_layout,
-            self.on_item_selected
+            self.on_item_selected,
+            defer_grid=True,
+            history=self.history
         )
         self.canvas_view.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
         
-        # Right panel - Properties
+        # Right panel - Properties (the panel itself is built later)
         self.right_panel = ctk.CTkFrame(self, width=300)
         self.right_panel.grid(row=0, column=2, sticky="nsew", padx=5, pady=5)
         self.right_panel.grid_propagate(False)
         
-        self.properties_panel = PropertiesPanel(
-            self.right_panel,
-            self.on_property_changed
-        )
-        self.properties_panel.pack(fill="both", expand=True)
-        
         # Bottom panel - Actions
         self.bottom_panel = ctk.CTkFrame(self, height=60)
         self.bottom_panel.grid(row=1, column=0, columnspan=3, sticky="ew", padx=5, pady=5)
@@ -157,7 +322,7 @@ class MDUIBuilder(ctk.CTk):
         
     def on_property_changed(self):
         """Handle property changes"""
-        self.canvas_view.redraw()
+        self.canvas_view.refresh_item(self.selected_item)
         
     def on_copy(self, event=None):
         """Handle copy command"""
@@ -183,6 +348,34 @@ class MDUIBuilder(ctk.CTk):
             self.status_var.set("Failed to paste item")
         return "break"  # Prevent default behavior
         
+    def on_undo(self, event=None):
+        """Handle undo command"""
+        command = self.canvas_view.undo()
+        if command is None:
+            self.status_var.set("Nothing to undo")
+        else:
+            self.status_var.set(f"Undid {command.label}")
+            self.after_history_step()
+        return "break"
+
+    def on_redo(self, event=None):
+        """Handle redo command"""
+        command = self.canvas_view.redo()
+        if command is None:
+            self.status_var.set("Nothing to redo")
+        else:
+            self.status_var.set(f"Redid {command.label}")
+            self.after_history_step()
+        return "break"
+
+    def after_history_step(self):
+        """Show the undone or redone values in the properties panel"""
+        self.selected_item = self.canvas_view.selected_item
+        if self.selected_item is not None:
+            self.properties_panel.load_item(self.selected_item)
+        else:
+            self.properties_panel.clear()
+
     def add_container(self):
         """Add a new container"""
         self.canvas_view.set_adding_mode("Container")
@@ -191,10 +384,9 @@ class MDUIBuilder(ctk.CTk):
         """Delete the selected item"""
         if self.selected_item and self.selected_item != self.ui_layout.root_container:
             if self.selected_item.parent:
-                self.selected_item.parent.remove_child(self.selected_item)
+                self.canvas_view.remove_item(self.selected_item)
                 self.selected_item = None
                 self.properties_panel.clear()
-                self.canvas_view.redraw()
         else:
             messagebox.showwarning("Cannot Delete", "Cannot delete the root container or no item selected")
     
@@ -206,13 +398,23 @@ class MDUIBuilder(ctk.CTk):
         )
 
         if filename:
-            try:
+            def work(layout, progress):
+                from ascii_exporter import export_to_ascii
+                from ascii_surface import numpy_available
+                from ascii_cache import ASCIIRenderCache
                 # Auto-scale to fit in IDE window (120 chars wide, 60 lines tall)
                 # This makes it easy to view without scrolling
-                export_to_ascii(self.ui_layout, filename, scale_factor=None, max_width=120, max_height=60)
+                # Repeated exports only redraw what changed (needs NumPy)
+                if self.ascii_cache is None and numpy_available():
+                    self.ascii_cache = ASCIIRenderCache()
+                export_to_ascii(layout, filename, scale_factor=None, max_width=120, max_height=60,
+                                cache=self.ascii_cache)
+
+            def done(_):
+                self.status_var.set(f"Exported {os.path.basename(filename)}")
                 messagebox.showinfo("Success", f"Exported ASCII art to {filename}\n\nScaled to fit IDE window (max 120x60 chars)")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export: {str(e)}")
+
+            self.run_in_background(("ascii", filename), "Exporting ASCII art", work, done)
 
     def export_markdown(self):
         """Export the UI layout to markdown"""
@@ -222,39 +424,66 @@ class MDUIBuilder(ctk.CTk):
         )
 
         if filename:
-            try:
-                self.ui_layout.save_to_file(filename)
+            def done(_):
+                self.status_var.set(f"Exported {os.path.basename(filename)}")
                 messagebox.showinfo("Success", f"UI layout exported to {filename}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export: {str(e)}")
+
+            self.run_in_background(("markdown", filename), "Exporting markdown",
+                                   lambda layout, progress: layout.save_to_file(filename), done)
 
     def save_project(self):
-        """Save the project to JSON"""
+        """Save the project to JSON (or the binary format for .uibp files)"""
+        file_type = StringVar(self)
         filename = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"),
+                       ("Binary projects", f"*{BINARY_EXTENSION}"),
+                       ("All files", "*.*")],
+            typevariable=file_type
         )
 
         if filename:
-            try:
-                self.ui_layout.save_to_json(filename)
+            # A name typed without an extension gets the chosen file type's
+            if not os.path.splitext(filename)[1]:
+                binary = file_type.get() == "Binary projects"
+                filename += BINARY_EXTENSION if binary else ".json"
+            journal = self.journal
+            mark = journal.mark() if journal is not None else None
+
+            def work(layout, progress):
+                if filename.lower().endswith(BINARY_EXTENSION):
+                    layout.save_to_binary(filename)
+                else:
+                    layout.save_to_json(filename)
+
+            def done(_):
+                # The saved file is the new base of the journal; edits made
+                # while saving stay in it
+                self.status_var.set(f"Saved {os.path.basename(filename)}")
+                if journal is not None and journal is self.journal:
+                    try:
+                        journal.rebase(mark, self.ui_layout, filename)
+                        self.project_path = filename
+                    except OSError as e:
+                        self.status_var.set(f"Autosave failed: {e}")
                 messagebox.showinfo("Success", f"Project saved to {filename}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to save: {str(e)}")
+
+            self.run_in_background(("save", filename), "Saving project", work, done)
 
     def load_project(self):
-        """Load a project from JSON"""
+        """Load a project from JSON or the binary format"""
         filename = filedialog.askopenfilename(
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("Project files", f"*.json *{BINARY_EXTENSION}"),
+                       ("All files", "*.*")]
         )
 
         if filename:
             try:
-                self.ui_layout = UILayout.load_from_json(filename)
-                self.selected_item = None
-                self.properties_panel.clear()
-                self.canvas_view.set_layout(self.ui_layout)
-                self.canvas_view.redraw()
+                if is_binary_project(filename):
+                    ui_layout = UILayout.load_from_binary(filename)
+                else:
+                    ui_layout = UILayout.load_from_json(filename)
+                self.set_layout(ui_layout)
+                self.open_journal(filename)
                 messagebox.showinfo("Success", f"Project loaded from {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load: {str(e)}")
@@ -262,16 +491,13 @@ class MDUIBuilder(ctk.CTk):
     def new_project(self):
         """Create a new project"""
         if messagebox.askyesno("New Project", "Create a new project? Unsaved changes will be lost."):
-            self.ui_layout = UILayout("My UI Design")
-            self.selected_item = None
-            self.properties_panel.clear()
-            self.canvas_view.set_layout(self.ui_layout)
-            self.canvas_view.redraw()
+            self.set_layout(UILayout("My UI Design"))
+            self.open_journal(None, offer_recovery=False)
 
 
 def main():
     """Main entry point"""
-    app = MDUIBuilder()
+    app = MDUIBuilder(startup_timing="--startup-timing" in sys.argv[1:])
     app.mainloop()
 
 
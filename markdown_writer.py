@@ -0,0 +1,59 @@
+"""
+Streaming markdown writer for layouts
+
+Produces exactly the same text as the to_markdown methods used to, but as a
+sequence of small pieces generated by an iterative walk (traversal.py), so
+a document can be written to a file without ever existing as one string.
+"""
+
+from ui_elements import Container, UILayout
+from traversal import iter_events, ENTER
+
+
+BUFFER_SIZE = 64 * 1024
+
+
+def iter_markdown(node, level=None):
+    """
+    Yield the markdown of a layout, container or element piece by piece.
+
+    Args:
+        node: UILayout, Container or UIElement
+        level: Heading level of node (defaults to 2 for containers, 3 for
+            elements; ignored for layouts)
+    """
+    if isinstance(node, UILayout):
+        yield f"# UI Layout: {node.name}\n\n"
+        node = node.root_container
+        level = 2
+    elif level is None:
+        level = 2 if isinstance(node, Container) else 3
+
+    # Children are separated by blank lines: header "\n" ("\n" child "\n")*
+    for event, current, depth in iter_events(node):
+        has_children = isinstance(current, Container) and current.children
+        if event is ENTER:
+            header = current._markdown_header(level + depth)
+            if depth:
+                yield f"\n{header}\n"
+            elif has_children:
+                yield f"{header}\n"
+            else:
+                yield header
+        elif depth and has_children:
+            yield "\n"
+
+
+def write_markdown(node, f, buffer_size=BUFFER_SIZE):
+    """Write the markdown of node to a file-like object in buffered blocks"""
+    pending = []
+    size = 0
+    for piece in iter_markdown(node):
+        pending.append(piece)
+        size += len(piece)
+        if size >= buffer_size:
+            f.write("".join(pending))
+            pending = []
+            size = 0
+    if pending:
+        f.write("".join(pending))
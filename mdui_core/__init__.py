@@ -0,0 +1,75 @@
+"""
+MD UI Builder core - the layout model, loaders and exporters without the GUI
+
+Everything needed to load, edit, save and export layouts headlessly:
+
+    from mdui_core import UILayout, export_to_ascii
+
+Importing this package loads nothing but itself. Each name is imported
+from its module the first time it is used, and none of those modules
+imports tkinter or customtkinter. NumPy, json and multiprocessing are
+only loaded by the features that need them. The GUI lives in main.py,
+canvas_view.py, properties_panel.py and element_palette.py.
+"""
+
+
+# Public name -> module it comes from
+_EXPORTS = {
+    # Layout model
+    "UIElement": "ui_elements",
+    "Container": "ui_elements",
+    "UILayout": "ui_elements",
+    "ChildList": "ui_elements",
+    "advance_revisions": "ui_elements",
+    # Tree traversal
+    "walk": "traversal",
+    "iter_preorder": "traversal",
+    "iter_postorder": "traversal",
+    "iter_events": "traversal",
+    # Loading and saving
+    "load_layout": "streaming_loader",
+    "LoadCancelled": "streaming_loader",
+    "is_binary_project": "binary_format",
+    "BinaryFormatError": "binary_format",
+    # Exporters
+    "iter_markdown": "markdown_writer",
+    "write_markdown": "markdown_writer",
+    "ASCIIExporter": "ascii_exporter",
+    "export_to_ascii": "ascii_exporter",
+    "calculate_optimal_scale": "ascii_exporter",
+    "export_ascii_batch": "ascii_batch",
+    "export_to_ascii_batch": "ascii_batch",
+    "ASCIIRenderCache": "ascii_cache",
+    "convert_tree": "batch_convert",
+    # Undo/redo
+    "History": "history",
+    "SetAttribute": "history",
+    "SetAttributes": "history",
+    "SetProperties": "history",
+    "Move": "history",
+    "Resize": "history",
+    "AddNode": "history",
+    "RemoveNode": "history",
+    # Autosave journal
+    "Journal": "journal",
+    "recover": "journal",
+    # Geometry arrays (NumPy)
+    "geometry_arrays": "geometry",
+    "apply_geometry": "geometry",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
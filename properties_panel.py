@@ -1,23 +1,89 @@
 """
 Properties Panel - Edit properties of selected items
+
+Creating CustomTkinter widgets is slow, so the panel does not rebuild its
+widgets on every selection. There is one persistent form per kind of item
+(container or element), created the first time such an item is selected;
+selecting an item shows its form and writes the item's values into it.
+The field callbacks always act on the current item, so nothing needs to
+be rebound. Custom property rows come from a pool: rows that are not
+needed are hidden and reused for the next element.
 """
 
 import customtkinter as ctk
 from ui_elements import UIElement, Container
+from history import SetAttribute, SetProperties, MISSING
+
+
+def _set_entry(entry, value):
+    """Show a value in an entry without firing its callbacks"""
+    if entry.get() == value:
+        return  # Keep the cursor where it is
+    entry.delete(0, "end")
+    if value:
+        entry.insert(0, value)  # Inserting "" would hide the placeholder
+
+
+class _Form:
+    """The persistent widgets for editing one kind of item"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.fields = {}  # Attribute name -> widget showing it
+        self.widgets = []  # Every widget of the form, for property_widgets
+
+
+class _PropertyRow:
+    """A reusable key/value row for one custom property"""
+
+    def __init__(self, panel, parent):
+        self.key = None  # Key of the property the row shows
+        self.frame = ctk.CTkFrame(parent)
+
+        self.key_entry = ctk.CTkEntry(self.frame, width=100, placeholder_text="Key")
+        self.key_entry.pack(side="left", padx=2)
+
+        self.value_entry = ctk.CTkEntry(self.frame, placeholder_text="Value")
+        self.value_entry.pack(side="left", fill="x", expand=True, padx=2)
+
+        # Bind change events
+        self.key_entry.bind("<KeyRelease>", lambda e: panel.update_custom_property_row(self))
+        self.value_entry.bind("<KeyRelease>", lambda e: panel.update_custom_property_row(self))
+
+        self.delete_btn = ctk.CTkButton(
+            self.frame,
+            text="X",
+            width=30,
+            command=lambda: panel.delete_custom_property(self)
+        )
+        self.delete_btn.pack(side="left", padx=2)
+
+    def show(self, key, value):
+        """Bind the row to a property and show it below the visible rows"""
+        self.key = key
+        _set_entry(self.key_entry, key)
+        _set_entry(self.value_entry, value)
+        self.frame.pack(fill="x", padx=10, pady=2)
+
+    def hide(self):
+        self.key = None
+        self.frame.pack_forget()
 
 
 class PropertiesPanel(ctk.CTkScrollableFrame):
     """Panel for editing properties of selected items"""
 
-    def __init__(self, parent, on_property_changed):
+    def __init__(self, parent, on_property_changed, history=None):
         super().__init__(parent)
 
         self.on_property_changed = on_property_changed
+        self.history = history  # Edits are recorded here for undo, if given
         self.current_item = None
 
-        # Create a container frame for all property widgets
-        # This makes it easy to clear everything at once
-        self.properties_container = None
+        self.forms = {}  # Container / UIElement -> _Form, created on first use
+        self.active_form = None
+        self.property_rows = []  # Pool of custom property rows; the visible ones come first
+        self.visible_rows = 0
 
         # Title (permanent widget)
         self.title_label = ctk.CTkLabel(
@@ -36,122 +102,123 @@ class PropertiesPanel(ctk.CTkScrollableFrame):
         )
         self.no_selection_label.pack(pady=20)
 
-    def clear(self):
-        """Clear all property widgets"""
-        # Hide the no selection label if it exists
-        if hasattr(self, 'no_selection_label') and self.no_selection_label.winfo_ismapped():
-            self.no_selection_label.pack_forget()
-
-        # Destroy the entire properties container if it exists
-        if hasattr(self, 'properties_container') and self.properties_container is not None:
-            try:
-                # First, destroy all children of the properties container
-                for widget in self.properties_container.winfo_children():
-                    widget.destroy()
-                # Then destroy the container itself
-                self.properties_container.destroy()
-            except Exception as e:
-                print(f"Error clearing properties container: {e}")
-            self.properties_container = None
+    @property
+    def property_widgets(self):
+        """Get the widgets currently showing properties"""
+        if self.active_form is None:
+            return []
+        widgets = list(self.active_form.widgets)
+        for row in self.property_rows[:self.visible_rows]:
+            widgets.extend((row.frame, row.key_entry, row.value_entry, row.delete_btn))
+        return widgets
 
+    def clear(self):
+        """Hide the property form"""
+        self.show_form(None)
         self.current_item = None
 
-        # Show the no selection label if it exists
-        if hasattr(self, 'no_selection_label'):
-            self.no_selection_label.pack(pady=20)
-        
     def load_item(self, item):
         """Load an item's properties for editing"""
-        # Clear existing widgets first
-        self.clear()
-        
-        # Hide the no selection label if it exists
-        if hasattr(self, 'no_selection_label'):
-            self.no_selection_label.pack_forget()
+        if self.history is not None:
+            self.history.seal()  # Edits of another item are separate steps
 
-        # Create a new container frame for all property widgets
-        if self.properties_container is not None:
-            self.properties_container.destroy()
-            
-        self.properties_container = ctk.CTkFrame(self, fg_color="transparent")
-        self.properties_container.pack(fill="both", expand=True, padx=5, pady=5)
+        if isinstance(item, Container):
+            self.current_item = item
+            self.load_container_properties(item)
+        elif isinstance(item, UIElement):
+            self.current_item = item
+            self.load_element_properties(item)
+        else:
+            self.clear()
 
-        self.current_item = item
+    def show_form(self, kind):
+        """Show the form for a kind of item (creating it the first time), or none"""
+        form = None
+        if kind is not None:
+            form = self.forms.get(kind)
+            if form is None:
+                build = self.build_container_form if kind is Container else self.build_element_form
+                form = self.forms[kind] = build()
+        if form is self.active_form:
+            return form
 
-        if item is not None:
-            if isinstance(item, Container):
-                self.load_container_properties(item)
-            elif isinstance(item, UIElement):
-                self.load_element_properties(item)
+        if self.active_form is not None:
+            self.active_form.frame.pack_forget()
+        if form is not None:
+            self.no_selection_label.pack_forget()
+            form.frame.pack(fill="both", expand=True, padx=5, pady=5)
         else:
-            # Show no selection label if item is None
-            if hasattr(self, 'no_selection_label'):
-                self.no_selection_label.pack(pady=20)
-            
-    def load_container_properties(self, container):
-        """Load container properties"""
+            self.no_selection_label.pack(pady=20)
+        self.active_form = form
+        return form
+
+    def build_container_form(self):
+        """Create the container form"""
+        form = _Form(ctk.CTkFrame(self, fg_color="transparent"))
+
         # Name
-        self.add_property_field("Name", container.name, self.update_name)
-        
+        self.add_property_field(form, "name", "Name", self.update_name)
+
         # Position
-        self.add_property_field("X Position", str(container.x), lambda v: self.update_position(v, "x"))
-        self.add_property_field("Y Position", str(container.y), lambda v: self.update_position(v, "y"))
-        
+        self.add_property_field(form, "x", "X Position", lambda v: self.update_position(v, "x"))
+        self.add_property_field(form, "y", "Y Position", lambda v: self.update_position(v, "y"))
+
         # Size
-        self.add_property_field("Width", str(container.width), lambda v: self.update_size(v, "width"))
-        self.add_property_field("Height", str(container.height), lambda v: self.update_size(v, "height"))
-        
+        self.add_property_field(form, "width", "Width", lambda v: self.update_size(v, "width"))
+        self.add_property_field(form, "height", "Height", lambda v: self.update_size(v, "height"))
+
         # Orientation
         self.add_dropdown_field(
+            form,
+            "orientation",
             "Orientation",
-            container.orientation,
             ["horizontal", "vertical"],
             self.update_orientation
         )
-        
+
         # Padding
-        self.add_property_field("Padding", str(container.padding), self.update_padding)
-        
+        self.add_property_field(form, "padding", "Padding", self.update_padding)
+
         # Background
-        self.add_property_field("Background", container.background, self.update_background)
-        
-    def load_element_properties(self, element):
-        """Load element properties"""
+        self.add_property_field(form, "background", "Background", self.update_background)
+        return form
+
+    def build_element_form(self):
+        """Create the element form"""
+        form = _Form(ctk.CTkFrame(self, fg_color="transparent"))
+
         # Name
-        self.add_property_field("Name", element.name, self.update_name)
-        
+        self.add_property_field(form, "name", "Name", self.update_name)
+
         # Type (read-only)
-        type_label = ctk.CTkLabel(self.properties_container, text="Type:", anchor="w")
+        type_label = ctk.CTkLabel(form.frame, text="Type:", anchor="w")
         type_label.pack(fill="x", padx=10, pady=(10, 0))
-        type_value = ctk.CTkLabel(
-            self.properties_container,
-            text=element.element_type,
-            anchor="w",
-            text_color="gray"
-        )
+        type_value = ctk.CTkLabel(form.frame, text="", anchor="w", text_color="gray")
         type_value.pack(fill="x", padx=10, pady=(0, 5))
-        
+        form.fields["element_type"] = type_value
+        form.widgets += [type_label, type_value]
+
         # Position
-        self.add_property_field("X Position", str(element.x), lambda v: self.update_position(v, "x"))
-        self.add_property_field("Y Position", str(element.y), lambda v: self.update_position(v, "y"))
-        
+        self.add_property_field(form, "x", "X Position", lambda v: self.update_position(v, "x"))
+        self.add_property_field(form, "y", "Y Position", lambda v: self.update_position(v, "y"))
+
         # Size
-        self.add_property_field("Width", str(element.width), lambda v: self.update_size(v, "width"))
-        self.add_property_field("Height", str(element.height), lambda v: self.update_size(v, "height"))
-        
+        self.add_property_field(form, "width", "Width", lambda v: self.update_size(v, "width"))
+        self.add_property_field(form, "height", "Height", lambda v: self.update_size(v, "height"))
+
         # Text
-        self.add_property_field("Text", element.text, self.update_text)
-        
+        self.add_property_field(form, "text", "Text", self.update_text)
+
         # Enabled
-        self.add_checkbox_field("Enabled", element.enabled, self.update_enabled)
-        
+        self.add_checkbox_field(form, "enabled", "Enabled", self.update_enabled)
+
         # Visible
-        self.add_checkbox_field("Visible", element.visible, self.update_visible)
-        
+        self.add_checkbox_field(form, "visible", "Visible", self.update_visible)
+
         # Custom properties section
-        self.add_separator()
+        self.add_separator(form)
         custom_label = ctk.CTkLabel(
-            self.properties_container,
+            form.frame,
             text="Custom Properties",
             font=("Arial", 12, "bold")
         )
@@ -159,170 +226,211 @@ class PropertiesPanel(ctk.CTkScrollableFrame):
 
         # Add custom property button
         add_prop_btn = ctk.CTkButton(
-            self.properties_container,
+            form.frame,
             text="+ Add Property",
             command=self.add_custom_property
         )
         add_prop_btn.pack(fill="x", padx=10, pady=5)
 
-        # Show existing custom properties
-        for key, value in element.properties.items():
-            self.add_custom_property_field(key, str(value))
-            
-    def add_separator(self):
+        # Custom property rows are packed in here
+        self.property_rows_frame = ctk.CTkFrame(form.frame, fg_color="transparent")
+        self.property_rows_frame.pack(fill="x")
+        form.widgets += [custom_label, add_prop_btn, self.property_rows_frame]
+        return form
+
+    def load_container_properties(self, container):
+        """Show a container's values in the container form"""
+        fields = self.show_form(Container).fields
+        for name in ("name", "x", "y", "width", "height", "padding", "background"):
+            _set_entry(fields[name], str(getattr(container, name)))
+        fields["orientation"].set(container.orientation)
+
+    def load_element_properties(self, element):
+        """Show an element's values in the element form"""
+        fields = self.show_form(UIElement).fields
+        for name in ("name", "x", "y", "width", "height", "text"):
+            _set_entry(fields[name], str(getattr(element, name)))
+        fields["element_type"].configure(text=element.element_type)
+        for name in ("enabled", "visible"):
+            if getattr(element, name):
+                fields[name].select()
+            else:
+                fields[name].deselect()
+
+        # Existing custom properties, in reused rows (without allocating an empty dict)
+        properties = element._properties or {}
+        for index, (key, value) in enumerate(properties.items()):
+            row = self.property_row(index)
+            if index < self.visible_rows:
+                row.key = key
+                _set_entry(row.key_entry, key)
+                _set_entry(row.value_entry, str(value))
+            else:
+                row.show(key, str(value))
+        for row in self.property_rows[len(properties):self.visible_rows]:
+            row.hide()
+        self.visible_rows = len(properties)
+
+    def property_row(self, index):
+        """Get the pooled custom property row at an index, creating rows as needed"""
+        while len(self.property_rows) <= index:
+            self.property_rows.append(_PropertyRow(self, self.property_rows_frame))
+        return self.property_rows[index]
+
+    def add_separator(self, form):
         """Add a visual separator"""
-        separator = ctk.CTkFrame(self.properties_container, height=2, fg_color="gray")
+        separator = ctk.CTkFrame(form.frame, height=2, fg_color="gray")
         separator.pack(fill="x", padx=10, pady=10)
+        form.widgets.append(separator)
 
-    def add_property_field(self, label, value, callback):
-        """Add a text property field"""
-        label_widget = ctk.CTkLabel(self.properties_container, text=f"{label}:", anchor="w")
+    def add_property_field(self, form, name, label, callback):
+        """Add a text field for an attribute to a form"""
+        label_widget = ctk.CTkLabel(form.frame, text=f"{label}:", anchor="w")
         label_widget.pack(fill="x", padx=10, pady=(10, 0))
 
-        entry = ctk.CTkEntry(self.properties_container)
-        entry.insert(0, value)
+        entry = ctk.CTkEntry(form.frame)
         entry.pack(fill="x", padx=10, pady=(0, 5))
 
         # Bind change event
         entry.bind("<KeyRelease>", lambda e: callback(entry.get()))
+        form.fields[name] = entry
+        form.widgets += [label_widget, entry]
 
-    def add_dropdown_field(self, label, value, options, callback):
-        """Add a dropdown property field"""
-        label_widget = ctk.CTkLabel(self.properties_container, text=f"{label}:", anchor="w")
+    def add_dropdown_field(self, form, name, label, options, callback):
+        """Add a dropdown field for an attribute to a form"""
+        label_widget = ctk.CTkLabel(form.frame, text=f"{label}:", anchor="w")
         label_widget.pack(fill="x", padx=10, pady=(10, 0))
 
         dropdown = ctk.CTkComboBox(
-            self.properties_container,
+            form.frame,
             values=options,
             command=callback
         )
-        dropdown.set(value)
         dropdown.pack(fill="x", padx=10, pady=(0, 5))
+        form.fields[name] = dropdown
+        form.widgets += [label_widget, dropdown]
 
-    def add_checkbox_field(self, label, value, callback):
-        """Add a checkbox property field"""
+    def add_checkbox_field(self, form, name, label, callback):
+        """Add a checkbox field for an attribute to a form"""
         checkbox = ctk.CTkCheckBox(
-            self.properties_container,
+            form.frame,
             text=label,
             command=lambda: callback(checkbox.get())
         )
-        if value:
-            checkbox.select()
         checkbox.pack(fill="x", padx=10, pady=5)
-        
-    def add_custom_property_field(self, key, value):
-        """Add a custom property field"""
-        frame = ctk.CTkFrame(self.properties_container)
-        frame.pack(fill="x", padx=10, pady=2)
-
-        key_entry = ctk.CTkEntry(frame, width=100, placeholder_text="Key")
-        key_entry.insert(0, key)
-        key_entry.pack(side="left", padx=2)
-
-        value_entry = ctk.CTkEntry(frame, placeholder_text="Value")
-        value_entry.insert(0, value)
-        value_entry.pack(side="left", fill="x", expand=True, padx=2)
-
-        # Bind change events
-        key_entry.bind("<KeyRelease>", lambda e: self.update_custom_property(key, key_entry.get(), value_entry.get()))
-        value_entry.bind("<KeyRelease>", lambda e: self.update_custom_property(key, key_entry.get(), value_entry.get()))
+        form.fields[name] = checkbox
+        form.widgets.append(checkbox)
 
-        delete_btn = ctk.CTkButton(
-            frame,
-            text="X",
-            width=30,
-            command=lambda: self.delete_custom_property(key, frame)
-        )
-        delete_btn.pack(side="left", padx=2)
-        
     def add_custom_property(self):
         """Add a new custom property"""
         if isinstance(self.current_item, UIElement):
-            self.add_custom_property_field("", "")
-            
+            self.property_row(self.visible_rows).show("", "")
+            self.visible_rows += 1
+
+    def set_attribute(self, name, value):
+        """Set an attribute of the current item, recording it for undo"""
+        old_value = getattr(self.current_item, name)
+        setattr(self.current_item, name, value)
+        if self.history is not None and value != old_value:
+            # Typing into one field merges into a single undo step
+            self.history.record(SetAttribute(self.current_item, name, old_value), merge=True)
+        self.on_property_changed()
+
+    def record_properties(self, old_values):
+        """Record a change of the current element's custom properties for undo"""
+        if self.history is not None:
+            self.history.record(SetProperties(self.current_item, old_values), merge=True)
+
     def update_name(self, value):
         """Update item name"""
         if self.current_item:
-            self.current_item.name = value
-            self.on_property_changed()
-            
+            self.set_attribute("name", value)
+
     def update_position(self, value, axis):
         """Update item position"""
         if self.current_item:
             try:
-                if axis == "x":
-                    self.current_item.x = int(value)
-                else:
-                    self.current_item.y = int(value)
-                self.on_property_changed()
+                self.set_attribute(axis, int(value))
             except ValueError:
                 pass
-                
+
     def update_size(self, value, dimension):
         """Update item size"""
         if self.current_item:
             try:
-                if dimension == "width":
-                    self.current_item.width = int(value)
-                else:
-                    self.current_item.height = int(value)
-                self.on_property_changed()
+                self.set_attribute(dimension, int(value))
             except ValueError:
                 pass
-                
+
     def update_orientation(self, value):
         """Update container orientation"""
         if isinstance(self.current_item, Container):
-            self.current_item.orientation = value
-            self.on_property_changed()
-            
+            self.set_attribute("orientation", value)
+
     def update_padding(self, value):
         """Update container padding"""
         if isinstance(self.current_item, Container):
             try:
-                self.current_item.padding = int(value)
-                self.on_property_changed()
+                self.set_attribute("padding", int(value))
             except ValueError:
                 pass
-                
+
     def update_background(self, value):
         """Update container background"""
         if isinstance(self.current_item, Container):
-            self.current_item.background = value
-            self.on_property_changed()
-            
+            self.set_attribute("background", value)
+
     def update_text(self, value):
         """Update element text"""
         if isinstance(self.current_item, UIElement):
-            self.current_item.text = value
-            self.on_property_changed()
-            
+            self.set_attribute("text", value)
+
     def update_enabled(self, value):
         """Update element enabled state"""
         if isinstance(self.current_item, UIElement):
-            self.current_item.enabled = bool(value)
-            self.on_property_changed()
-            
+            self.set_attribute("enabled", bool(value))
+
     def update_visible(self, value):
         """Update element visible state"""
         if isinstance(self.current_item, UIElement):
-            self.current_item.visible = bool(value)
-            self.on_property_changed()
-            
+            self.set_attribute("visible", bool(value))
+
+    def update_custom_property_row(self, row):
+        """Update the custom property shown in a row after its key or value was edited"""
+        new_key = row.key_entry.get()
+        self.update_custom_property(row.key or "", new_key, row.value_entry.get())
+        row.key = new_key
+
     def update_custom_property(self, old_key, new_key, value):
         """Update a custom property"""
         if isinstance(self.current_item, UIElement):
-            if old_key in self.current_item.properties:
-                del self.current_item.properties[old_key]
+            current = self.current_item._properties or {}
+            old_values = {key: current.get(key, MISSING) for key in (old_key, new_key) if key}
+            new_values = {key: MISSING for key in old_values}
+            if new_key:
+                new_values[new_key] = value
+            shown = {key: old if old is MISSING else str(old) for key, old in old_values.items()}
+            if new_values == shown:
+                return  # Not an edit (Tab, arrow keys, undo shortcuts, ...)
+
+            properties = self.current_item.properties
+            if old_key in properties:
+                del properties[old_key]
             if new_key:
-                self.current_item.properties[new_key] = value
+                properties[new_key] = value
+            self.record_properties(old_values)
             self.on_property_changed()
-            
-    def delete_custom_property(self, key, frame):
-        """Delete a custom property"""
+
+    def delete_custom_property(self, row):
+        """Delete the custom property shown in a row, returning the row to the pool"""
         if isinstance(self.current_item, UIElement):
-            if key in self.current_item.properties:
-                del self.current_item.properties[key]
-            frame.destroy()
+            key = row.key
+            if key in (self.current_item._properties or {}):
+                old_values = {key: self.current_item._properties.pop(key)}
+                self.record_properties(old_values)
+            row.hide()
+            # Keep the visible rows first
+            self.property_rows.remove(row)
+            self.property_rows.append(row)
+            self.visible_rows -= 1
             self.on_property_changed()
-
@@ -0,0 +1,318 @@
+"""
+Retained scene graph mapping layout nodes to Tk canvas items
+"""
+
+from ui_elements import Container
+
+
+class _SceneNode:
+    """Canvas items and last drawn state of a single layout node"""
+
+    __slots__ = ("tag", "ids", "handle", "state", "parent")
+
+    def __init__(self, tag, ids, state, parent):
+        self.tag = tag
+        self.ids = ids
+        self.handle = None
+        self.state = state
+        self.parent = parent
+
+
+class SceneGraph:
+    """
+    Keeps one set of canvas items per container/element alive between
+    redraws and only issues coords/itemconfig calls for what changed.
+
+    Canvas items only carry their own node's tag. While a subtree is being
+    dragged its items share one temporary tag so the whole subtree moves
+    with a single canvas.move call (see begin_drag).
+    """
+
+    DRAG_TAG = "dragging"
+
+    def __init__(self, canvas, container_color="#3498db",
+                 container_horizontal_color="#2ecc71", element_color="#e74c3c",
+                 selected_color="#f39c12", resize_handle_size=10):
+        self.canvas = canvas
+        self.container_color = container_color
+        self.container_horizontal_color = container_horizontal_color
+        self.element_color = element_color
+        self.selected_color = selected_color
+        self.resize_handle_size = resize_handle_size
+        self.selected_item = None
+        self._nodes = {}  # layout node -> _SceneNode
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, item):
+        return item in self._nodes
+
+    def item_ids(self, item):
+        """Get the canvas item IDs drawn for a layout node"""
+        node = self._nodes.get(item)
+        if node is None:
+            return ()
+        if node.handle is not None:
+            return node.ids + (node.handle,)
+        return node.ids
+
+    def clear(self):
+        """Delete every canvas item owned by the scene"""
+        for node in self._nodes.values():
+            self.canvas.delete(node.tag)
+        self._nodes = {}
+
+    def sync(self, root_container, viewport=None):
+        """
+        Bring the canvas in line with the layout tree.
+
+        If viewport (x1, y1, x2, y2) is given, only nodes intersecting it get
+        canvas items; a container outside the viewport prunes its subtree.
+        """
+        seen = set()
+        created = []  # (item, item drawn just before it)
+        needs_restack = False
+        previous = None
+
+        stack = [(root_container, 0, 0)]
+        while stack:
+            item, parent_x, parent_y = stack.pop()
+            if viewport is not None and not self._is_visible(item, parent_x, parent_y, viewport):
+                # Items left over from an earlier viewport are deleted below
+                continue
+            seen.add(item)
+
+            node = self._nodes.get(item)
+            if node is not None and node.parent is not item.parent:
+                # Re-parented subtrees are recreated to stack above their new siblings
+                self._forget_subtree(item)
+                node = None
+
+            if node is not None:
+                self._update(item, parent_x, parent_y)
+                # Items created earlier in this pass now sit above this one
+                if created:
+                    needs_restack = True
+            else:
+                self._create(item, parent_x, parent_y)
+                created.append((item, previous))
+            previous = item
+
+            if isinstance(item, Container):
+                x = parent_x + item.x
+                y = parent_y + item.y
+                for child in reversed(item.children):
+                    stack.append((child, x, y))
+
+        for item in [item for item in self._nodes if item not in seen]:
+            self.canvas.delete(self._nodes.pop(item).tag)
+
+        if needs_restack:
+            for item, before in created:
+                if before is not None:
+                    self.canvas.tag_raise(self._nodes[item].tag, self._nodes[before].tag)
+
+    def refresh(self, item, parent_x, parent_y, subtree=False):
+        """Update an already drawn node (and optionally its descendants)"""
+        stack = [(item, parent_x, parent_y)]
+        while stack:
+            current, px, py = stack.pop()
+            if current not in self._nodes:
+                continue
+            self._update(current, px, py)
+            if subtree and isinstance(current, Container):
+                x = px + current.x
+                y = py + current.y
+                for child in current.children:
+                    stack.append((child, x, y))
+
+    @staticmethod
+    def _is_visible(item, parent_x, parent_y, viewport):
+        """Check if a node's box intersects the viewport"""
+        x1 = parent_x + item.x
+        y1 = parent_y + item.y
+        x2 = x1 + item.width
+        y2 = y1 + item.height
+        return (min(x1, x2) <= viewport[2] and viewport[0] <= max(x1, x2) and
+                min(y1, y2) <= viewport[3] and viewport[1] <= max(y1, y2))
+
+    def begin_drag(self, item):
+        """Tag the drawn items of a subtree so translate moves them together"""
+        stack = [item]
+        while stack:
+            current = stack.pop()
+            node = self._nodes.get(current)
+            if node is not None:
+                self.canvas.addtag_withtag(self.DRAG_TAG, node.tag)
+            if isinstance(current, Container):
+                stack.extend(current.children)
+
+    def translate(self, dx, dy):
+        """Visually move the dragged subtree without touching the model"""
+        self.canvas.move(self.DRAG_TAG, dx, dy)
+
+    def end_drag(self):
+        """Remove the temporary drag tag again"""
+        self.canvas.dtag(self.DRAG_TAG)
+
+    def commit_translation(self, item, dx, dy):
+        """Record that a translated subtree now matches the model again"""
+        stack = [item]
+        while stack:
+            current = stack.pop()
+            node = self._nodes.get(current)
+            if node is not None:
+                state = node.state
+                node.state = (state[0] + dx, state[1] + dy) + state[2:]
+            if isinstance(current, Container):
+                stack.extend(current.children)
+
+    def _forget_subtree(self, item):
+        """Delete the canvas items of a subtree so it gets recreated"""
+        stack = [item]
+        while stack:
+            current = stack.pop()
+            node = self._nodes.pop(current, None)
+            if node is not None:
+                self.canvas.delete(node.tag)
+            if isinstance(current, Container):
+                stack.extend(current.children)
+
+    def _state(self, item, x, y):
+        """Build the tuple of everything that affects how a node looks"""
+        selected = item is self.selected_item
+        if isinstance(item, Container):
+            return (x, y, item.width, item.height, item.name, item.orientation, selected)
+        return (x, y, item.width, item.height, item.element_type, item.name, selected)
+
+    def _outline(self, item, selected):
+        """Get the outline colour of a node"""
+        if selected:
+            return self.selected_color
+        if isinstance(item, Container):
+            if item.orientation == "horizontal":
+                return self.container_horizontal_color
+            return self.container_color
+        return self.element_color
+
+    def _create(self, item, parent_x, parent_y):
+        """Create the canvas items for a node"""
+        x = parent_x + item.x
+        y = parent_y + item.y
+        state = self._state(item, x, y)
+        tag = f"item_{id(item)}"
+        selected = state[-1]
+        canvas = self.canvas
+
+        if isinstance(item, Container):
+            rect = canvas.create_rectangle(
+                x, y, x + item.width, y + item.height,
+                outline=self._outline(item, selected),
+                width=3,
+                fill="",
+                tags=("container", tag)
+            )
+            label = canvas.create_text(
+                x + 5, y + 5,
+                text=f"{item.name} ({item.orientation})",
+                anchor="nw",
+                fill="white",
+                font=("Arial", 10, "bold"),
+                tags=("label", tag)
+            )
+            node = _SceneNode(tag, (rect, label), state, item.parent)
+        else:
+            rect = canvas.create_rectangle(
+                x, y, x + item.width, y + item.height,
+                outline=self._outline(item, selected),
+                width=2,
+                fill="#34495e",
+                tags=("element", tag)
+            )
+            type_text = canvas.create_text(
+                x + item.width / 2, y + item.height / 2 - 8,
+                text=item.element_type,
+                fill="white",
+                font=("Arial", 9, "bold"),
+                tags=("label", tag)
+            )
+            name_text = canvas.create_text(
+                x + item.width / 2, y + item.height / 2 + 8,
+                text=item.name,
+                fill="#bdc3c7",
+                font=("Arial", 8),
+                tags=("label", tag)
+            )
+            node = _SceneNode(tag, (rect, type_text, name_text), state, item.parent)
+            if selected:
+                self._create_handle(node, item, x, y)
+
+        self._nodes[item] = node
+
+    def _update(self, item, parent_x, parent_y):
+        """Apply only the changes between the drawn and current state"""
+        node = self._nodes[item]
+        x = parent_x + item.x
+        y = parent_y + item.y
+        state = self._state(item, x, y)
+        old = node.state
+        if state == old:
+            return
+
+        canvas = self.canvas
+        geometry_changed = state[:4] != old[:4]
+        selected = state[-1]
+
+        if isinstance(item, Container):
+            rect, label = node.ids
+            if geometry_changed:
+                canvas.coords(rect, x, y, x + item.width, y + item.height)
+                canvas.coords(label, x + 5, y + 5)
+            if state[4:6] != old[4:6]:
+                canvas.itemconfig(label, text=f"{item.name} ({item.orientation})")
+            if state[5:] != old[5:]:
+                canvas.itemconfig(rect, outline=self._outline(item, selected))
+        else:
+            rect, type_text, name_text = node.ids
+            if geometry_changed:
+                center_x = x + item.width / 2
+                center_y = y + item.height / 2
+                canvas.coords(rect, x, y, x + item.width, y + item.height)
+                canvas.coords(type_text, center_x, center_y - 8)
+                canvas.coords(name_text, center_x, center_y + 8)
+            if state[4] != old[4]:
+                canvas.itemconfig(type_text, text=item.element_type)
+            if state[5] != old[5]:
+                canvas.itemconfig(name_text, text=item.name)
+            if selected != old[-1]:
+                canvas.itemconfig(rect, outline=self._outline(item, selected))
+                if selected:
+                    self._create_handle(node, item, x, y)
+                elif node.handle is not None:
+                    canvas.delete(node.handle)
+                    node.handle = None
+            elif selected and geometry_changed:
+                size = self.resize_handle_size
+                handle_x = x + item.width - size
+                handle_y = y + item.height - size
+                canvas.coords(node.handle, handle_x, handle_y, handle_x + size, handle_y + size)
+
+        node.state = state
+
+    def _create_handle(self, node, element, x, y):
+        """Draw the resize handle of the selected element"""
+        size = self.resize_handle_size
+        handle_x = x + element.width - size
+        handle_y = y + element.height - size
+        node.handle = self.canvas.create_rectangle(
+            handle_x, handle_y,
+            handle_x + size,
+            handle_y + size,
+            fill=self.selected_color,
+            outline="white",
+            width=1,
+            tags=("resize_handle", f"handle_{id(element)}", node.tag)
+        )
+        # Keep the handle just above the element body, below its labels
+        self.canvas.tag_raise(node.handle, node.ids[0])
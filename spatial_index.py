@@ -0,0 +1,296 @@
+"""
+Spatial index for fast hit-testing of UI elements and containers
+"""
+
+from ui_elements import Container
+
+
+def absolute_bbox(item):
+    """Get the normalized absolute bounding box (x1, y1, x2, y2) of an item"""
+    x1, y1, x2, y2 = item.absolute_bbox()
+    return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+
+def _depth_of(item):
+    """Get the nesting depth of an item (root is 0)"""
+    depth = 0
+    current = item.parent
+    while current:
+        depth += 1
+        current = current.parent
+    return depth
+
+
+def _contains_box(bounds, bbox):
+    """Check if bounds fully contain bbox"""
+    return (bounds[0] <= bbox[0] and bounds[1] <= bbox[1] and
+            bbox[2] <= bounds[2] and bbox[3] <= bounds[3])
+
+
+def _contains_point(bbox, x, y):
+    """Check if a bounding box contains a point (edges inclusive)"""
+    return bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+
+
+def _intersects(bbox, rect):
+    """Check if two boxes overlap (edges inclusive)"""
+    return (bbox[0] <= rect[2] and rect[0] <= bbox[2] and
+            bbox[1] <= rect[3] and rect[1] <= bbox[3])
+
+
+class _Entry:
+    """An indexed item together with its cached bounding box"""
+
+    __slots__ = ("item", "bbox", "depth", "node")
+
+    def __init__(self, item, bbox, depth):
+        self.item = item
+        self.bbox = bbox
+        self.depth = depth
+        self.node = None
+
+    @property
+    def area(self):
+        return (self.bbox[2] - self.bbox[0]) * (self.bbox[3] - self.bbox[1])
+
+
+class _QuadNode:
+    """A single quadtree cell; its loose bounds reach half its size beyond it"""
+
+    __slots__ = ("bounds", "loose", "depth", "entries", "children")
+
+    def __init__(self, bounds, depth):
+        self.bounds = bounds
+        x1, y1, x2, y2 = bounds
+        dx = (x2 - x1) / 2
+        dy = (y2 - y1) / 2
+        self.loose = (x1 - dx, y1 - dy, x2 + dx, y2 + dy)
+        self.depth = depth
+        self.entries = {}  # Used as an ordered set of _Entry objects
+        self.children = None
+
+    def split(self):
+        """Create the four child quadrants"""
+        x1, y1, x2, y2 = self.bounds
+        mx = (x1 + x2) / 2
+        my = (y1 + y2) / 2
+        depth = self.depth + 1
+        self.children = [
+            _QuadNode((x1, y1, mx, my), depth),
+            _QuadNode((mx, y1, x2, my), depth),
+            _QuadNode((x1, my, mx, y2), depth),
+            _QuadNode((mx, my, x2, y2), depth),
+        ]
+
+    def child_for(self, bbox):
+        """Get the child quadrant holding bbox's centre if its loose bounds contain bbox"""
+        x1, y1, x2, y2 = self.bounds
+        index = ((bbox[0] + bbox[2] >= x1 + x2) + 2 * (bbox[1] + bbox[3] >= y1 + y2))
+        child = self.children[index]
+        return child if _contains_box(child.loose, bbox) else None
+
+
+class SpatialIndex:
+    """
+    Loose quadtree over the absolute bounding boxes of containers and elements.
+
+    Every item is stored in the smallest quadrant that holds its centre and
+    is at least as large as the item. Quadrants are searched by their loose
+    bounds, which reach half their size beyond them, so an item lying across
+    a midline goes down the tree like any other; only items larger than a
+    quadrant stay above it. Point queries visit at most four cells per level.
+    The index has no GUI dependencies and can be used headlessly.
+    """
+
+    MAX_ENTRIES = 8
+    MAX_DEPTH = 16
+
+    def __init__(self, bounds=(0, 0, 2048, 2048)):
+        self._root = _QuadNode(tuple(bounds), 0)
+        self._entries = {}  # item -> _Entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def clear(self):
+        """Remove every item from the index"""
+        self._root = _QuadNode(self._root.bounds, 0)
+        self._entries = {}
+
+    def rebuild(self, root_container):
+        """Clear the index and add a whole tree"""
+        self.clear()
+        self.insert_subtree(root_container)
+
+    def insert(self, item):
+        """Add a single item, or refresh it if already indexed"""
+        if item in self._entries:
+            self.remove(item)
+
+        entry = _Entry(item, absolute_bbox(item), _depth_of(item))
+        self._entries[item] = entry
+        self._place(entry)
+
+    def insert_subtree(self, item):
+        """Add an item and all of its descendants"""
+        stack = [item]
+        while stack:
+            current = stack.pop()
+            self.insert(current)
+            if isinstance(current, Container):
+                stack.extend(current.children)
+
+    def remove(self, item):
+        """Remove a single item from the index"""
+        entry = self._entries.pop(item, None)
+        if entry is not None:
+            entry.node.entries.pop(entry, None)
+
+    def remove_subtree(self, item):
+        """Remove an item and all of its descendants"""
+        stack = [item]
+        while stack:
+            current = stack.pop()
+            self.remove(current)
+            if isinstance(current, Container):
+                stack.extend(current.children)
+
+    def update(self, item):
+        """Refresh an item after it was moved or resized"""
+        self.insert(item)
+
+    def update_subtree(self, item):
+        """Refresh an item and its descendants after the item moved"""
+        self.insert_subtree(item)
+
+    def bbox(self, item):
+        """Get the indexed bounding box of an item"""
+        entry = self._entries.get(item)
+        return entry.bbox if entry else None
+
+    def query_point(self, x, y):
+        """Get all items whose bounding box contains the point"""
+        return [entry.item for entry in self._point_entries(x, y)]
+
+    def query_rect(self, rect):
+        """Get all items whose bounding box intersects rect (x1, y1, x2, y2)"""
+        result = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for entry in node.entries:
+                if _intersects(entry.bbox, rect):
+                    result.append(entry.item)
+            if node.children:
+                for child in node.children:
+                    if _intersects(child.loose, rect):
+                        stack.append(child)
+        return result
+
+    def item_at(self, x, y):
+        """Find the most specific (smallest) item at the point"""
+        return self._smallest(self._point_entries(x, y))
+
+    def container_at(self, x, y):
+        """Find the deepest (smallest) container at the point"""
+        return self._smallest(
+            entry for entry in self._point_entries(x, y)
+            if isinstance(entry.item, Container)
+        )
+
+    def _smallest(self, entries):
+        """Pick the entry with the smallest area, preferring deeper items"""
+        best = None
+        best_key = None
+        for entry in entries:
+            key = (entry.area, -entry.depth)
+            if best is None or key < best_key:
+                best = entry
+                best_key = key
+        return best.item if best else None
+
+    def _point_entries(self, x, y):
+        """Collect the entries containing the point"""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for entry in node.entries:
+                if _contains_point(entry.bbox, x, y):
+                    found.append(entry)
+            if node.children:
+                # Loose bounds overlap, so a point can be in several quadrants
+                for child in node.children:
+                    if _contains_point(child.loose, x, y):
+                        stack.append(child)
+        return found
+
+    def _place(self, entry):
+        """Store an entry in the smallest quadrant that takes it"""
+        if not _contains_box(self._root.bounds, entry.bbox):
+            self._grow(entry.bbox)
+
+        node = self._root
+        if _contains_box(node.bounds, entry.bbox):  # Unless _grow gave up on it
+            while node.children:
+                child = node.child_for(entry.bbox)
+                if child is None:
+                    break
+                node = child
+
+        node.entries[entry] = None
+        entry.node = node
+
+        if (node.children is None and len(node.entries) > self.MAX_ENTRIES
+                and node.depth < self.MAX_DEPTH):
+            self._split(node)
+
+    def _split(self, node):
+        """Subdivide a crowded leaf and push its entries down"""
+        node.split()
+        entries = list(node.entries)
+        node.entries = {}
+        for entry in entries:
+            target = node.child_for(entry.bbox) or node
+            target.entries[entry] = None
+            entry.node = target
+
+        for child in node.children:
+            if len(child.entries) > self.MAX_ENTRIES and child.depth < self.MAX_DEPTH:
+                self._split(child)
+
+    def _grow(self, bbox):
+        """Enlarge the root until it contains bbox"""
+        # Give up on absurd or non-finite coordinates; the root keeps them
+        for _ in range(64):
+            if _contains_box(self._root.bounds, bbox):
+                return
+
+            old_root = self._root
+            x1, y1, x2, y2 = old_root.bounds
+            w = x2 - x1
+            h = y2 - y1
+            grow_left = bbox[0] < x1
+            grow_up = bbox[1] < y1
+            new_x1 = x1 - w if grow_left else x1
+            new_y1 = y1 - h if grow_up else y1
+
+            new_root = _QuadNode((new_x1, new_y1, new_x1 + 2 * w, new_y1 + 2 * h), 0)
+            new_root.split()
+            index = (1 if grow_left else 0) + (2 if grow_up else 0)
+            new_root.children[index] = old_root
+            self._root = new_root
+            self._reset_depths(old_root, 1)
+
+    def _reset_depths(self, node, depth):
+        """Recompute quadrant depths after the root was replaced"""
+        stack = [(node, depth)]
+        while stack:
+            current, current_depth = stack.pop()
+            current.depth = current_depth
+            if current.children:
+                for child in current.children:
+                    stack.append((child, current_depth + 1))
@@ -0,0 +1,339 @@
+"""
+Streaming loader for large project JSON files
+
+Builds the layout tree while the file is being read, so the whole parsed
+document never has to exist as one dict. Objects that fit in the current
+read buffer are decoded with the C JSON scanner; large containers are
+walked token by token with an explicit stack, so nesting depth is not
+limited by the recursion limit.
+"""
+
+import codecs
+import gc
+import json
+import json.decoder
+import json.scanner
+import os
+import re
+
+from ui_elements import UIElement, Container, UILayout
+
+
+CHUNK_SIZE = 1024 * 1024
+
+# Token kinds besides the punctuation characters themselves
+STRING = "string"
+SCALAR = "scalar"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+_CONSTANTS = {"NaN": float("nan"), "Infinity": float("inf"), "-Infinity": float("-inf")}
+
+
+class LoadCancelled(Exception):
+    """Raised when a load is cancelled before it finished"""
+
+
+class _NodeFrame:
+    """A node object that is still being read"""
+
+    __slots__ = ("fields", "children", "members", "in_children", "child_count")
+
+    def __init__(self):
+        self.fields = {}
+        self.children = []
+        self.members = 0
+        self.in_children = False
+        self.child_count = 0
+
+
+def _node_from_dict(data, is_root=False):
+    """Create a container or element from a decoded node dict"""
+    if is_root or data["type"] == "container":
+        return Container.from_dict(data)
+    return UIElement.from_dict(data)
+
+
+def _build_node(frame, is_root):
+    """Create a node from a frame whose children were streamed"""
+    fields = frame.fields
+    if not is_root and fields["type"] != "container":
+        return UIElement.from_dict(fields)
+
+    container = Container.from_dict(fields)
+    for child in frame.children:
+        container.add_child(child)
+    return container
+
+
+class _Reader:
+    """Incremental JSON tokenizer over a binary file"""
+
+    def __init__(self, f, total, chunk_size, progress, cancel):
+        self._file = f
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._scan_once = json.scanner.make_scanner(json.JSONDecoder())
+        self._chunk_size = chunk_size
+        self._progress = progress
+        self._cancel = cancel
+        self._buf = ""
+        self._pos = 0
+        self._offset = 0  # Characters dropped from the front of the buffer
+        self._eof = False
+        self.bytes_read = 0
+        self.total = total
+
+    def _fill(self):
+        """Read another chunk into the buffer; False at end of file"""
+        if self._cancel is not None and self._cancel.is_set():
+            raise LoadCancelled()
+        if self._eof:
+            return False
+
+        data = self._file.read(self._chunk_size)
+        self.bytes_read += len(data)
+        self._eof = not data
+        text = self._decoder.decode(data, final=self._eof)
+        if self._progress is not None:
+            self._progress(self.bytes_read, self.total)
+        if not text:
+            # A chunk can end inside a multi-byte character
+            return not self._eof and self._fill()
+
+        self._offset += self._pos
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def error(self, message):
+        """Raise a ValueError pointing at the current position"""
+        raise ValueError(f"{message} (char {self._offset + self._pos})")
+
+    def next(self):
+        """Read the next token as (kind, value); kind is None at end of file"""
+        while True:
+            buf = self._buf
+            pos = _WHITESPACE.match(buf, self._pos).end()
+            self._pos = pos
+            if pos >= len(buf):
+                if not self._fill():
+                    return None, None
+                continue
+
+            char = buf[pos]
+            if char in "{}[]:,":
+                self._pos = pos + 1
+                return char, None
+
+            if char == '"':
+                try:
+                    value, end = json.decoder.scanstring(buf, pos + 1)
+                except json.JSONDecodeError:
+                    # Most likely the string continues in the next chunk
+                    if self._fill():
+                        continue
+                    raise
+                self._pos = end
+                return STRING, value
+
+            match = _NUMBER.match(buf, pos)
+            if match:
+                # The number may continue in the next chunk ("1" + "2.5e3")
+                if match.end() + 2 >= len(buf) and self._fill():
+                    continue
+                self._pos = match.end()
+                integer, fraction, exponent = match.group(), match.group(1), match.group(2)
+                if fraction or exponent:
+                    return SCALAR, float(integer)
+                return SCALAR, int(integer)
+
+            for word, value in (*_LITERALS.items(), *_CONSTANTS.items()):
+                if buf.startswith(word, pos):
+                    self._pos = pos + len(word)
+                    return SCALAR, value
+            if len(buf) - pos < 9 and self._fill():
+                continue
+            self.error("Expecting value")
+
+    def expect(self, kind):
+        """Read a token and check its kind"""
+        token_kind, value = self.next()
+        if token_kind != kind:
+            self.error(f"Expecting {kind!r}")
+        return value
+
+    def try_object(self):
+        """
+        Decode a whole object at the current position with the C scanner.
+
+        Returns None if the object does not end inside the buffer (or nests
+        too deep for the scanner); the caller then streams it instead.
+        """
+        buf = self._buf
+        pos = _WHITESPACE.match(buf, self._pos).end()
+        if pos >= len(buf) or buf[pos] != "{":
+            return None
+        try:
+            value, end = self._scan_once(buf, pos)
+        except (json.JSONDecodeError, StopIteration, RecursionError):
+            return None
+        self._pos = end
+        return value
+
+    def read_value(self, kind, value):
+        """Read a plain JSON value whose first token was already read"""
+        if kind in (STRING, SCALAR):
+            return value
+        if kind not in ("{", "["):
+            self.error("Expecting value")
+
+        root = {} if kind == "{" else []
+        stack = [root]
+        while stack:
+            current = stack[-1]
+            kind, value = self.next()
+            if isinstance(current, dict):
+                if kind == "}":
+                    stack.pop()
+                    continue
+                if current:
+                    if kind != ",":
+                        self.error("Expecting ',' delimiter")
+                    kind, value = self.next()
+                if kind != STRING:
+                    self.error("Expecting property name enclosed in double quotes")
+                key = value
+                self.expect(":")
+                kind, value = self.next()
+            else:
+                if kind == "]":
+                    stack.pop()
+                    continue
+                if current:
+                    if kind != ",":
+                        self.error("Expecting ',' delimiter")
+                    kind, value = self.next()
+                key = None
+
+            if kind in ("{", "["):
+                value = {} if kind == "{" else []
+                stack.append(value)
+            elif kind not in (STRING, SCALAR):
+                self.error("Expecting value")
+
+            if key is None:
+                current.append(value)
+            else:
+                current[key] = value
+        return root
+
+    def read_node(self, is_root=False):
+        """Read a container/element object and build it"""
+        data = self.try_object()
+        if data is not None:
+            return _node_from_dict(data, is_root)
+
+        self.expect("{")
+        stack = [_NodeFrame()]
+        while True:
+            frame = stack[-1]
+            kind, value = self.next()
+
+            if frame.in_children:
+                if kind == "]":
+                    frame.in_children = False
+                    continue
+                if frame.child_count:
+                    if kind != ",":
+                        self.error("Expecting ',' delimiter")
+                    kind, value = self.next()
+                if kind != "{":
+                    self.error("Expecting object")
+                frame.child_count += 1
+
+                # Put the brace back and try to decode the child in one go
+                self._pos -= 1
+                data = self.try_object()
+                if data is not None:
+                    frame.children.append(_node_from_dict(data))
+                else:
+                    self._pos += 1
+                    stack.append(_NodeFrame())
+                continue
+
+            if kind == "}":
+                node = _build_node(frame, is_root and len(stack) == 1)
+                stack.pop()
+                if not stack:
+                    return node
+                stack[-1].children.append(node)
+                continue
+
+            if frame.members:
+                if kind != ",":
+                    self.error("Expecting ',' delimiter")
+                kind, value = self.next()
+            if kind != STRING:
+                self.error("Expecting property name enclosed in double quotes")
+            key = value
+            self.expect(":")
+            frame.members += 1
+
+            kind, value = self.next()
+            if key == "children" and kind == "[":
+                frame.in_children = True
+                frame.child_count = 0
+            else:
+                frame.fields[key] = self.read_value(kind, value)
+
+
+def load_layout(filename, progress=None, cancel=None, chunk_size=CHUNK_SIZE):
+    """
+    Load a layout from a JSON project file without parsing it into one dict.
+
+    Args:
+        filename: Path of the project file
+        progress: Optional callable(bytes_read, total_bytes), called per chunk
+        cancel: Optional object with is_set() (e.g. threading.Event); the
+            load raises LoadCancelled once it is set
+
+    Returns:
+        UILayout
+    """
+    gc_was_enabled = gc.isenabled()
+    # Building many objects triggers a lot of pointless collections
+    gc.disable()
+    try:
+        with open(filename, "rb") as f:
+            reader = _Reader(f, os.fstat(f.fileno()).st_size, chunk_size, progress, cancel)
+            reader.expect("{")
+            fields = {}
+            root = None
+            while True:
+                kind, value = reader.next()
+                if kind == "}":
+                    break
+                if fields or root is not None:
+                    if kind != ",":
+                        reader.error("Expecting ',' delimiter")
+                    kind, value = reader.next()
+                if kind != STRING:
+                    reader.error("Expecting property name enclosed in double quotes")
+                reader.expect(":")
+                if value == "root_container":
+                    root = reader.read_node(is_root=True)
+                else:
+                    fields[value] = reader.read_value(*reader.next())
+
+            if reader.next()[0] is not None:
+                reader.error("Extra data")
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if root is None:
+        raise KeyError("root_container")
+    layout = UILayout(fields["name"])
+    layout.root_container = root
+    return layout
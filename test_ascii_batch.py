@@ -0,0 +1,77 @@
+"""
+Unit tests for multi-scale ASCII export
+"""
+
+import os
+import tempfile
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from ascii_exporter import ASCIIExporter, export_to_ascii, calculate_optimal_scale
+from ascii_batch import export_ascii_batch, export_to_ascii_batch, resolve_scale
+from layout_fixtures import build_random_layout, build_deep_layout
+
+
+def one_at_a_time(layout, targets, engine="auto"):
+    return [ASCIIExporter(layout, resolve_scale(layout, target), engine).export()
+            for target in targets]
+
+
+class TestBatchExport(unittest.TestCase):
+    """Test that batch output matches exporting each target on its own"""
+
+    TARGETS = [1.0, (120, 60), 0.5, 0.33, (80, 30), 0.05]
+
+    def test_random_layouts(self):
+        """Test random layouts, including nodes off the canvas"""
+        for seed in range(3):
+            layout = build_random_layout(300, seed=seed)
+            layout.root_container.width = 800
+            layout.root_container.height = 500
+            layout.root_container.add_child(UIElement("Button", "Off", -40, -10, 60, 30))
+            self.assertEqual(export_ascii_batch(layout, self.TARGETS),
+                             one_at_a_time(layout, self.TARGETS))
+
+    def test_hidden_subtrees(self):
+        """Test that children of containers too small to draw are skipped"""
+        layout = build_deep_layout(300)
+        targets = [1.0, 0.1, 0.02]
+        self.assertEqual(export_ascii_batch(layout, targets), one_at_a_time(layout, targets))
+
+    def test_list_engine_and_workers(self):
+        """Test the list engine and rendering in worker processes"""
+        layout = build_random_layout(200, seed=7)
+        targets = [0.4, (100, 40)]
+        expected = one_at_a_time(layout, targets, "list")
+        self.assertEqual(export_ascii_batch(layout, targets, engine="list"), expected)
+        self.assertEqual(export_ascii_batch(layout, targets, workers=2), expected)
+
+    def test_files_match_export_to_ascii(self):
+        """Test that written files match export_to_ascii"""
+        layout = UILayout("Docs")
+        panel = Container("Panel", 20, 20, 400, 300)
+        panel.add_child(UIElement("Label", "Title", 10, 10, 200, 40))
+        layout.root_container.add_child(panel)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            outputs = [(os.path.join(tmp, "ide.txt"), (120, 60)),
+                       (os.path.join(tmp, "full.txt"), 1.0)]
+            results = export_to_ascii_batch(layout, outputs)
+            for (filename, target), result in zip(outputs, results):
+                single = os.path.join(tmp, "single.txt")
+                if isinstance(target, tuple):
+                    expected = export_to_ascii(layout, single, None, *target)
+                else:
+                    expected = export_to_ascii(layout, single, target)
+                self.assertEqual(result, expected)
+                with open(filename) as f:
+                    self.assertEqual(f.read(), expected)
+
+    def test_resolve_scale(self):
+        """Test size targets"""
+        layout = UILayout("Sized")
+        self.assertEqual(resolve_scale(layout, 0.25), 0.25)
+        self.assertEqual(resolve_scale(layout, (120, 60)), calculate_optimal_scale(layout, 120, 60))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Unit tests for the ASCII render cache
+"""
+
+import random
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from ascii_exporter import ASCIIExporter
+from ascii_surface import numpy_available
+from layout_fixtures import build_random_layout
+
+if numpy_available():
+    from ascii_cache import ASCIIRenderCache
+
+
+@unittest.skipUnless(numpy_available(), "NumPy is not installed")
+class TestRenderCache(unittest.TestCase):
+    """Test that cached exports match fresh ones and reuse clean subtrees"""
+
+    def setUp(self):
+        self.cache = ASCIIRenderCache()
+
+    def assertMatchesFresh(self, layout, scale):
+        cached = ASCIIExporter(layout, scale, cache=self.cache).export()
+        self.assertEqual(cached, ASCIIExporter(layout, scale, "list").export())
+
+    def test_random_edits(self):
+        """Test a session of random edits against uncached exports"""
+        rng = random.Random(5)
+        layout = build_random_layout(400, seed=2)
+        layout.root_container.width = 900
+        layout.root_container.height = 600
+        nodes = layout.get_all_containers()[1:] + layout.get_all_elements()
+        self.assertMatchesFresh(layout, 0.5)
+
+        for step in range(40):
+            node = rng.choice(nodes)
+            edit = rng.randrange(6)
+            if edit == 0:
+                node.x += rng.randint(-30, 30)
+            elif edit == 1:
+                node.height = max(1, node.height + rng.randint(-20, 20))
+            elif edit == 2:
+                node.name = f"Renamed {step}"
+            elif edit == 3 and isinstance(node, UIElement):
+                node.text = "✓" * rng.randint(0, 12)
+            elif edit == 4 and node.parent is not None:
+                parent = node.parent
+                parent.remove_child(node)
+                parent.add_child(node)  # Now drawn last
+            elif edit == 5:
+                scale = rng.choice((0.5, 0.5, 0.3))
+                self.assertMatchesFresh(layout, scale)
+                continue
+            self.assertMatchesFresh(layout, 0.5)
+
+    def test_only_changed_path_rebuilt(self):
+        """Test that an edit rebuilds just the containers above it"""
+        layout = UILayout("Cached")
+        root = layout.root_container
+        panels = []
+        for i in range(5):
+            panel = Container(f"Panel{i}", 10 + 150 * i, 10, 140, 500)
+            inner = Container(f"Inner{i}", 5, 5, 120, 200)
+            inner.add_child(UIElement("Button", f"B{i}", 5, 5, 100, 30))
+            panel.add_child(inner)
+            root.add_child(panel)
+            panels.append(panel)
+
+        self.assertMatchesFresh(layout, 1.0)
+        self.assertEqual((self.cache.reused, self.cache.rebuilt), (0, 10))
+
+        self.assertMatchesFresh(layout, 1.0)
+        self.assertEqual((self.cache.reused, self.cache.rebuilt), (5, 0))
+
+        layout.find_by_name("B3").text = "Changed"
+        self.assertMatchesFresh(layout, 1.0)
+        self.assertEqual((self.cache.reused, self.cache.rebuilt), (4, 2))
+
+        # Moving a panel moves its inner container on the canvas too
+        panels[1].y = 30
+        self.assertMatchesFresh(layout, 1.0)
+        self.assertEqual((self.cache.reused, self.cache.rebuilt), (4, 2))
+
+    def test_list_engine_rejected(self):
+        """Test that the cache needs the numpy engine"""
+        with self.assertRaises(ValueError):
+            ASCIIExporter(UILayout("X"), 1.0, "list", cache=self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Unit tests for band-by-band ASCII export
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from ascii_exporter import ASCIIExporter, export_to_ascii
+from ascii_surface import ENGINES, BandRecorder, ListSurface
+from layout_fixtures import build_random_layout
+
+
+class TestBandRecorder(unittest.TestCase):
+    """Test filing draw calls under bands"""
+
+    def test_calls_filed_per_band(self):
+        """Test that a call lands in every band it touches and nowhere else"""
+        recorder = BandRecorder(20, 10, 4)
+        recorder.draw_box(0, -3, 5, 6)  # rows -3..5 -> bands 0, 1
+        recorder.draw_text(1, 9, "x", 5)  # row 9 -> band 2
+        recorder.draw_box(0, 12, 5, 20)  # below the canvas
+        self.assertEqual([len(band) for band in recorder.bands], [1, 1, 1])
+
+        surfaces = list(recorder.iter_surfaces(ListSurface))
+        self.assertEqual([(s.top, s.rows) for s in surfaces], [(0, 4), (4, 4), (8, 2)])
+        self.assertEqual(surfaces[2].lines()[1][:2], " x")
+
+    def test_bad_band_rows(self):
+        """Test that empty bands are rejected"""
+        with self.assertRaises(ValueError):
+            BandRecorder(10, 10, 0)
+
+
+class TestStreamingExport(unittest.TestCase):
+    """Test that streaming gives exactly the same text as export()"""
+
+    def test_random_layouts(self):
+        """Test random layouts with several band sizes and every engine"""
+        layout = build_random_layout(300, seed=3)
+        layout.root_container.width = 700
+        layout.root_container.height = 450
+        for engine in ENGINES:
+            if engine == "numpy":
+                try:
+                    import numpy  # noqa: F401
+                except ImportError:
+                    continue
+            for scale in (1.0, 0.37):
+                expected = ASCIIExporter(layout, scale, engine).export()
+                for band_rows in (1, 7, 64, 10000):
+                    exporter = ASCIIExporter(layout, scale, engine)
+                    out = io.StringIO()
+                    exporter.write(out, band_rows)
+                    self.assertEqual(out.getvalue(), expected, f"{engine} {scale} {band_rows}")
+                    self.assertEqual(list(exporter.iter_lines(band_rows)), expected.split("\n"))
+
+    def test_export_to_ascii_stream(self):
+        """Test that the streamed file matches the regular one"""
+        layout = UILayout("Poster")
+        layout.root_container.width, layout.root_container.height = 300, 200
+        panel = Container("Panel", 10, 10, 200, 150)
+        panel.add_child(UIElement("Button", "OK", 20, 100, 60, 30))
+        layout.root_container.add_child(panel)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            regular = os.path.join(tmp, "regular.txt")
+            streamed = os.path.join(tmp, "streamed.txt")
+            text = export_to_ascii(layout, regular, scale_factor=1.0)
+            self.assertIsNone(export_to_ascii(layout, streamed, scale_factor=1.0,
+                                              stream=True, band_rows=16))
+            with open(regular) as a, open(streamed) as b:
+                self.assertEqual(a.read(), b.read())
+            self.assertIn("[BTN] OK", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
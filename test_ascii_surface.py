@@ -0,0 +1,110 @@
+"""
+Unit tests for the ASCII rendering engines
+"""
+
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from ascii_exporter import ASCIIExporter
+from ascii_surface import ListSurface, numpy_available, surface_class
+from layout_fixtures import build_random_layout
+
+
+def export(layout, scale, engine):
+    return ASCIIExporter(layout, scale, engine).export()
+
+
+class TestListSurface(unittest.TestCase):
+    """Test the reference surface"""
+
+    def test_clipping_and_bands(self):
+        """Test that writes outside the surface rows are ignored"""
+        surface = ListSurface(6, 2, top=1)
+        surface.draw_box(-1, 0, 4, 4)
+        surface.draw_text(1, 2, "abcdef", 3)
+        self.assertEqual(surface.lines(), ["   |  ", " ab|  "])
+
+    def test_unknown_engine(self):
+        """Test that a bad engine name is reported"""
+        with self.assertRaises(ValueError):
+            surface_class("fortran")
+
+
+@unittest.skipUnless(numpy_available(), "NumPy is not installed")
+class TestNumpyEngine(unittest.TestCase):
+    """Test that the numpy engine matches the list engine exactly"""
+
+    def assertSameOutput(self, layout, scales=(1.0, 0.5, 0.33, 0.1)):
+        for scale in scales:
+            self.assertEqual(export(layout, scale, "numpy"), export(layout, scale, "list"),
+                             f"scale {scale}")
+
+    def test_random_layouts(self):
+        """Test random nested layouts at several scales"""
+        for seed in range(4):
+            layout = build_random_layout(150, seed=seed)
+            layout.root_container.width = 900
+            layout.root_container.height = 500
+            self.assertSameOutput(layout)
+
+    def test_edge_cases(self):
+        """Test off-canvas boxes, tiny boxes and unusual label characters"""
+        layout = UILayout("Edges")
+        root = layout.root_container
+        root.width, root.height = 70, 45
+        cases = [
+            ("Button", -5, -3, 20, 6, "Negative"),
+            ("Label", 60, 40, 30, 30, "Clipped at the corner"),
+            ("TextBox", 10, 10, 3, 3, "Tiny"),
+            ("Custom", 10, 20, 5, 2, "Flat"),
+            ("Slider", 20, 20, 30, 4, "Ünïcödé ✓ \ud800"),
+            ("Image", 40, 0, 30, 3, "ends in NUL\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"),
+        ]
+        for element_type, x, y, w, h, text in cases:
+            element = UIElement(element_type, text, x, y, w, h)
+            element.text = text
+            root.add_child(element)
+        panel = Container("Panel", 5, 30, 200, 10)
+        panel.add_child(UIElement("Button", "Inside", 1, 1, 15, 3))
+        root.add_child(panel)
+
+        self.assertSameOutput(layout, scales=(1.0, 0.9, 0.5))
+
+    def test_random_boxes_on_bands(self):
+        """Test random boxes, including partly clipped ones, on a band of rows"""
+        import random
+        rng = random.Random(7)
+        numpy_surface = surface_class("numpy")(40, 12, top=5)
+        list_surface = ListSurface(40, 12, top=5)
+        for _ in range(300):
+            x, y = rng.randint(-10, 45), rng.randint(-5, 25)
+            max_x, max_y = x + rng.randint(-2, 30), y + rng.randint(-2, 15)
+            for surface in (numpy_surface, list_surface):
+                surface.draw_box(x, y, max_x, max_y)
+                surface.draw_text(x + 2, y + 1, "label", max_x - 1)
+        self.assertEqual(numpy_surface.lines(), list_surface.lines())
+
+    def test_draw_boxes(self):
+        """Test drawing many overlapping boxes at once against one at a time"""
+        import random
+        rng = random.Random(11)
+        boxes = []
+        for _ in range(400):
+            x, y = rng.randint(-10, 45), rng.randint(-5, 25)
+            max_x, max_y = x + rng.randint(-2, 12), y + rng.randint(-2, 8)
+            text = rng.choice(["", "label", "Ünï ✓", "x" * 20])
+            boxes.append((x, y, max_x, max_y, x + rng.randint(-3, 3), y + rng.randint(-1, 2), text))
+        numpy_surface = surface_class("numpy")(40, 12, top=5)
+        list_surface = ListSurface(40, 12, top=5)
+        numpy_surface.draw_boxes(boxes)
+        for x, y, max_x, max_y, text_x, text_y, text in boxes:
+            list_surface.draw_box(x, y, max_x, max_y)
+            list_surface.draw_text(text_x, text_y, text, max_x - 1)
+        self.assertEqual(numpy_surface.lines(), list_surface.lines())
+
+    def test_auto_engine(self):
+        """Test that auto picks numpy when it is installed"""
+        self.assertEqual(surface_class("auto").__name__, "NumpySurface")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Unit tests for background saves and exports
+"""
+
+import threading
+import time
+import unittest
+from ui_elements import UIElement
+from history import History, Move, SetAttribute, AddNode
+from journal import command_operation
+from background_tasks import TaskRunner
+from layout_fixtures import build_random_layout
+
+try:
+    import tkinter
+    tkinter.Tcl()
+    TCL_AVAILABLE = True
+except Exception:
+    TCL_AVAILABLE = False
+
+
+@unittest.skipUnless(TCL_AVAILABLE, "Tcl is not available")
+class TestTaskRunner(unittest.TestCase):
+    """Test jobs against the worker's copy of the layout, with a Tcl event loop"""
+
+    def setUp(self):
+        self.tcl = tkinter.Tcl()
+        self.layout = build_random_layout(200, seed=9)
+        self.history = History()
+        self.tasks = TaskRunner(self.tcl, poll_interval=5)
+        self.tasks.reset(self.layout)
+        self.history.listeners.append(
+            lambda command, undone: self.tasks.apply(command_operation(command, undone)))
+        self.events = []
+        self.gate = threading.Event()
+
+    def tearDown(self):
+        self.gate.set()
+        self.tasks.shutdown()
+
+    def wait(self):
+        """Run the event loop until every job has reported back"""
+        deadline = time.monotonic() + 10
+        while self.tasks.busy:
+            self.assertLess(time.monotonic(), deadline, "background jobs did not finish")
+            self.tcl.update()
+            time.sleep(0.002)
+
+    def block_worker(self):
+        """Keep the worker busy until self.gate is set"""
+        self.tasks.submit("block", lambda layout, progress: self.gate.wait())
+
+    def edit(self, step):
+        element = self.layout.get_all_elements()[step]
+        old = element.x, element.y
+        element.x += 10
+        self.history.record(Move(element, *old))
+        old_text = element.text
+        element.text = f"edited {step}"
+        self.history.record(SetAttribute(element, "text", old_text))
+        button = UIElement("Button", f"New{step}")
+        self.layout.root_container.add_child(button)
+        self.history.record(AddNode(button))
+        if step % 2:
+            self.history.undo()
+
+    def test_jobs_see_state_at_submission(self):
+        """Test that each job sees the layout as it was when submitted"""
+        self.block_worker()
+        expected = []
+        for step in range(5):
+            self.edit(step)
+            expected.append(self.layout.to_dict())
+            self.tasks.submit(("snapshot", step), lambda layout, progress: layout.to_dict(),
+                              on_done=self.events.append)
+        self.edit(5)  # After the last submission
+        self.gate.set()
+        self.wait()
+        self.assertEqual(self.events, expected)
+
+    def test_superseded_progress_and_errors(self):
+        """Test superseding queued jobs, progress messages and errors on the Tcl thread"""
+        main_thread = threading.get_ident()
+
+        def report(kind):
+            def callback(value):
+                self.assertEqual(threading.get_ident(), main_thread)
+                self.events.append((kind, value))
+            return callback
+
+        def work(name):
+            def run(layout, progress):
+                progress(f"writing {name}")
+                return name
+            return run
+
+        def broken(layout, progress):
+            raise OSError("disk full")
+
+        self.block_worker()
+        self.tasks.submit("save", work("first"), on_done=report("done"))
+        self.tasks.submit("save", work("second"), on_done=report("done"),
+                          on_progress=report("progress"))
+        self.tasks.submit("export", broken, on_error=report("error"))
+        self.gate.set()
+        self.wait()
+
+        self.assertEqual(self.events[:2], [("progress", "writing second"), ("done", "second")])
+        self.assertEqual(self.events[2][0], "error")
+        self.assertIsInstance(self.events[2][1], OSError)
+        self.assertFalse(self.tasks.busy)
+
+    def test_replica_out_of_sync(self):
+        """Test that jobs fail instead of writing a layout whose edits could not be replayed"""
+        self.tasks.apply({"op": "set", "path": [10 ** 6], "values": {"x": 1}})
+        self.tasks.submit("save", lambda layout, progress: None, on_done=self.events.append,
+                          on_error=self.events.append)
+        self.wait()
+        self.assertIsInstance(self.events[0], RuntimeError)
+
+        self.tasks.reset(self.layout)
+        self.tasks.submit("save", lambda layout, progress: layout.to_dict(),
+                          on_done=self.events.append)
+        self.wait()
+        self.assertEqual(self.events[1], self.layout.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
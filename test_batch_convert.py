@@ -0,0 +1,141 @@
+"""
+Unit tests for the headless batch converter
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from ascii_exporter import export_to_ascii
+import batch_convert
+from batch_convert import convert_tree, find_projects, main
+
+
+def make_layout(name):
+    layout = UILayout(name)
+    panel = Container("Panel", 10, 10, 300, 200)
+    button = UIElement("Button", "OK", 20, 20, 100, 30)
+    button.text = "OK"
+    panel.add_child(button)
+    layout.root_container.add_child(panel)
+    return layout
+
+
+class TestBatchConvert(unittest.TestCase):
+    """Test converting a directory tree of projects"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.tmp, "projects")
+        self.output_dir = os.path.join(self.tmp, "out")
+        os.makedirs(os.path.join(self.input_dir, "nested", "deeper"))
+        make_layout("Top").save_to_json(os.path.join(self.input_dir, "top.json"))
+        make_layout("Nested").save_to_binary(os.path.join(self.input_dir, "nested", "bin.uibp"))
+        make_layout("Deep").save_to_json(os.path.join(self.input_dir, "nested", "deeper", "deep.json"))
+        with open(os.path.join(self.input_dir, "nested", "broken.json"), "w") as f:
+            f.write("{not json")
+        self.lines = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def run_tree(self, **options):
+        options.setdefault("workers", 1)
+        return convert_tree(self.input_dir, self.output_dir, report=self.lines.append, **options)
+
+    def test_find_projects(self):
+        """Test that projects are found recursively and hidden files are ignored"""
+        with open(os.path.join(self.input_dir, ".hidden.json"), "w") as f:
+            f.write("{}")
+        self.assertEqual(find_projects(self.input_dir), [
+            os.path.join("nested", "bin.uibp"),
+            os.path.join("nested", "broken.json"),
+            os.path.join("nested", "deeper", "deep.json"),
+            "top.json",
+        ])
+
+    def test_outputs_and_failures(self):
+        """Test outputs match the single-file exports and failures are reported"""
+        result = self.run_tree()
+        self.assertEqual(len(result["converted"]), 3)
+        self.assertEqual(result["failed"], [os.path.join("nested", "broken.json")])
+        self.assertIn("ValueError", result["failures"][os.path.join("nested", "broken.json")])
+        self.assertTrue(any("FAILED" in line for line in self.lines))
+
+        layout = make_layout("Deep")
+        expected_md = os.path.join(self.tmp, "expected.md")
+        expected_txt = os.path.join(self.tmp, "expected.txt")
+        layout.save_to_file(expected_md)
+        export_to_ascii(layout, expected_txt)
+        base = os.path.join(self.output_dir, "nested", "deeper", "deep")
+        for expected, actual in ((expected_md, base + ".md"), (expected_txt, base + ".txt")):
+            with open(expected) as a, open(actual) as b:
+                self.assertEqual(a.read(), b.read())
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "nested", "bin.txt")))
+
+    def test_output_clashes(self):
+        """Test that projects that would write the same outputs are reported, not converted"""
+        make_layout("Twin").save_to_binary(os.path.join(self.input_dir, "top.uibp"))
+        result = self.run_tree()
+        self.assertEqual(result["failed"], [os.path.join("nested", "broken.json"), "top.json", "top.uibp"])
+        self.assertIn("top.uibp", result["failures"]["top.json"])
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "top.md")))
+        self.assertEqual(len(self.run_tree()["failed"]), 3)  # Never recorded as converted
+
+    def test_skips_unchanged(self):
+        """Test mtime/hash skipping, edits, deleted outputs and option changes"""
+        self.run_tree()
+        top = os.path.join(self.input_dir, "top.json")
+
+        result = self.run_tree()
+        self.assertEqual(result["converted"], [])
+        self.assertEqual(len(result["skipped"]), 3)
+        self.assertEqual(len(result["failed"]), 1)  # Failures are retried
+
+        # Touched but identical: skipped by hash
+        stat = os.stat(top)
+        os.utime(top, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.run_tree()["converted"], [])
+
+        # Edited
+        make_layout("Edited").save_to_json(top)
+        self.assertEqual(self.run_tree()["converted"], ["top.json"])
+
+        # Output removed
+        os.remove(os.path.join(self.output_dir, "top.md"))
+        self.assertEqual(self.run_tree()["converted"], ["top.json"])
+
+        # Different options
+        self.assertEqual(len(self.run_tree(scale_factor=0.5)["converted"]), 3)
+        self.assertEqual(len(self.run_tree(scale_factor=0.5, force=True)["converted"]), 3)
+
+    def test_edited_while_converting(self):
+        """Test that a project edited during its conversion is converted again next time"""
+        top = os.path.join(self.input_dir, "top.json")
+        load_project = batch_convert.load_project
+
+        def load_then_edit(path):
+            layout = load_project(path)
+            if path == top:
+                make_layout("Edited meanwhile").save_to_json(top)
+            return layout
+
+        batch_convert.load_project = load_then_edit
+        try:
+            self.assertIn("top.json", self.run_tree()["converted"])
+        finally:
+            batch_convert.load_project = load_project
+        self.assertEqual(self.run_tree()["converted"], ["top.json"])
+
+    def test_process_pool_and_cli(self):
+        """Test converting with worker processes through the command line"""
+        os.remove(os.path.join(self.input_dir, "nested", "broken.json"))
+        status = main([self.input_dir, "--output", self.output_dir, "--workers", "2", "--no-markdown"])
+        self.assertEqual(status, 0)
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "top.txt")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "top.md")))
+
+
+if __name__ == "__main__":
+    unittest.main()
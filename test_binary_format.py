@@ -0,0 +1,91 @@
+"""
+Unit tests for the binary project format
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from ui_elements import UIElement, Container, UILayout
+import binary_format
+from binary_format import dumps, loads, BinaryFormatError
+from layout_fixtures import build_random_layout
+
+
+class TestBinaryFormat(unittest.TestCase):
+    """Test encoding and decoding binary projects"""
+
+    def test_round_trip(self):
+        """Test that decoding gives exactly the same to_dict"""
+        layout = build_random_layout(400, seed=9)
+        element = layout.get_all_elements()[0]
+        element.text = "Ünïcode ✓"
+        element.enabled = False
+        element.properties.update({
+            "items": ["a", "b", 3, -4, 2.5, None, True],
+            "nested": {"type": "container", "depth": {"big": 2 ** 70, "neg": -2 ** 40}},
+        })
+        container = layout.get_all_containers()[1]
+        container.x = 10.5         # Not packable: stored as values
+        container.width = 2 ** 40
+        container.padding = -3
+
+        loaded = loads(dumps(layout))
+        self.assertEqual(loaded.to_dict(), layout.to_dict())
+        self.assertEqual(json.dumps(loaded.to_dict()), json.dumps(layout.to_dict()))
+        self.assertIsInstance(loaded.find_by_name(container.name).x, float)
+        self.assertIs(loaded.find_by_name(element.name).enabled, False)
+
+    def test_smaller_than_json(self):
+        """Test that interning and packing make the file much smaller"""
+        layout = build_random_layout(500, seed=2)
+        json_size = len(json.dumps(layout.to_dict(), indent=2).encode("utf-8"))
+        self.assertLess(len(dumps(layout)) * 4, json_size)
+
+    def test_deep_nesting(self):
+        """Test a tree nested deeper than the recursion limit"""
+        layout = UILayout("Deep")
+        parent = layout.root_container
+        for i in range(3000):
+            child = Container(f"C{i}", 1, 1, 10, 10)
+            parent.add_child(child)
+            parent = child
+        parent.add_child(UIElement("Label", "Leaf"))
+
+        data = dumps(layout)
+        loaded = loads(data)
+        self.assertEqual(loaded.find_by_name("Leaf").absolute_position(), (3000, 3000))
+        self.assertEqual(dumps(loaded), data)
+
+    def test_invalid_data(self):
+        """Test that bad files raise BinaryFormatError"""
+        data = dumps(build_random_layout(20))
+        for bad in (b"", b"{\"name\": 1}", data[:4] + b"\x63" + data[5:], data[:-3], data + b"\x00"):
+            with self.assertRaises(BinaryFormatError):
+                loads(bad)
+
+    def test_save_load_and_convert(self):
+        """Test the file helpers and the JSON converter"""
+        layout = build_random_layout(100, seed=4)
+        directory = tempfile.mkdtemp()
+        json_file = os.path.join(directory, "project.json")
+        binary_file = os.path.join(directory, "project.uibp")
+        back_file = os.path.join(directory, "back.json")
+        try:
+            layout.save_to_json(json_file)
+            binary_format.convert(json_file, binary_file)
+            self.assertTrue(binary_format.is_binary_project(binary_file))
+            self.assertFalse(binary_format.is_binary_project(json_file))
+            self.assertEqual(UILayout.load_from_binary(binary_file).to_dict(), layout.to_dict())
+
+            binary_format.convert(binary_file, back_file)
+            with open(json_file, encoding="utf-8") as a, open(back_file, encoding="utf-8") as b:
+                self.assertEqual(a.read(), b.read())
+        finally:
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+            os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Unit tests for the Tk-free core package
+"""
+
+import subprocess
+import sys
+import unittest
+import mdui_core
+
+
+GUI_MODULES = ("tkinter", "customtkinter", "main", "canvas_view", "properties_panel",
+               "element_palette")
+
+HEADLESS_SCRIPT = """
+import sys
+import mdui_core
+assert not [name for name in mdui_core.__all__ if name in vars(mdui_core)], "eager exports"
+
+layout = mdui_core.UILayout("Headless")
+panel = mdui_core.Container("Panel", 10, 10, 200, 100)
+panel.add_child(mdui_core.UIElement("Button", "OK", 5, 5, 60, 20))
+layout.root_container.add_child(panel)
+text = mdui_core.ASCIIExporter(layout, 0.2, "list").export()
+assert "Button" in text or "OK" in text, text
+"".join(mdui_core.iter_markdown(layout))
+for name in mdui_core.__all__:
+    getattr(mdui_core, name)
+print(" ".join(sorted(sys.modules)))
+"""
+
+
+class TestCoreImports(unittest.TestCase):
+    """Test that the core package stays headless and lazy"""
+
+    def test_exports(self):
+        """Test that every listed name resolves to its module's object"""
+        import ascii_exporter
+        import ui_elements
+        self.assertIs(mdui_core.UILayout, ui_elements.UILayout)
+        self.assertIs(mdui_core.export_to_ascii, ascii_exporter.export_to_ascii)
+        self.assertIn("convert_tree", dir(mdui_core))
+        with self.assertRaises(AttributeError):
+            mdui_core.MainWindow
+
+    def test_no_gui_or_heavy_imports(self):
+        """Test that using the whole core loads no GUI, NumPy or multiprocessing modules"""
+        result = subprocess.run([sys.executable, "-c", HEADLESS_SCRIPT],
+                                capture_output=True, text=True, check=True)
+        loaded = set(result.stdout.split())
+        self.assertIn("ascii_exporter", loaded)
+        for name in GUI_MODULES + ("numpy", "multiprocessing", "concurrent.futures"):
+            self.assertNotIn(name, loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Unit tests for the columnar geometry arrays
+"""
+
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from layout_fixtures import build_random_layout
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    import geometry
+
+
+def iter_nodes(root):
+    """Yield every node in pre-order"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, Container):
+            stack.extend(reversed(node.children))
+
+
+@unittest.skipUnless(np is not None, "NumPy is not installed")
+class TestGeometryArrays(unittest.TestCase):
+    """Test flattening and writing back layout geometry"""
+
+    def setUp(self):
+        self.layout = UILayout("Geometry")
+        root = self.layout.root_container
+        self.panel = Container("Panel", 100, 50, 400, 300)
+        self.button = UIElement("Button", "Ok", 10, 20, 80, 30)
+        self.custom = UIElement("Gauge", "Gauge", 5, 5, 40, 40)
+        self.panel.add_child(self.button)
+        root.add_child(self.panel)
+        root.add_child(self.custom)
+
+    def test_flatten(self):
+        """Test IDs, parents, types and boxes of a small layout"""
+        arrays = self.layout.geometry_arrays()
+        root = self.layout.root_container
+
+        self.assertEqual(arrays.nodes, [root, self.panel, self.button, self.custom])
+        self.assertEqual(arrays.ids.tolist(), [0, 1, 2, 3])
+        self.assertEqual(arrays.parent.tolist(), [-1, 0, 1, 0])
+        self.assertEqual(arrays.type_code.tolist(), [
+            geometry.CONTAINER_TYPE_CODE,
+            geometry.CONTAINER_TYPE_CODE,
+            geometry.TYPE_CODES["Button"],
+            geometry.UNKNOWN_TYPE_CODE,
+        ])
+        self.assertEqual(arrays.abs_x.tolist(), [0, 100, 110, 5])
+        self.assertEqual(arrays.abs_y.tolist(), [0, 50, 70, 5])
+        self.assertEqual(arrays.boxes()[2].tolist(), [110, 70, 190, 100])
+        self.assertEqual(arrays.boxes(absolute=False)[2].tolist(), [10, 20, 90, 50])
+
+    def test_matches_random_layout(self):
+        """Test that the arrays agree with the nodes on a larger layout"""
+        layout = build_random_layout(500, seed=7)
+        arrays = layout.geometry_arrays()
+        nodes = list(iter_nodes(layout.root_container))
+
+        self.assertEqual(arrays.nodes, nodes)
+        for i, node in enumerate(nodes):
+            self.assertEqual((arrays.abs_x[i], arrays.abs_y[i]), node.absolute_position())
+            parent_index = arrays.parent[i]
+            expected_parent = nodes[parent_index] if parent_index >= 0 else None
+            self.assertIs(node.parent, expected_parent)
+
+    def test_translate_write_back(self):
+        """Test translating everything moves only the root relatively"""
+        arrays = self.layout.geometry_arrays()
+        geometry.translate(arrays, 30, -10)
+        self.layout.apply_geometry(arrays)
+
+        root = self.layout.root_container
+        self.assertEqual((root.x, root.y), (30, -10))
+        self.assertEqual((self.panel.x, self.panel.y), (100, 50))
+        self.assertEqual(self.button.absolute_position(), (140, 60))
+
+    def test_scale_write_back(self):
+        """Test scaling positions and sizes"""
+        arrays = self.layout.geometry_arrays()
+        geometry.scale(arrays, 0.5)
+        self.layout.apply_geometry(arrays)
+
+        self.assertEqual((self.panel.x, self.panel.y), (50, 25))
+        self.assertEqual((self.panel.width, self.panel.height), (200, 150))
+        self.assertEqual((self.button.x, self.button.y), (5, 10))
+        self.assertEqual((self.button.width, self.button.height), (40, 15))
+        self.assertIsInstance(self.button.x, int)
+        self.assertEqual(self.button.absolute_position(), (55, 35))
+
+    def test_clamp(self):
+        """Test clamping boxes into bounds"""
+        arrays = self.layout.geometry_arrays()
+        geometry.clamp(arrays, (0, 0, 150, 120))
+        self.layout.apply_geometry(arrays)
+
+        self.assertEqual((self.panel.width, self.panel.height), (150, 120))
+        self.assertEqual(self.panel.absolute_position(), (0, 0))
+        self.assertEqual(self.button.absolute_position(), (70, 70))
+
+    def test_relative_write_back(self):
+        """Test writing relative positions and refreshing absolute ones"""
+        arrays = self.layout.geometry_arrays()
+        arrays.x[1] += 20
+        self.layout.apply_geometry(arrays, absolute=False)
+
+        self.assertEqual(self.panel.x, 120)
+        self.assertEqual(arrays.abs_x.tolist(), [0, 120, 130, 5])
+        self.assertEqual(self.button.absolute_position(), (130, 70))
+
+    def test_float_write_back(self):
+        """Test keeping fractional values when integer=False"""
+        arrays = self.layout.geometry_arrays()
+        geometry.scale(arrays, 0.25)
+        self.layout.apply_geometry(arrays, integer=False)
+
+        self.assertEqual(self.button.width, 20.0)
+        self.assertEqual(self.panel.y, 12.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
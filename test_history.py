@@ -0,0 +1,162 @@
+"""
+Unit tests for the undo/redo history
+"""
+
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from history import (History, Command, SetAttribute, Move, Resize, SetProperties, AddNode,
+                     RemoveNode, MISSING)
+from layout_fixtures import build_random_layout
+
+
+class TestHistory(unittest.TestCase):
+    """Test recording, undoing and redoing changes"""
+
+    def setUp(self):
+        self.layout = build_random_layout(200, seed=3)
+        self.root = self.layout.root_container
+        self.history = History()
+        self.original = self.layout.to_dict()
+
+    def some_nodes(self, kind):
+        return [node for node in self.layout.get_all_containers() + self.layout.get_all_elements()
+                if isinstance(node, kind) and node is not self.root]
+
+    def assertRoundTrip(self, changed):
+        """Undo everything back to the original, then redo back to the changed state"""
+        while self.history.undo():
+            pass
+        self.assertEqual(self.layout.to_dict(), self.original)
+        while self.history.redo():
+            pass
+        self.assertEqual(self.layout.to_dict(), changed)
+
+    def test_attribute_commands(self):
+        """Test moves, resizes, attribute and custom property changes"""
+        container = self.some_nodes(Container)[0]
+        element = self.some_nodes(UIElement)[0]
+
+        old = container.x, container.y
+        container.x, container.y = 7, 9
+        self.history.record(Move(container, *old))
+
+        old = element.width, element.height
+        element.width, element.height = 55, 66
+        self.history.record(Resize(element, *old))
+
+        old_name = element.name
+        element.name = "Renamed"
+        self.history.record(SetAttribute(element, "name", old_name))
+
+        old_text = element.text
+        element.text = "Hello"
+        self.history.record(SetAttribute(element, "text", old_text))
+
+        element.set_property("style", "primary")
+        self.history.record(SetProperties(element, {"style": MISSING}))
+
+        self.assertRoundTrip(self.layout.to_dict())
+        self.assertIs(self.layout.find_by_name("Renamed"), element)
+        self.history.undo()
+        self.history.undo()
+        self.history.undo()
+        self.assertIs(self.layout.find_by_name(old_name), element)
+        self.assertIsNone(self.layout.find_by_name("Renamed"))
+
+    def test_subtree_commands(self):
+        """Test adding, removing and pasting subtrees at their original positions"""
+        container = max(self.some_nodes(Container), key=lambda node: len(node.children))
+        parent = container.parent
+        index = parent.children.index(container)
+        parent.remove_child(container)
+        self.history.record(RemoveNode(container, parent, index))
+
+        first = self.root.children[0]
+        new_panel = Container("Pasted", 10, 10, 100, 100)
+        new_panel.add_child(UIElement("Button", "PastedButton"))
+        first_parent = first.parent
+        first_parent.add_child(new_panel)
+        self.history.record(AddNode(new_panel, "Paste"))
+
+        changed = self.layout.to_dict()
+        self.assertRoundTrip(changed)
+        self.assertIs(self.layout.find_by_name("PastedButton").parent, new_panel)
+
+        self.history.undo()
+        self.history.undo()
+        self.assertIs(parent.children[index], container)
+        self.assertIsNone(self.layout.find_by_name("PastedButton"))
+        self.assertIs(self.layout.find_by_name(container.name), container)
+
+    def test_revisions(self):
+        """Test that undo marks the changed node and its ancestors as changed"""
+        from ui_elements import advance_revisions
+        element = self.some_nodes(UIElement)[0]
+        old = element.x, element.y
+        element.x += 5
+        self.history.record(Move(element, *old))
+        advance_revisions()
+        before = self.root.revision, element.revision
+        self.history.undo()
+        self.assertNotEqual((self.root.revision, element.revision), before)
+
+    def test_merging(self):
+        """Test that drags and typing become single entries until sealed"""
+        element = self.some_nodes(UIElement)[0]
+        start = element.width, element.height
+        for step in range(1, 20):
+            old = element.width, element.height
+            element.width, element.height = start[0] + step, start[1] + step
+            self.history.record(Resize(element, *old), merge=True)
+        self.history.seal()
+        for text in ("H", "He", "Hel"):
+            old = element.text
+            element.text = text
+            self.history.record(SetAttribute(element, "text", old), merge=True)
+
+        self.assertEqual(len(self.history), 2)
+        self.history.undo()
+        self.assertEqual(element.text, "")
+        self.history.undo()
+        self.assertEqual((element.width, element.height), start)
+
+        # Different attributes are separate entries
+        self.history.record(SetAttribute(element, "x", element.x), merge=True)
+        self.history.record(SetAttribute(element, "y", element.y), merge=True)
+        self.assertEqual(len(self.history), 2)
+        self.assertFalse(self.history.can_redo)
+
+    def test_incomplete_command(self):
+        """Test that a command without undo/redo cannot be created"""
+        class NoRedo(Command):
+            __slots__ = ()
+
+            def undo(self):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoRedo(self.root, "Broken")
+
+    def test_memory_budget(self):
+        """Test that the oldest entries are evicted once the budget is exceeded"""
+        element = self.some_nodes(UIElement)[0]
+        self.history.budget = 20000
+        for i in range(500):
+            old = element.x, element.y
+            element.x = i
+            self.history.record(Move(element, *old))
+        self.assertLessEqual(self.history.size, self.history.budget)
+        self.assertLess(len(self.history), 500)
+        while self.history.undo():
+            pass
+        self.assertGreater(element.x, 0)  # The oldest moves were forgotten
+
+        # A single entry larger than the budget is still kept
+        self.history.budget = 1
+        self.history.record(RemoveNode(element, element.parent, 0))
+        self.assertEqual(len(self.history), 1)
+        self.assertEqual(self.history.size, self.history.peek_undo().size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""
+Unit tests for the autosave journal and crash recovery
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from history import History, Move, SetAttribute, SetProperties, AddNode, RemoveNode, MISSING
+from journal import Journal, recover, has_journal, journal_path, autosave_path, write_snapshot
+from layout_fixtures import build_random_layout
+
+
+class TestJournal(unittest.TestCase):
+    """Test journaling edits and replaying them after a crash"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.project = os.path.join(self.tmp, "design.json")
+        self.layout = build_random_layout(150, seed=5)
+        self.layout.save_to_json(self.project)
+        self.history = History()
+        self.journal = Journal(self.project, batch_size=4)
+        self.journal.start(self.layout)
+        self.history.listeners.append(self.journal.record)
+
+    def tearDown(self):
+        self.journal.close(clean=False)
+        shutil.rmtree(self.tmp)
+
+    def edit(self, seed):
+        """Make a mix of recorded edits, undos and redos"""
+        root = self.layout.root_container
+        element = self.layout.get_all_elements()[seed]
+        container = self.layout.get_all_containers()[seed % 5 + 1]
+
+        old = element.x, element.y
+        element.x, element.y = element.x + 3, element.y + 4
+        self.history.record(Move(element, *old))
+        for text in ("a", "ab", "abc"):
+            old_text = element.text
+            element.text = text
+            self.history.record(SetAttribute(element, "text", old_text), merge=True)
+        element.set_property("style", "primary")
+        self.history.record(SetProperties(element, {"style": MISSING}))
+
+        panel = Container(f"Added{seed}", 5, 5, 50, 50)
+        panel.add_child(UIElement("Button", f"AddedButton{seed}"))
+        root.insert_child(1, panel)
+        self.history.record(AddNode(panel, "Paste"))
+
+        parent = container.parent
+        index = parent.children.index(container)
+        parent.remove_child(container)
+        self.history.record(RemoveNode(container, parent, index))
+
+        self.history.undo()
+        self.history.undo()
+        self.history.redo()
+
+    def crash(self):
+        """Stop without a clean close and get the recovered layout"""
+        self.journal.sync()
+        self.assertTrue(has_journal(self.project))
+        layout, replayed = recover(self.project)
+        return layout
+
+    def test_replay(self):
+        """Test that replaying the journal rebuilds the edited layout"""
+        self.edit(3)
+        self.edit(7)
+        self.assertEqual(self.crash().to_dict(), self.layout.to_dict())
+
+    def test_torn_tail(self):
+        """Test that a partly written last line is ignored"""
+        self.edit(3)
+        expected = self.layout.to_dict()
+        self.journal.sync()
+        with open(journal_path(self.project), "a") as f:
+            f.write('{"op":"set","path":[0],"val')
+        self.assertEqual(self.crash().to_dict(), expected)
+
+    def test_compaction(self):
+        """Test snapshots, including a compaction interrupted after the snapshot"""
+        self.edit(3)
+        self.journal.compact(self.layout)
+        with open(journal_path(self.project)) as f:
+            self.assertEqual(len(f.read().splitlines()), 1)
+        self.edit(7)
+        self.assertEqual(self.crash().to_dict(), self.layout.to_dict())
+
+        # Snapshot written, journal not restarted yet
+        token = self.journal.begin_compaction()
+        write_snapshot(token, UILayout.from_dict(self.layout.to_dict()))
+        self.edit(9)
+        self.assertEqual(self.crash().to_dict(), self.layout.to_dict())
+
+    def test_background_compaction(self):
+        """Test compacting from a copy while edits go on, and snapshots made stale by a save"""
+        self.edit(3)
+        token = self.journal.begin_compaction()
+        self.assertTrue(self.journal.compacting)
+        copy = UILayout.from_dict(self.layout.to_dict())  # The worker's replica
+        sequence = self.journal.sequence
+        self.edit(7)  # While the snapshot is written
+        self.assertTrue(self.journal.finish_compaction(token, write_snapshot(token, copy)))
+        self.assertEqual(self.journal.operations, self.journal.sequence - sequence)
+        self.assertEqual(self.crash().to_dict(), self.layout.to_dict())
+
+        token = self.journal.begin_compaction()
+        copy = UILayout.from_dict(self.layout.to_dict())
+        mark = self.journal.mark()
+        self.layout.save_to_json(self.project)
+        self.journal.rebase(mark, self.layout)
+        self.edit(9)
+        self.assertFalse(self.journal.finish_compaction(token, write_snapshot(token, copy)))
+        self.assertFalse(self.journal.compacting)
+        self.assertEqual(self.crash().to_dict(), self.layout.to_dict())
+
+    def test_untitled_and_stale(self):
+        """Test untitled work and journals whose project file was replaced"""
+        untitled = os.path.join(self.tmp, "untitled.json")
+        layout = UILayout("Untitled")
+        journal = Journal(untitled)
+        journal.start(layout)
+        history = History()
+        history.listeners.append(journal.record)
+        button = UIElement("Button", "OK")
+        layout.root_container.add_child(button)
+        history.record(AddNode(button))
+        journal.close(clean=False)
+        self.assertEqual(recover(untitled)[0].to_dict(), layout.to_dict())
+
+        self.edit(3)
+        self.journal.sync()
+        UILayout("Other").save_to_json(self.project)
+        os.utime(self.project, ns=(0, 0))
+        self.assertIsNone(recover(self.project))
+
+    def test_rebase_after_background_save(self):
+        """Test that edits made while a save ran survive rebasing onto the saved file"""
+        self.edit(3)
+        mark = self.journal.mark()
+        saved = UILayout.from_dict(self.layout.to_dict())  # What the worker writes
+        self.edit(7)  # While the save runs
+        other = os.path.join(self.tmp, "copy.json")
+        saved.save_to_json(other)
+        self.journal.rebase(mark, self.layout, other)
+
+        self.assertFalse(has_journal(self.project))
+        self.assertEqual(recover(other)[0].to_dict(), self.layout.to_dict())
+
+        # Compacted in between: the state so far becomes a snapshot
+        mark = self.journal.mark()
+        saved = UILayout.from_dict(self.layout.to_dict())
+        self.edit(8)
+        self.journal.compact(self.layout)
+        self.edit(9)
+        saved.save_to_json(other)
+        self.journal.rebase(mark, self.layout)
+        self.assertEqual(recover(other)[0].to_dict(), self.layout.to_dict())
+
+        # Two saves in a row: the second rebases onto the journal the first restarted
+        first = self.journal.mark()
+        saved_first = UILayout.from_dict(self.layout.to_dict())
+        self.edit(11)
+        second = self.journal.mark()
+        saved_second = UILayout.from_dict(self.layout.to_dict())
+        self.edit(13)
+        saved_first.save_to_json(other)
+        self.journal.rebase(first, self.layout)
+        saved_second.save_to_json(other)
+        os.utime(other, ns=(1, 1))  # A distinct stat even within the mtime resolution
+        self.journal.rebase(second, self.layout)
+        self.assertEqual(recover(other)[0].to_dict(), self.layout.to_dict())
+
+    def test_clean_close(self):
+        """Test that a clean close leaves nothing to recover"""
+        self.edit(3)
+        self.journal.compact(self.layout)
+        self.journal.close()
+        self.assertFalse(has_journal(self.project))
+        self.assertFalse(os.path.exists(autosave_path(self.project)))
+        self.assertIsNone(recover(self.project))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Unit tests for the streaming markdown writer
+"""
+
+import io
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from markdown_writer import iter_markdown, write_markdown
+from layout_fixtures import build_random_layout
+
+
+EXPECTED = """# UI Layout: Demo
+
+## Container: MainWindow
+- Type: Container
+- Orientation: vertical
+- Width: 800
+- Height: 600
+- Position: (0, 0)
+- Padding: 10
+- Background: #ffffff
+
+### Container: Toolbar
+- Type: Container
+- Orientation: horizontal
+- Width: 780
+- Height: 50
+- Position: (10, 10)
+- Padding: 10
+- Background: #ffffff
+
+#### Element: Save
+- Type: Button
+- Text: "Save"
+- Width: 100
+- Height: 30
+- Position: (5, 5)
+- Enabled: true
+- Visible: true
+- Properties:
+  - style: primary
+
+
+### Container: Empty
+- Type: Container
+- Orientation: vertical
+- Width: 400
+- Height: 300
+- Position: (0, 0)
+- Padding: 10
+- Background: #ffffff
+"""
+
+
+class CountingWriter(io.StringIO):
+    """StringIO that records the size of every write"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(len(text))
+        return super().write(text)
+
+
+class TestMarkdownWriter(unittest.TestCase):
+    """Test the generator-based markdown output"""
+
+    def test_exact_output(self):
+        """Test the blank-line layout between nested children"""
+        layout = UILayout("Demo")
+        toolbar = Container("Toolbar", 10, 10, 780, 50, "horizontal")
+        save = UIElement("Button", "Save", 5, 5, 100, 30)
+        save.text = "Save"
+        save.set_property("style", "primary")
+        toolbar.add_child(save)
+        layout.root_container.add_child(toolbar)
+        layout.root_container.add_child(Container("Empty"))
+
+        self.assertEqual(layout.to_markdown(), EXPECTED)
+        element = EXPECTED[EXPECTED.index("#### Element") + 1:EXPECTED.index("\n\n\n###")]
+        self.assertEqual(save.to_markdown(), element)
+
+    def test_write_matches_to_markdown(self):
+        """Test that buffered writing gives the same text in bounded blocks"""
+        layout = build_random_layout(400, seed=5)
+        expected = layout.to_markdown()
+
+        f = CountingWriter()
+        write_markdown(layout, f, buffer_size=1024)
+        self.assertEqual(f.getvalue(), expected)
+        self.assertGreater(len(f.writes), 10)
+        self.assertLess(max(f.writes), 2048)
+
+        container = layout.get_all_containers()[1]
+        self.assertEqual("".join(iter_markdown(container, 4)), container.to_markdown(4))
+
+    def test_deep_nesting(self):
+        """Test a tree nested deeper than the recursion limit"""
+        layout = UILayout("Deep")
+        parent = layout.root_container
+        for i in range(3000):
+            child = Container(f"C{i}")
+            parent.add_child(child)
+            parent = child
+
+        text = layout.to_markdown()
+        self.assertIn("#" * 3002 + " Container: C2999\n", text)
+        # Every level closes with one newline after its last child
+        self.assertTrue(text.endswith("- Background: #ffffff" + "\n" * 3000))
+
+
+if __name__ == "__main__":
+    unittest.main()
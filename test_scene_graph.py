@@ -0,0 +1,258 @@
+"""
+Unit tests for the retained scene graph
+"""
+
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from scene_graph import SceneGraph
+
+
+class FakeCanvas:
+    """Minimal stand-in for tk.Canvas that records every call"""
+
+    def __init__(self):
+        self.items = {}  # id -> {"coords": [...], "options": {...}}
+        self.order = []  # display list, bottom to top
+        self.calls = []
+        self._next_id = 1
+
+    def _create(self, kind, coords, options):
+        item_id = self._next_id
+        self._next_id += 1
+        tags = options.get("tags", ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        self.items[item_id] = {"kind": kind, "coords": list(coords),
+                               "options": dict(options), "tags": tags}
+        self.order.append(item_id)
+        self.calls.append(("create", kind))
+        return item_id
+
+    def create_rectangle(self, *coords, **options):
+        return self._create("rectangle", coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._create("text", coords, options)
+
+    def create_line(self, *coords, **options):
+        return self._create("line", coords, options)
+
+    def find_withtag(self, tag):
+        if isinstance(tag, int):
+            return [tag] if tag in self.items else []
+        return [i for i in self.order if tag in self.items[i]["tags"]]
+
+    def coords(self, item_id, *coords):
+        self.calls.append(("coords", item_id))
+        self.items[item_id]["coords"] = list(coords)
+
+    def itemconfig(self, item_id, **options):
+        self.calls.append(("itemconfig", item_id))
+        self.items[item_id]["options"].update(options)
+
+    def delete(self, tag):
+        self.calls.append(("delete", tag))
+        for item_id in self.find_withtag(tag):
+            del self.items[item_id]
+            self.order.remove(item_id)
+
+    def tag_raise(self, tag, above=None):
+        self.calls.append(("raise", tag))
+        moving = self.find_withtag(tag)
+        rest = [i for i in self.order if i not in moving]
+        position = rest.index(self.find_withtag(above)[-1]) + 1 if above is not None else len(rest)
+        self.order = rest[:position] + moving + rest[position:]
+
+    def tag_lower(self, tag, below=None):
+        self.calls.append(("lower", tag))
+        moving = self.find_withtag(tag)
+        self.order = moving + [i for i in self.order if i not in moving]
+
+    def addtag_withtag(self, new_tag, tag):
+        self.calls.append(("addtag", tag))
+        for item_id in self.find_withtag(tag):
+            self.items[item_id]["tags"] += (new_tag,)
+
+    def dtag(self, tag):
+        self.calls.append(("dtag", tag))
+        for item_id in self.find_withtag(tag):
+            self.items[item_id]["tags"] = tuple(t for t in self.items[item_id]["tags"] if t != tag)
+
+    def move(self, tag, dx, dy):
+        self.calls.append(("move", tag))
+        for item_id in self.find_withtag(tag):
+            coords = self.items[item_id]["coords"]
+            self.items[item_id]["coords"] = [
+                value + (dx if i % 2 == 0 else dy) for i, value in enumerate(coords)
+            ]
+
+
+class TestSceneGraph(unittest.TestCase):
+    """Test SceneGraph class"""
+
+    def setUp(self):
+        self.layout = UILayout("Test")
+        self.section = Container("Section", 100, 100, 400, 300)
+        self.button = UIElement("Button", "Btn", 20, 20, 100, 30)
+        self.label = UIElement("Label", "Lbl", 20, 80, 100, 30)
+        self.layout.root_container.add_child(self.section)
+        self.section.add_child(self.button)
+        self.section.add_child(self.label)
+        self.canvas = FakeCanvas()
+        self.scene = SceneGraph(self.canvas)
+        self.scene.sync(self.layout.root_container)
+        self.canvas.calls = []
+
+    def rect(self, item):
+        return self.canvas.items[self.scene.item_ids(item)[0]]
+
+    def test_initial_sync_creates_items(self):
+        """Test that every node gets its canvas items"""
+        self.assertEqual(len(self.scene), 4)
+        self.assertEqual(self.rect(self.button)["coords"], [120, 120, 220, 150])
+
+    def test_unchanged_sync_is_free(self):
+        """Test that syncing an unchanged layout issues no canvas calls"""
+        self.scene.sync(self.layout.root_container)
+        self.assertEqual(self.canvas.calls, [])
+
+    def test_move_updates_coords_only(self):
+        """Test that moving a container only updates coordinates"""
+        self.section.x += 50
+        self.scene.sync(self.layout.root_container)
+        kinds = {call[0] for call in self.canvas.calls}
+        self.assertEqual(kinds, {"coords"})
+        self.assertEqual(self.rect(self.button)["coords"], [170, 120, 270, 150])
+
+    def test_selection_changes_outline(self):
+        """Test that selection recolours the item and adds a handle"""
+        self.scene.selected_item = self.button
+        self.scene.refresh(self.button, 100, 100)
+        self.assertEqual(self.rect(self.button)["options"]["outline"], self.scene.selected_color)
+        self.assertEqual(len(self.scene.item_ids(self.button)), 4)
+
+        self.scene.selected_item = None
+        self.scene.refresh(self.button, 100, 100)
+        self.assertEqual(self.rect(self.button)["options"]["outline"], self.scene.element_color)
+        self.assertEqual(len(self.scene.item_ids(self.button)), 3)
+
+    def test_text_change_uses_itemconfig(self):
+        """Test that renaming only reconfigures the label"""
+        self.section.name = "Renamed"
+        self.scene.refresh(self.section, 0, 0)
+        self.assertEqual(self.canvas.calls, [("itemconfig", self.scene.item_ids(self.section)[1])])
+
+    def test_removed_nodes_are_deleted(self):
+        """Test that nodes removed from the layout lose their items"""
+        self.section.remove_child(self.label)
+        self.scene.sync(self.layout.root_container)
+        self.assertNotIn(self.label, self.scene)
+        self.assertEqual(len(self.canvas.items), 7)
+
+    def test_inserted_nodes_keep_draw_order(self):
+        """Test that new nodes are stacked where a full redraw would put them"""
+        new_button = UIElement("Button", "New", 10, 10, 50, 20)
+        self.section.add_child(new_button)
+        self.layout.root_container.add_child(Container("Later", 0, 0, 50, 50))
+        self.scene.sync(self.layout.root_container)
+
+        # Rebuild from scratch and compare the stacking of the two canvases
+        fresh_canvas = FakeCanvas()
+        fresh_scene = SceneGraph(fresh_canvas)
+        fresh_scene.sync(self.layout.root_container)
+
+        def stacking(canvas, scene):
+            owner = {}
+            for node in [self.layout.root_container] + self.layout.root_container.get_all_children():
+                for item_id in scene.item_ids(node):
+                    owner[item_id] = node
+            return [owner[item_id] for item_id in canvas.order]
+
+        self.assertEqual(stacking(self.canvas, self.scene), stacking(fresh_canvas, fresh_scene))
+
+
+    def test_translate_moves_whole_subtree(self):
+        """Test that translating a container moves all descendant items"""
+        self.scene.selected_item = self.button
+        self.scene.refresh(self.button, 100, 100)
+        self.scene.begin_drag(self.section)
+        self.canvas.calls = []
+
+        self.scene.translate(30, 40)
+        self.assertEqual(self.canvas.calls, [("move", SceneGraph.DRAG_TAG)])
+        self.assertEqual(self.rect(self.button)["coords"], [150, 160, 250, 190])
+        handle = self.canvas.items[self.scene.item_ids(self.button)[-1]]
+        self.assertEqual(handle["coords"], [240, 180, 250, 190])
+        # The root is not part of the section's subtree
+        self.assertEqual(self.rect(self.layout.root_container)["coords"], [0, 0, 800, 600])
+
+    def test_commit_translation_avoids_redundant_updates(self):
+        """Test that committing a drag leaves nothing for sync to do"""
+        self.scene.begin_drag(self.section)
+        self.scene.translate(30, 40)
+        self.scene.end_drag()
+        self.section.x += 30
+        self.section.y += 40
+        self.scene.commit_translation(self.section, 30, 40)
+        self.canvas.calls = []
+
+        self.scene.sync(self.layout.root_container)
+        self.assertEqual(self.canvas.calls, [])
+
+    def test_items_carry_only_their_own_tag(self):
+        """Test that canvas items are not tagged with their ancestors"""
+        tags = self.canvas.items[self.scene.item_ids(self.button)[0]]["tags"]
+        self.assertEqual(tags, ("element", f"item_{id(self.button)}"))
+
+    def test_end_drag_removes_drag_tag(self):
+        """Test that the drag tag only exists while dragging"""
+        self.scene.begin_drag(self.section)
+        self.assertEqual(len(self.canvas.find_withtag(SceneGraph.DRAG_TAG)), 8)
+        self.scene.end_drag()
+        self.assertEqual(self.canvas.find_withtag(SceneGraph.DRAG_TAG), [])
+
+        self.scene.begin_drag(self.label)
+        self.scene.translate(5, 5)
+        self.assertEqual(self.rect(self.button)["coords"], [120, 120, 220, 150])
+        self.assertEqual(self.rect(self.label)["coords"], [125, 185, 225, 215])
+
+    def test_reparented_subtree_follows_new_parent(self):
+        """Test that moving a node to a new parent redraws it there"""
+        other = Container("Other", 500, 0, 200, 200)
+        self.layout.root_container.add_child(other)
+        self.section.remove_child(self.button)
+        other.add_child(self.button)
+        self.scene.sync(self.layout.root_container)
+
+        self.assertEqual(self.rect(self.button)["coords"], [520, 20, 620, 50])
+
+
+    def test_viewport_culls_offscreen_subtrees(self):
+        """Test that containers outside the viewport prune their subtree"""
+        canvas = FakeCanvas()
+        scene = SceneGraph(canvas)
+        # The label sticks out of its container but the container is off-screen
+        self.label.x = -200
+        scene.sync(self.layout.root_container, viewport=(0, 0, 90, 90))
+        self.assertIn(self.layout.root_container, scene)
+        self.assertNotIn(self.section, scene)
+        self.assertNotIn(self.label, scene)
+
+    def test_scrolling_materializes_and_drops_items(self):
+        """Test that moving the viewport creates and deletes items"""
+        canvas = FakeCanvas()
+        scene = SceneGraph(canvas)
+        scene.sync(self.layout.root_container, viewport=(0, 0, 90, 90))
+        self.assertEqual(len(scene), 1)
+
+        scene.sync(self.layout.root_container, viewport=(150, 150, 250, 250))
+        self.assertIn(self.button, scene)
+        self.assertIn(self.label, scene)
+
+        scene.sync(self.layout.root_container, viewport=(600, 500, 700, 550))
+        self.assertEqual(len(scene), 1)
+        self.assertEqual(len(canvas.items), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Unit tests for the spatial index
+"""
+
+import random
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from spatial_index import SpatialIndex, absolute_bbox
+from layout_fixtures import build_random_layout
+
+
+def brute_force_item_at(root, x, y):
+    """Reference implementation: smallest item containing the point"""
+    best = None
+    best_key = None
+    stack = [(root, 0)]
+    while stack:
+        item, depth = stack.pop()
+        x1, y1, x2, y2 = absolute_bbox(item)
+        if x1 <= x <= x2 and y1 <= y <= y2:
+            key = ((x2 - x1) * (y2 - y1), -depth)
+            if best is None or key < best_key:
+                best, best_key = item, key
+        if isinstance(item, Container):
+            stack.extend((child, depth + 1) for child in item.children)
+    return best
+
+
+class TestSpatialIndex(unittest.TestCase):
+    """Test SpatialIndex class"""
+
+    def setUp(self):
+        self.layout = UILayout("Test")
+        self.section = Container("Section", 100, 100, 400, 300)
+        self.button = UIElement("Button", "Btn", 20, 20, 100, 30)
+        self.layout.root_container.add_child(self.section)
+        self.section.add_child(self.button)
+        self.index = SpatialIndex()
+        self.index.rebuild(self.layout.root_container)
+
+    def test_rebuild_indexes_all_items(self):
+        """Test that every item in the tree is indexed"""
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.bbox(self.button), (120, 120, 220, 150))
+
+    def test_item_at_returns_most_specific(self):
+        """Test point queries return the smallest item"""
+        self.assertIs(self.index.item_at(150, 130), self.button)
+        self.assertIs(self.index.item_at(300, 300), self.section)
+        self.assertIs(self.index.item_at(700, 500), self.layout.root_container)
+        self.assertIsNone(self.index.item_at(900, 900))
+
+    def test_edges_are_inclusive(self):
+        """Test that points on the border hit the item"""
+        self.assertIs(self.index.item_at(220, 150), self.button)
+
+    def test_container_at_skips_elements(self):
+        """Test container queries ignore elements"""
+        self.assertIs(self.index.container_at(150, 130), self.section)
+
+    def test_update_subtree_after_move(self):
+        """Test that moving a container moves its children in the index"""
+        self.section.x += 200
+        self.index.update_subtree(self.section)
+        self.assertIs(self.index.item_at(350, 130), self.button)
+        self.assertIs(self.index.item_at(150, 130), self.layout.root_container)
+
+    def test_update_after_resize(self):
+        """Test that resizing updates the bounding box"""
+        self.button.width = 300
+        self.index.update(self.button)
+        self.assertIs(self.index.item_at(400, 130), self.button)
+
+    def test_remove_subtree(self):
+        """Test removing a container removes its children"""
+        self.index.remove_subtree(self.section)
+        self.assertEqual(len(self.index), 1)
+        self.assertIs(self.index.item_at(150, 130), self.layout.root_container)
+
+    def test_items_outside_initial_bounds(self):
+        """Test that the index grows to hold far away and negative items"""
+        far = UIElement("Label", "Far", 10000, 12000, 50, 20)
+        negative = UIElement("Label", "Negative", -500, -400, 50, 20)
+        self.layout.root_container.add_child(far)
+        self.layout.root_container.add_child(negative)
+        self.index.insert(far)
+        self.index.insert(negative)
+        self.assertIs(self.index.item_at(10010, 12010), far)
+        self.assertIs(self.index.item_at(-480, -390), negative)
+        self.assertIs(self.index.item_at(150, 130), self.button)
+
+    def test_query_rect(self):
+        """Test rectangle queries"""
+        found = self.index.query_rect((110, 110, 130, 130))
+        self.assertEqual(set(found), {self.layout.root_container, self.section, self.button})
+        self.assertEqual(self.index.query_rect((900, 900, 950, 950)), [])
+
+    def test_matches_brute_force(self):
+        """Test the index against a linear scan on a random layout"""
+        layout = build_random_layout(1000)
+        index = SpatialIndex()
+        index.rebuild(layout.root_container)
+
+        rng = random.Random(7)
+        for _ in range(300):
+            x = rng.randint(-10, 5100)
+            y = rng.randint(-10, 5100)
+            expected = brute_force_item_at(layout.root_container, x, y)
+            found = index.item_at(x, y)
+            if expected is None:
+                self.assertIsNone(found)
+            else:
+                # Ties in area and depth may resolve to either item
+                self.assertEqual(absolute_bbox(found), absolute_bbox(expected))
+
+    def test_dense_grid(self):
+        """Test that items across quadrant midlines do not pile up in the upper cells"""
+        layout = UILayout("Grid")
+        grid = Container("Grid", 0, 0, 2048, 2048)
+        layout.root_container.add_child(grid)
+        for row in range(63):
+            for column in range(63):
+                # Every cell lies across a quadrant boundary
+                grid.add_child(UIElement("Button", f"B{row}_{column}",
+                                         17 + 32 * column, 17 + 32 * row, 30, 30))
+        index = SpatialIndex()
+        index.rebuild(layout.root_container)
+
+        stack = [index._root]
+        largest = 0
+        while stack:
+            node = stack.pop()
+            largest = max(largest, len(node.entries))
+            stack.extend(node.children or ())
+        self.assertLessEqual(largest, SpatialIndex.MAX_ENTRIES)
+
+        rng = random.Random(11)
+        for _ in range(100):
+            x = rng.randint(0, 2048)
+            y = rng.randint(0, 2048)
+            expected = brute_force_item_at(layout.root_container, x, y)
+            self.assertEqual(absolute_bbox(index.item_at(x, y)), absolute_bbox(expected))
+        self.assertEqual(set(index.query_rect((1020, 1020, 1030, 1030))),
+                         {grid, layout.find_by_name("B31_31")})
+
+
+if __name__ == '__main__':
+    unittest.main()
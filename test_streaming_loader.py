@@ -0,0 +1,135 @@
+"""
+Unit tests for the streaming JSON loader
+"""
+
+import gc
+import os
+import tempfile
+import threading
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from streaming_loader import load_layout, LoadCancelled
+from layout_fixtures import build_random_layout
+
+
+class TestStreamingLoader(unittest.TestCase):
+    """Test building layouts while reading the file"""
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def write(self, text):
+        with open(self.filename, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_matches_json_load(self):
+        """Test that every chunk size gives the same tree as json.load"""
+        layout = build_random_layout(300, seed=3)
+        button = layout.get_all_elements()[0]
+        # Node-like values inside properties must stay plain dicts
+        button.properties["nested"] = {"type": "container", "children": [1, 2.5, None]}
+        button.name = "Bütton ✓ \"quoted\""
+        layout.save_to_json(self.filename)
+
+        expected = layout.to_dict()
+        for chunk_size in (1, 2, 5, 64, 4096, 1024 * 1024):
+            loaded = load_layout(self.filename, chunk_size=chunk_size)
+            self.assertEqual(loaded.to_dict(), expected, chunk_size)
+
+        loaded = UILayout.load_from_json(self.filename)
+        self.assertEqual(loaded.to_dict(), expected)
+        self.assertEqual(loaded.find_by_name(button.name).parent.name, button.parent.name)
+
+    def test_compact_and_key_order(self):
+        """Test files without whitespace and with children before other keys"""
+        self.write(
+            '{"root_container":{"children":[{"type":"element","element_type":"Button",'
+            '"name":"B","x":1,"y":2,"width":3,"height":4,"text":"t","enabled":false,'
+            '"visible":true,"properties":{"n":-1.5e2}}],"type":"container","name":"Root",'
+            '"x":0,"y":0,"width":10,"height":20,"orientation":"horizontal","padding":0,'
+            '"background":"#000"},"name":"Compact"}'
+        )
+        for chunk_size in (1, 3, 1024):
+            layout = load_layout(self.filename, chunk_size=chunk_size)
+            self.assertEqual(layout.name, "Compact")
+            root = layout.root_container
+            self.assertEqual((root.name, root.orientation, root.padding), ("Root", "horizontal", 0))
+            button = root.children[0]
+            self.assertEqual((button.x, button.y, button.width, button.height), (1, 2, 3, 4))
+            self.assertFalse(button.enabled)
+            self.assertEqual(button.get_property("n"), -150.0)
+            self.assertIs(layout.find_by_name("B"), button)
+
+    def test_deep_nesting(self):
+        """Test a tree nested far deeper than the recursion limit"""
+        depth = 5000
+        container = ('{"type": "container", "name": "C%d", "x": 1, "y": 1, "width": 10, '
+                     '"height": 10, "orientation": "vertical", "children": [')
+        parts = ['{"name": "Deep", "root_container": ']
+        parts.extend(container % i for i in range(depth))
+        parts.append('{"type": "element", "element_type": "Label", "name": "Leaf", '
+                     '"x": 0, "y": 0, "width": 5, "height": 5}')
+        parts.append("]}" * depth)
+        parts.append("}")
+        self.write("".join(parts))
+
+        layout = load_layout(self.filename, chunk_size=4096)
+        leaf = layout.find_by_name("Leaf")
+        self.assertIsInstance(leaf, UIElement)
+        self.assertEqual(leaf.absolute_position(), (depth, depth))
+        self.assertIsInstance(layout.find_by_name("C4999"), Container)
+
+    def test_progress_and_gc(self):
+        """Test progress reports and that garbage collection is restored"""
+        build_random_layout(200).save_to_json(self.filename)
+        size = os.path.getsize(self.filename)
+        reports = []
+
+        self.assertTrue(gc.isenabled())
+        load_layout(self.filename, progress=lambda done, total: reports.append((done, total)),
+                    chunk_size=1024)
+        self.assertTrue(gc.isenabled())
+
+        self.assertGreater(len(reports), 1)
+        self.assertEqual(reports[-1], (size, size))
+        self.assertEqual([done for done, _ in reports], sorted(done for done, _ in reports))
+
+    def test_cancel(self):
+        """Test cancelling a load part way through"""
+        build_random_layout(200).save_to_json(self.filename)
+        cancel = threading.Event()
+
+        def progress(done, total):
+            if done > total / 2:
+                cancel.set()
+
+        with self.assertRaises(LoadCancelled):
+            load_layout(self.filename, progress=progress, cancel=cancel, chunk_size=1024)
+        self.assertTrue(gc.isenabled())
+
+    def test_malformed(self):
+        """Test that syntax errors and missing fields are reported"""
+        bad_files = [
+            '{"name": "X", "root_container": {"type": "container", "name": "R" "x": 0}}',
+            '{"name": "X", "root_container": {"type": "container", "children": [1]}}',
+            '{"name": "X", "root_container": {"type": "container", "name": "R", "x": 0,'
+            ' "y": 0, "width": 1, "height": 1, "orientation": "vertical"} trailing',
+            '{"name": "X", "root_container": {"type": "cont',
+        ]
+        for text in bad_files:
+            self.write(text)
+            with self.assertRaises(ValueError, msg=text):
+                load_layout(self.filename, chunk_size=8)
+
+        self.write('{"name": "X"}')
+        with self.assertRaises(KeyError):
+            load_layout(self.filename)
+        self.assertTrue(gc.isenabled())
+
+
+if __name__ == "__main__":
+    unittest.main()
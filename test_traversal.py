@@ -0,0 +1,110 @@
+"""
+Unit tests for the iterative traversal helpers
+"""
+
+import unittest
+from ui_elements import UIElement, Container, UILayout
+from ascii_exporter import ASCIIExporter
+from traversal import (ENTER, LEAVE, iter_preorder, iter_postorder, iter_edges,
+                       iter_events, iter_absolute, walk, dict_children)
+from layout_fixtures import build_deep_layout
+
+
+DEPTH = 5000
+
+
+class TestTraversal(unittest.TestCase):
+    """Test traversal order and offsets on a small tree"""
+
+    def setUp(self):
+        self.root = Container("Root", 10, 20, 500, 500)
+        self.a = Container("A", 5, 5, 200, 200)
+        self.a1 = UIElement("Button", "A1", 1, 2, 50, 20)
+        self.a2 = UIElement("Label", "A2", 3, 4, 50, 20)
+        self.b = UIElement("TextBox", "B", 100, 100, 50, 20)
+        self.a.add_child(self.a1)
+        self.a.add_child(self.a2)
+        self.root.add_child(self.a)
+        self.root.add_child(self.b)
+
+    def test_orders(self):
+        """Test pre-order, post-order, edges and events"""
+        names = lambda nodes: [node.name for node in nodes]
+        self.assertEqual(names(iter_preorder(self.root)), ["Root", "A", "A1", "A2", "B"])
+        self.assertEqual(names(iter_postorder(self.root)), ["A1", "A2", "A", "B", "Root"])
+        self.assertEqual([(p.name if p else None, n.name) for p, n in iter_edges(self.root)],
+                         [(None, "Root"), ("Root", "A"), ("A", "A1"), ("A", "A2"), ("Root", "B")])
+        self.assertEqual(
+            [(event, node.name, depth) for event, node, depth in iter_events(self.root)],
+            [(ENTER, "Root", 0), (ENTER, "A", 1), (ENTER, "A1", 2), (LEAVE, "A1", 2),
+             (ENTER, "A2", 2), (LEAVE, "A2", 2), (LEAVE, "A", 1),
+             (ENTER, "B", 1), (LEAVE, "B", 1), (LEAVE, "Root", 0)]
+        )
+
+    def test_offsets_and_pruning(self):
+        """Test absolute offsets and skipping subtrees in walk"""
+        for node, x, y in iter_absolute(self.root):
+            self.assertEqual((x, y), node.absolute_position())
+
+        visited = []
+        left = []
+        walk(self.root,
+             lambda node, x, y: visited.append((node.name, x, y)) or node is not self.a,
+             lambda node, x, y: left.append(node.name))
+        self.assertEqual(visited, [("Root", 10, 20), ("A", 15, 25), ("B", 110, 120)])
+        self.assertEqual(left, ["B", "Root"])
+
+    def test_dict_children(self):
+        """Test walking serialized dicts"""
+        data = self.root.to_dict()
+        data["children"][1]["children"] = ["not a node"]  # Elements have no children
+        self.assertEqual([d["name"] for d in iter_preorder(data, dict_children)],
+                         ["Root", "A", "A1", "A2", "B"])
+
+
+class TestDeepNesting(unittest.TestCase):
+    """Test every tree operation at 5,000 nesting levels"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.layout = build_deep_layout(DEPTH)
+        cls.leaf = cls.layout.find_by_name("Leaf")
+
+    def test_traversals(self):
+        """Test the traversal helpers themselves"""
+        root = self.layout.root_container
+        self.assertEqual(sum(1 for _ in iter_preorder(root)), DEPTH + 2)
+        self.assertIs(next(iter_postorder(root)), self.leaf)
+        self.assertEqual(max(depth for _, _, depth in iter_events(root)), DEPTH + 1)
+        last = list(iter_absolute(root))[-1]
+        self.assertEqual(last, (self.leaf, DEPTH + 1, DEPTH + 1))
+
+    def test_dict_round_trip(self):
+        """Test to_dict and from_dict"""
+        data = self.layout.to_dict()
+        loaded = UILayout.from_dict(data)
+        self.assertEqual(loaded.find_by_name("Leaf").absolute_position(), (DEPTH + 1, DEPTH + 1))
+        self.assertEqual(loaded.find_by_name("C4999").width, 12)
+
+    def test_markdown(self):
+        """Test to_markdown"""
+        text = self.layout.to_markdown()
+        self.assertIn("#" * (DEPTH + 3) + " Element: Leaf\n", text)
+
+    def test_queries(self):
+        """Test get_all_children, get_all_* and find_by_name"""
+        root = self.layout.root_container
+        self.assertEqual(len(root.get_all_children()), DEPTH + 1)
+        self.assertEqual(len(self.layout.get_all_containers()), DEPTH + 1)
+        self.assertEqual(self.layout.get_all_elements(), [self.leaf])
+        self.assertEqual(self.layout.find_by_name("C2500").name, "C2500")
+
+    def test_ascii_export(self):
+        """Test that the ASCII exporter draws the deepest visible levels"""
+        exporter = ASCIIExporter(self.layout, scale_factor=0.1)
+        text = exporter.export()
+        self.assertEqual(len(text.splitlines()), exporter.height)
+
+
+if __name__ == "__main__":
+    unittest.main()
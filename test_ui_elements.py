@@ -3,7 +3,7 @@ Unit tests for UI elements
 """
 
 import unittest
-from ui_elements import UIElement, Container, UILayout
+from ui_elements import UIElement, Container, UILayout, ChildList, advance_revisions
 
 
 class TestUIElement(unittest.TestCase):
@@ -29,6 +29,19 @@ class TestUIElement(unittest.TestCase):
         self.assertEqual(element.get_property("max-length"), 50)
         self.assertIsNone(element.get_property("nonexistent"))
         
+    def test_compact_representation(self):
+        """Test that elements have no __dict__ and allocate properties lazily"""
+        element = UIElement("Button", "Btn")
+        self.assertFalse(hasattr(element, "__dict__"))
+        self.assertIsNone(element._properties)
+        self.assertIsNone(element.get_property("missing"))
+        self.assertEqual(element.to_dict()["properties"], {})
+        self.assertIsNone(element._properties)
+        
+        container = Container("Box")
+        self.assertEqual(len(container.children), 0)
+        self.assertIsNone(container._children)
+        
     def test_element_to_markdown(self):
         """Test element markdown conversion"""
         element = UIElement("Button", "SubmitBtn", 50, 100, 120, 40)
@@ -102,6 +115,194 @@ class TestContainer(unittest.TestCase):
         self.assertIn("Element: Title", markdown)
 
 
+class TestChildList(unittest.TestCase):
+    """Test the ordered child collection"""
+    
+    def setUp(self):
+        self.items = [UIElement("Button", f"Btn{i}") for i in range(100)]
+        self.children = ChildList(self.items)
+        
+    def test_order_and_membership(self):
+        """Test that insertion order and membership are kept"""
+        self.assertEqual(list(self.children), self.items)
+        self.assertEqual(len(self.children), 100)
+        self.assertIn(self.items[50], self.children)
+        self.assertNotIn(UIElement("Label", "Other"), self.children)
+        
+    def test_remove_keeps_order(self):
+        """Test removing children in any order"""
+        for item in self.items[::3]:
+            self.children.remove(item)
+        remaining = [item for i, item in enumerate(self.items) if i % 3]
+        self.assertEqual(list(self.children), remaining)
+        self.assertEqual(list(reversed(self.children)), remaining[::-1])
+        self.assertEqual(self.children[0], remaining[0])
+        self.assertEqual(self.children.index(remaining[10]), 10)
+        self.assertNotIn(self.items[0], self.children)
+        
+    def test_remove_missing_raises(self):
+        """Test removing a child that is not present"""
+        self.children.remove(self.items[0])
+        with self.assertRaises(ValueError):
+            self.children.remove(self.items[0])
+            
+    def test_insert(self):
+        """Test inserting a child at a position"""
+        new_item = UIElement("Label", "New")
+        self.children.remove(self.items[0])
+        self.children.insert(5, new_item)
+        self.assertEqual(self.children.index(new_item), 5)
+        self.assertEqual(self.children.index(self.items[6]), 5 + 1)
+        
+    def test_alternating_remove_and_index(self):
+        """Test removals mixed with lookups against a plain list, without rebuilding the index"""
+        import random
+        rng = random.Random(4)
+        items = [UIElement("Button", f"Item{i}") for i in range(1000)]
+        children = ChildList(items)
+        reference = list(items)
+        children.index(items[0])
+        positions = children._positions
+        for _ in range(400):
+            item = rng.choice(reference)
+            self.assertEqual(children.index(item), reference.index(item))
+            children.remove(item)
+            reference.remove(item)
+            position = rng.randrange(len(reference))
+            self.assertIs(children[position], reference[position])
+            self.assertIs(children[-1 - position], reference[-1 - position])
+        self.assertIs(children._positions, positions)  # Lookups did not compact
+        self.assertEqual(list(children), reference)
+        
+    def test_changes_while_iterating(self):
+        """Test that iterating yields the children as they were when it began"""
+        self.children.remove(self.items[0])
+        seen = []
+        for item in self.children:
+            seen.append(item)
+            if len(seen) == 1:
+                # Enough removals to compact, plus an insert and an append
+                for removed in self.items[10:70]:
+                    self.children.remove(removed)
+                self.children.insert(0, UIElement("Label", "Inserted"))
+                self.children.append(UIElement("Label", "Appended"))
+        self.assertEqual(seen, self.items[1:])
+        self.assertEqual(len(self.children), 100 - 61 + 2)
+        
+    def test_container_output_unchanged(self):
+        """Test that removals do not change serialized output"""
+        container = Container("Parent", 0, 0, 400, 300)
+        for item in self.items:
+            container.add_child(item)
+        for item in self.items[:60]:
+            container.remove_child(item)
+        expected = Container("Parent", 0, 0, 400, 300)
+        for item in self.items[60:]:
+            expected.add_child(item)
+        self.assertEqual(container.to_dict(), expected.to_dict())
+        self.assertEqual(container.to_markdown(), expected.to_markdown())
+
+
+class TestAbsoluteGeometry(unittest.TestCase):
+    """Test cached absolute positions"""
+    
+    def setUp(self):
+        self.root = Container("Root", 5, 5, 800, 600)
+        self.section = Container("Section", 100, 50, 400, 300)
+        self.button = UIElement("Button", "Btn", 10, 20, 100, 30)
+        self.root.add_child(self.section)
+        self.section.add_child(self.button)
+        
+    def test_absolute_position(self):
+        """Test absolute positions include every ancestor"""
+        self.assertEqual(self.button.absolute_position(), (115, 75))
+        self.assertEqual(self.button.absolute_x, 115)
+        self.assertEqual(self.button.absolute_y, 75)
+        self.assertEqual(self.button.absolute_bbox(), (115, 75, 215, 105))
+        
+    def test_moving_ancestor_invalidates_descendants(self):
+        """Test moving a container updates its children"""
+        self.button.absolute_position()
+        self.section.x = 200
+        self.assertEqual(self.button.absolute_position(), (215, 75))
+        
+    def test_moving_sibling_keeps_cache(self):
+        """Test moving a node leaves unrelated caches alone"""
+        other = UIElement("Label", "Other", 0, 0)
+        self.section.add_child(other)
+        self.button.absolute_position()
+        other.x = 50
+        self.assertIsNotNone(self.button._absolute)
+        self.assertEqual(other.absolute_position(), (155, 55))
+        
+    def test_reparenting_invalidates(self):
+        """Test moving a node to another container"""
+        self.button.absolute_position()
+        self.section.remove_child(self.button)
+        self.assertEqual(self.button.absolute_position(), (10, 20))
+        self.root.add_child(self.button)
+        self.assertEqual(self.button.absolute_position(), (15, 25))
+        
+    def test_resize_updates_bbox(self):
+        """Test that the bounding box follows size changes"""
+        self.button.absolute_position()
+        self.button.width = 50
+        self.assertEqual(self.button.absolute_bbox(), (115, 75, 165, 105))
+
+
+class TestRevisions(unittest.TestCase):
+    """Test revision stamps for changed subtrees"""
+
+    def setUp(self):
+        self.root = Container("Root", 0, 0, 800, 600)
+        self.section = Container("Section", 100, 50, 400, 300)
+        self.other = Container("Other", 0, 400, 400, 100)
+        self.button = UIElement("Button", "Btn", 10, 20, 100, 30)
+        self.root.add_child(self.section)
+        self.root.add_child(self.other)
+        self.section.add_child(self.button)
+        advance_revisions()
+
+    def revisions(self):
+        return [node.revision for node in (self.root, self.section, self.other, self.button)]
+
+    def test_edit_changes_ancestors_only(self):
+        """Test that drawn attributes stamp the node and its ancestors"""
+        edits = [("x", 5), ("y", 5), ("width", 50), ("height", 50), ("name", "B"),
+                 ("text", "Go"), ("element_type", "Label")]
+        for attribute, value in edits:
+            before = self.revisions()
+            setattr(self.button, attribute, value)
+            after = self.revisions()
+            self.assertNotEqual(after[0], before[0], attribute)
+            self.assertNotEqual(after[1], before[1], attribute)
+            self.assertEqual(after[2], before[2], attribute)
+            self.assertNotEqual(after[3], before[3], attribute)
+            advance_revisions()
+
+    def test_children_changes(self):
+        """Test adding and removing children"""
+        before = self.revisions()
+        self.other.add_child(UIElement("Label", "New"))
+        self.assertNotEqual(self.revisions()[2], before[2])
+        self.assertEqual(self.revisions()[1], before[1])
+        advance_revisions()
+
+        before = self.revisions()
+        self.section.remove_child(self.button)
+        self.assertNotEqual(self.revisions()[1], before[1])
+        self.assertNotEqual(self.revisions()[0], before[0])
+
+    def test_unchanged_without_edits(self):
+        """Test that other attributes and reads leave revisions alone"""
+        before = self.revisions()
+        self.button.enabled = False
+        self.button.set_property("k", "v")
+        self.button.absolute_position()
+        advance_revisions()
+        self.assertEqual(self.revisions(), before)
+
+
 class TestUILayout(unittest.TestCase):
     """Test UILayout class"""
     
@@ -210,6 +411,65 @@ class TestUILayout(unittest.TestCase):
                 os.remove(temp_file)
 
 
+class TestNameIndex(unittest.TestCase):
+    """Test the layout name index and unique names"""
+    
+    def setUp(self):
+        self.layout = UILayout("Test")
+        self.section = Container("Section", 0, 0, 200, 200)
+        self.button = UIElement("Button", "Btn")
+        self.section.add_child(self.button)
+        self.layout.root_container.add_child(self.section)
+        
+    def test_adding_subtree_indexes_descendants(self):
+        """Test that attaching a subtree indexes all of its nodes"""
+        self.assertIs(self.layout.find_by_name("Btn"), self.button)
+        self.assertIs(self.layout.find_by_name("MainWindow"), self.layout.root_container)
+        
+    def test_removing_subtree_unindexes_descendants(self):
+        """Test that detached nodes can no longer be found"""
+        self.layout.root_container.remove_child(self.section)
+        self.assertIsNone(self.layout.find_by_name("Section"))
+        self.assertIsNone(self.layout.find_by_name("Btn"))
+        
+    def test_rename_updates_index(self):
+        """Test renaming a node"""
+        self.button.name = "Submit"
+        self.assertIsNone(self.layout.find_by_name("Btn"))
+        self.assertIs(self.layout.find_by_name("Submit"), self.button)
+        
+    def test_duplicate_names(self):
+        """Test that duplicate names resolve to the earlier node"""
+        other = UIElement("Label", "Btn")
+        self.layout.root_container.add_child(other)
+        self.assertIs(self.layout.find_by_name("Btn"), self.button)
+        self.section.remove_child(self.button)
+        self.assertIs(self.layout.find_by_name("Btn"), other)
+        
+    def test_loaded_layout_is_indexed(self):
+        """Test that layouts built from dictionaries are indexed"""
+        loaded = UILayout.from_dict(self.layout.to_dict())
+        self.assertEqual(loaded.find_by_name("Btn").element_type, "Button")
+        
+    def test_unique_name(self):
+        """Test that generated names never collide"""
+        self.layout.root_container.add_child(UIElement("Button", "Button2"))
+        self.assertEqual(self.layout.unique_name("Button"), "Button1")
+        self.layout.root_container.add_child(UIElement("Button", "Button1"))
+        self.assertEqual(self.layout.unique_name("Button"), "Button3")
+        self.assertEqual(self.layout.unique_name("Container"), "Container1")
+        
+    def test_unique_name_after_deletion(self):
+        """Test that deleting nodes does not cause reused names"""
+        first = UIElement("Button", self.layout.unique_name("Button"))
+        second = UIElement("Button", self.layout.unique_name("Button"))
+        self.layout.root_container.add_child(first)
+        self.layout.root_container.add_child(second)
+        self.layout.root_container.remove_child(first)
+        third = self.layout.unique_name("Button")
+        self.assertNotIn(third, (first.name, second.name))
+
+
 class TestComplexLayout(unittest.TestCase):
     """Test complex nested layouts"""
     
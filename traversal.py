@@ -0,0 +1,124 @@
+"""
+Iterative traversal of layout trees
+
+Every walk uses an explicit stack, so trees nested far deeper than Python's
+recursion limit can be visited. The helpers work on layout nodes by
+default; pass children= to walk other trees such as serialized dicts.
+"""
+
+from ui_elements import Container
+
+
+ENTER = "enter"
+LEAVE = "leave"
+
+
+def node_children(node):
+    """Get the children of a layout node (elements have none)"""
+    return node.children if isinstance(node, Container) else ()
+
+
+def dict_children(data):
+    """Get the children of a serialized node dict (containers by default)"""
+    if data.get("type", "container") == "container":
+        return data.get("children", ())
+    return ()
+
+
+def iter_preorder(root, children=node_children):
+    """Yield root and its descendants, parents before children"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        node_list = children(node)
+        if node_list:
+            stack.extend(reversed(node_list))
+
+
+def iter_postorder(root, children=node_children):
+    """Yield root and its descendants, children before parents"""
+    for event, node, _ in iter_events(root, children):
+        if event is LEAVE:
+            yield node
+
+
+def iter_edges(root, children=node_children):
+    """Yield (parent, node) pairs in pre-order; the root's parent is None"""
+    stack = [(None, root)]
+    while stack:
+        parent, node = stack.pop()
+        yield parent, node
+        node_list = children(node)
+        if node_list:
+            stack.extend((node, child) for child in reversed(node_list))
+
+
+def iter_events(root, children=node_children):
+    """
+    Yield (ENTER, node, depth) before and (LEAVE, node, depth) after the
+    descendants of each node.
+    """
+    yield ENTER, root, 0
+    stack = [iter(children(root))]
+    nodes = [root]
+    while stack:
+        child = next(stack[-1], None)
+        depth = len(stack)
+        if child is None:
+            stack.pop()
+            yield LEAVE, nodes.pop(), depth - 1
+            continue
+
+        yield ENTER, child, depth
+        child_list = children(child)
+        if child_list:
+            stack.append(iter(child_list))
+            nodes.append(child)
+        else:
+            yield LEAVE, child, depth
+
+
+def iter_absolute(root, x=0, y=0):
+    """Yield (node, absolute x, absolute y) in pre-order"""
+    stack = [(root, x, y)]
+    while stack:
+        node, parent_x, parent_y = stack.pop()
+        node_x = parent_x + node.x
+        node_y = parent_y + node.y
+        yield node, node_x, node_y
+        if isinstance(node, Container):
+            for child in reversed(node.children):
+                stack.append((child, node_x, node_y))
+
+
+def walk(root, enter, leave=None, x=0, y=0):
+    """
+    Visit a layout tree depth-first while accumulating absolute offsets.
+
+    Args:
+        root: Node to start from
+        enter: Called as enter(node, abs_x, abs_y) before the node's
+            children; returning False skips the children (and leave)
+        leave: Optional, called as leave(node, abs_x, abs_y) after them
+        x, y: Absolute position of root's parent
+    """
+    # Entries are (node, parent x, parent y) or, with leave, a pending
+    # (None, node, x, y) marker popped once the children are done
+    stack = [(root, x, y)]
+    while stack:
+        entry = stack.pop()
+        if entry[0] is None:
+            leave(*entry[1:])
+            continue
+
+        node, parent_x, parent_y = entry
+        node_x = parent_x + node.x
+        node_y = parent_y + node.y
+        if enter(node, node_x, node_y) is False:
+            continue
+        if leave is not None:
+            stack.append((None, node, node_x, node_y))
+        if isinstance(node, Container):
+            for child in reversed(node.children):
+                stack.append((child, node_x, node_y))
@@ -2,7 +2,293 @@
 UI Element and Container classes for the MD UI Builder
 """
 
-class UIElement:
+import bisect
+
+
+class ChildList:
+    """
+    Ordered collection of a container's children.
+
+    Keeps insertion order like a list, but membership and removal are O(1)
+    and index lookup O(log n) (amortized), so large containers can be
+    built and torn down quickly. Removed children leave holes that are
+    dropped once they make up half of the list.
+    """
+
+    # Short lists are scanned directly; the child -> position map is only
+    # built once a list grows past this size
+    INDEX_THRESHOLD = 8
+
+    __slots__ = ("_items", "_positions", "_holes")
+
+    def __init__(self, items=()):
+        self._items = []  # Children in order, None where one was removed
+        self._positions = None  # child -> index in _items, built on demand
+        self._holes = []  # Sorted indices of the Nones in _items
+        for item in items:
+            self.append(item)
+
+    def append(self, item):
+        """Add a child at the end"""
+        if self._positions is not None:
+            self._positions[item] = len(self._items)
+        self._items.append(item)
+
+    def insert(self, index, item):
+        """Add a child at a position (O(n) unless it is the end, used for undo)"""
+        if index >= len(self):
+            self.append(item)
+            return
+        self._compact()
+        self._items.insert(index, item)
+        self._positions = None
+
+    def remove(self, item):
+        """Remove a child"""
+        position = self._find(item)
+        if position is None:
+            raise ValueError(f"{item!r} is not a child")
+        self._items[position] = None
+        if self._positions is not None:
+            del self._positions[item]
+        bisect.insort(self._holes, position)
+        holes = len(self._holes)
+        if holes > self.INDEX_THRESHOLD and holes * 2 > len(self._items):
+            self._compact()
+
+    def index(self, item):
+        """Get the position of a child"""
+        position = self._find(item)
+        if position is None:
+            raise ValueError(f"{item!r} is not a child")
+        return position - bisect.bisect_left(self._holes, position)
+
+    def clear(self):
+        """Remove all children"""
+        self._items = []
+        self._positions = None
+        self._holes = []
+
+    def _find(self, item):
+        """Get the index of a child in _items, or None"""
+        if self._positions is None:
+            if len(self._items) <= self.INDEX_THRESHOLD:
+                for position, current in enumerate(self._items):
+                    if current is item:
+                        return position
+                return None
+            self._positions = {
+                current: position for position, current in enumerate(self._items)
+                if current is not None
+            }
+        return self._positions.get(item)
+
+    def _compact(self):
+        """Drop the holes left by removals"""
+        if not self._holes:
+            return
+        self._items = [item for item in self._items if item is not None]
+        self._positions = None
+        self._holes = []
+
+    def __getitem__(self, index):
+        holes = self._holes
+        if not holes:
+            return self._items[index]
+        if isinstance(index, slice):
+            return list(self)[index]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("child index out of range")
+        # Find how many holes come before the child: the first k with
+        # holes[k] - k > index (that difference never decreases)
+        low, high = 0, len(holes)
+        while low < high:
+            middle = (low + high) // 2
+            if holes[middle] - middle > index:
+                high = middle
+            else:
+                low = middle + 1
+        return self._items[index + low]
+
+    def __contains__(self, item):
+        return self._find(item) is not None
+
+    def __len__(self):
+        return len(self._items) - len(self._holes)
+
+    def __iter__(self):
+        # Over a copy: children added or removed meanwhile do not disturb it
+        if self._holes:
+            return iter([item for item in self._items if item is not None])
+        return iter(self._items.copy())
+
+    def __reversed__(self):
+        if self._holes:
+            return reversed([item for item in self._items if item is not None])
+        return reversed(self._items.copy())
+
+    def __repr__(self):
+        return f"ChildList({list(self)!r})"
+
+
+class _LayoutNode:
+    """
+    Shared naming and position handling for elements and containers.
+
+    The absolute position is cached on first use. Moving a node or changing
+    its parent clears the cache of that node and its descendants only.
+    Renaming a node keeps the name index of its UILayout up to date.
+
+    revision changes whenever the node, or anything drawn inside it, is
+    renamed, moved, resized, retexted or gains or loses children, so
+    renderers can reuse output for subtrees whose revision is unchanged.
+
+    Nodes use __slots__ so that very large layouts stay compact.
+    """
+
+    __slots__ = ("_name", "_x", "_y", "_parent", "_absolute", "_width", "_height",
+                 "_revision")
+
+    # Stamp given to nodes changed since the clock was last advanced
+    _clock = 0
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        old_name = self._name
+        self._name = value
+        self._touch()
+        layout = self._owning_layout()
+        if layout is not None:
+            layout._rename(self, old_name, value)
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = value
+        self._invalidate_absolute()
+        self._touch()
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = value
+        self._invalidate_absolute()
+        self._touch()
+
+    @property
+    def width(self):
+        return self._width
+
+    @width.setter
+    def width(self, value):
+        self._width = value
+        self._touch()
+
+    @property
+    def height(self):
+        return self._height
+
+    @height.setter
+    def height(self, value):
+        self._height = value
+        self._touch()
+
+    @property
+    def revision(self):
+        """Stamp that changes when this node or its subtree changes"""
+        return self._revision
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @parent.setter
+    def parent(self, value):
+        self._parent = value
+        self._invalidate_absolute()
+
+    @property
+    def absolute_x(self):
+        return self.absolute_position()[0]
+
+    @property
+    def absolute_y(self):
+        return self.absolute_position()[1]
+
+    def absolute_position(self):
+        """Get the (x, y) position relative to the root of the tree"""
+        if self._absolute is None:
+            # Walk up to the nearest cached ancestor and fill in the caches
+            chain = []
+            node = self
+            while node is not None and node._absolute is None:
+                chain.append(node)
+                node = node._parent
+            x, y = node._absolute if node is not None else (0, 0)
+            for node in reversed(chain):
+                x += node._x
+                y += node._y
+                node._absolute = (x, y)
+        return self._absolute
+
+    def absolute_bbox(self):
+        """Get the absolute bounding box (x1, y1, x2, y2)"""
+        x, y = self.absolute_position()
+        return (x, y, x + self.width, y + self.height)
+
+    def _owning_layout(self):
+        """Get the UILayout whose tree this node belongs to, if any"""
+        node = self
+        while node._parent is not None:
+            node = node._parent
+        return getattr(node, "_layout", None)
+
+    def _touch(self):
+        """Stamp this node and its ancestors as changed"""
+        # A node already carrying the current stamp has stamped ancestors,
+        # so repeated edits between two renders stay O(1)
+        clock = _LayoutNode._clock
+        node = self
+        while node is not None and node._revision != clock:
+            node._revision = clock
+            node = node._parent
+
+    def _invalidate_absolute(self):
+        """Clear the cached absolute position of this node and its descendants"""
+        # A cached node always has cached ancestors, so an uncached node
+        # cannot have cached descendants and the walk can stop there
+        if self._absolute is None:
+            return
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._absolute is None:
+                continue
+            node._absolute = None
+            children = getattr(node, "_children", None)
+            if children:
+                stack.extend(children)
+
+
+def advance_revisions():
+    """Start a new revision stamp, so later edits get revisions not seen before"""
+    _LayoutNode._clock += 1
+
+
+class UIElement(_LayoutNode):
     """Base class for all UI elements"""
     
     ELEMENT_TYPES = [
@@ -10,18 +296,51 @@ class UIElement:
         "ComboBox", "CheckBox", "RadioButton", "Slider", "Image", "Spacer"
     ]
     
+    __slots__ = ("_element_type", "_text", "enabled", "visible", "_properties")
+    
     def __init__(self, element_type, name, x=0, y=0, width=100, height=30):
-        self.element_type = element_type
-        self.name = name
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.text = ""
+        self._absolute = None
+        self._parent = None
+        self._revision = _LayoutNode._clock
+        self._element_type = element_type
+        self._name = name
+        self._x = x
+        self._y = y
+        self._width = width
+        self._height = height
+        self._text = ""
         self.enabled = True
         self.visible = True
-        self.properties = {}
-        self.parent = None
+        self._properties = None  # Allocated on first use; most elements have none
+
+    @property
+    def element_type(self):
+        return self._element_type
+
+    @element_type.setter
+    def element_type(self, value):
+        self._element_type = value
+        self._touch()
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._touch()
+        
+    @property
+    def properties(self):
+        """Custom properties dictionary"""
+        if self._properties is None:
+            self._properties = {}
+        return self._properties
+    
+    @properties.setter
+    def properties(self, value):
+        self._properties = value
         
     def set_property(self, key, value):
         """Set a custom property"""
@@ -29,10 +348,17 @@ class UIElement:
         
     def get_property(self, key, default=None):
         """Get a custom property"""
-        return self.properties.get(key, default)
+        if not self._properties:
+            return default
+        return self._properties.get(key, default)
     
     def to_markdown(self, level=3):
         """Convert element to markdown representation"""
+        from markdown_writer import iter_markdown
+        return "".join(iter_markdown(self, level))
+
+    def _markdown_header(self, level):
+        """Get the markdown lines describing this element"""
         indent = "#" * level
         lines = []
         lines.append(f"{indent} Element: {self.name}")
@@ -45,9 +371,9 @@ class UIElement:
         lines.append(f"- Enabled: {str(self.enabled).lower()}")
         lines.append(f"- Visible: {str(self.visible).lower()}")
         
-        if self.properties:
+        if self._properties:
             lines.append("- Properties:")
-            for key, value in self.properties.items():
+            for key, value in self._properties.items():
                 lines.append(f"  - {key}: {value}")
         
         return "\n".join(lines)
@@ -65,7 +391,7 @@ class UIElement:
             "text": self.text,
             "enabled": self.enabled,
             "visible": self.visible,
-            "properties": self.properties.copy()
+            "properties": self._properties.copy() if self._properties else {}
         }
 
     @staticmethod
@@ -82,53 +408,99 @@ class UIElement:
         element.text = data.get("text", "")
         element.enabled = data.get("enabled", True)
         element.visible = data.get("visible", True)
-        element.properties = data.get("properties", {}).copy()
+        properties = data.get("properties")
+        if properties:
+            element._properties = properties.copy()
         return element
 
     def __repr__(self):
         return f"{self.element_type}({self.name})"
 
 
-class Container:
+class Container(_LayoutNode):
     """Container class for holding UI elements and other containers"""
     
     ORIENTATIONS = ["horizontal", "vertical"]
     
+    __slots__ = ("orientation", "padding", "background", "_children", "_layout")
+    
     def __init__(self, name, x=0, y=0, width=400, height=300, orientation="vertical"):
-        self.name = name
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
+        self._absolute = None
+        self._parent = None
+        self._revision = _LayoutNode._clock
+        self._layout = None  # Set on the root container of a UILayout
+        self._name = name
+        self._x = x
+        self._y = y
+        self._width = width
+        self._height = height
         self.orientation = orientation if orientation in self.ORIENTATIONS else "vertical"
         self.padding = 10
         self.background = "#ffffff"
-        self.children = []  # Can contain both UIElements and Containers
-        self.parent = None
+        self._children = None  # ChildList, allocated when the first child is added
+        
+    @property
+    def children(self):
+        """Child elements and containers, in order"""
+        if self._children is None:
+            return ()
+        return self._children
+    
+    @children.setter
+    def children(self, value):
+        self._children = ChildList(value) if value else None
+        self._touch()
         
     def add_child(self, child):
         """Add a child element or container"""
-        if child not in self.children:
-            self.children.append(child)
-            child.parent = self
+        if self._children is None:
+            self._children = ChildList()
+        elif child._parent is self and child in self._children:
+            return
+        self._children.append(child)
+        child.parent = self
+        self._touch()
+        layout = self._owning_layout()
+        if layout is not None:
+            layout._index_subtree(child)
+            
+    def insert_child(self, index, child):
+        """Add a child element or container at a position among the children"""
+        if self._children is None:
+            self._children = ChildList()
+        elif child._parent is self and child in self._children:
+            return
+        self._children.insert(index, child)
+        child.parent = self
+        self._touch()
+        layout = self._owning_layout()
+        if layout is not None:
+            layout._index_subtree(child)
             
     def remove_child(self, child):
         """Remove a child element or container"""
-        if child in self.children:
+        if self._children is not None and child in self._children:
+            layout = self._owning_layout()
+            if layout is not None:
+                layout._unindex_subtree(child)
             self.children.remove(child)
             child.parent = None
+            self._touch()
             
     def get_all_children(self):
-        """Get all children recursively"""
-        all_children = []
-        for child in self.children:
-            all_children.append(child)
-            if isinstance(child, Container):
-                all_children.extend(child.get_all_children())
-        return all_children
+        """Get all descendants in pre-order"""
+        from traversal import iter_preorder
+        nodes = iter_preorder(self)
+        next(nodes)  # Skip self
+        return list(nodes)
     
     def to_markdown(self, level=2):
         """Convert container and all children to markdown representation"""
+        from markdown_writer import iter_markdown
+        return "".join(iter_markdown(self, level))
+
+    def _markdown_header(self, level):
+        """Get the markdown lines describing this container (without children)"""
         indent = "#" * level
         lines = []
         lines.append(f"{indent} Container: {self.name}")
@@ -139,54 +511,65 @@ class Container:
         lines.append(f"- Position: ({self.x}, {self.y})")
         lines.append(f"- Padding: {self.padding}")
         lines.append(f"- Background: {self.background}")
-        
-        # Add children
-        if self.children:
-            lines.append("")
-            for child in self.children:
-                lines.append(child.to_markdown(level + 1))
-                lines.append("")
-        
         return "\n".join(lines)
 
     def to_dict(self):
         """Convert container to dictionary for JSON serialization"""
-        return {
-            "type": "container",
-            "name": self.name,
-            "x": self.x,
-            "y": self.y,
-            "width": self.width,
-            "height": self.height,
-            "orientation": self.orientation,
-            "padding": self.padding,
-            "background": self.background,
-            "children": [child.to_dict() for child in self.children]
-        }
+        from traversal import iter_events, ENTER
+        stack = []  # Dicts of the containers being converted
+        for event, node, _ in iter_events(self):
+            if event is not ENTER:
+                if isinstance(node, Container):
+                    data = stack.pop()  # Ends with the dict of self
+            elif isinstance(node, Container):
+                data = {
+                    "type": "container",
+                    "name": node.name,
+                    "x": node.x,
+                    "y": node.y,
+                    "width": node.width,
+                    "height": node.height,
+                    "orientation": node.orientation,
+                    "padding": node.padding,
+                    "background": node.background,
+                    "children": []
+                }
+                if stack:
+                    stack[-1]["children"].append(data)
+                stack.append(data)
+            else:
+                stack[-1]["children"].append(node.to_dict())
+        return data
 
     @staticmethod
     def from_dict(data):
         """Create container from dictionary"""
-        container = Container(
-            data["name"],
-            data["x"],
-            data["y"],
-            data["width"],
-            data["height"],
-            data["orientation"]
-        )
-        container.padding = data.get("padding", 10)
-        container.background = data.get("background", "#ffffff")
+        from traversal import iter_events, dict_children, ENTER
 
-        # Recursively create children
-        for child_data in data.get("children", []):
-            if child_data["type"] == "container":
-                child = Container.from_dict(child_data)
-            else:  # element
-                child = UIElement.from_dict(child_data)
-            container.add_child(child)
-
-        return container
+        # Children are attached once their own subtree is complete, so
+        # add_child never has to walk up a long chain of ancestors
+        stack = []
+        for event, node_data, _ in iter_events(data, dict_children):
+            if event is ENTER:
+                if node_data is data or node_data["type"] == "container":
+                    node = Container(
+                        node_data["name"],
+                        node_data["x"],
+                        node_data["y"],
+                        node_data["width"],
+                        node_data["height"],
+                        node_data["orientation"]
+                    )
+                    node.padding = node_data.get("padding", 10)
+                    node.background = node_data.get("background", "#ffffff")
+                else:  # element
+                    node = UIElement.from_dict(node_data)
+                stack.append(node)
+            else:
+                node = stack.pop()
+                if not stack:
+                    return node
+                stack[-1].add_child(node)
 
     def __repr__(self):
         return f"Container({self.name}, {len(self.children)} children)"
@@ -197,66 +580,120 @@ class UILayout:
     
     def __init__(self, name="UI Layout"):
         self.name = name
+        self._names = {}  # name -> node, or {node: None, ...} for duplicate names
+        self._name_counters = {}  # prefix -> last number handed out
+        self._root_container = None
         self.root_container = Container("MainWindow", 0, 0, 800, 600)
+
+    @property
+    def root_container(self):
+        return self._root_container
+
+    @root_container.setter
+    def root_container(self, container):
+        if self._root_container is not None:
+            self._root_container._layout = None
+        self._root_container = container
+        container._layout = self
+        self._names = {}
+        self._index_subtree(container)
         
     def to_markdown(self):
         """Convert entire layout to markdown"""
-        lines = []
-        lines.append(f"# UI Layout: {self.name}")
-        lines.append("")
-        lines.append(self.root_container.to_markdown(level=2))
-        return "\n".join(lines)
+        from markdown_writer import iter_markdown
+        return "".join(iter_markdown(self))
+
+    def write_markdown(self, f):
+        """Write the markdown to a file-like object without building it in memory"""
+        from markdown_writer import write_markdown
+        write_markdown(self, f)
     
     def save_to_file(self, filename):
         """Save layout to markdown file"""
         with open(filename, 'w', encoding='utf-8') as f:
-            f.write(self.to_markdown())
+            self.write_markdown(f)
     
     def get_all_containers(self):
         """Get all containers in the layout"""
-        containers = [self.root_container]
-        
-        def collect_containers(container):
-            for child in container.children:
-                if isinstance(child, Container):
-                    containers.append(child)
-                    collect_containers(child)
-        
-        collect_containers(self.root_container)
-        return containers
+        from traversal import iter_preorder
+        return [node for node in iter_preorder(self.root_container)
+                if isinstance(node, Container)]
     
     def get_all_elements(self):
         """Get all UI elements in the layout"""
-        elements = []
-        
-        def collect_elements(container):
-            for child in container.children:
-                if isinstance(child, UIElement):
-                    elements.append(child)
-                elif isinstance(child, Container):
-                    collect_elements(child)
-        
-        collect_elements(self.root_container)
-        return elements
+        from traversal import iter_preorder
+        return [node for node in iter_preorder(self.root_container)
+                if isinstance(node, UIElement)]
     
     def find_by_name(self, name):
         """Find a container or element by name"""
-        # Check root container
-        if self.root_container.name == name:
-            return self.root_container
-        
-        # Search recursively
-        def search(container):
-            for child in container.children:
-                if child.name == name:
-                    return child
-                if isinstance(child, Container):
-                    result = search(child)
-                    if result:
-                        return result
-            return None
-        
-        return search(self.root_container)
+        entry = self._names.get(name)
+        if isinstance(entry, dict):
+            # With duplicate names, the node that got the name first wins
+            return next(iter(entry))
+        return entry
+
+    def unique_name(self, prefix):
+        """Get an unused name like Button7 for a new node"""
+        number = self._name_counters.get(prefix, 0) + 1
+        while f"{prefix}{number}" in self._names:
+            number += 1
+        self._name_counters[prefix] = number
+        return f"{prefix}{number}"
+
+    def _index_subtree(self, node):
+        """Add a node and its descendants to the name index"""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self._add_name(current, current.name)
+            if isinstance(current, Container):
+                stack.extend(current.children)
+
+    def _unindex_subtree(self, node):
+        """Remove a node and its descendants from the name index"""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self._forget_name(current, current.name)
+            if isinstance(current, Container):
+                stack.extend(current.children)
+
+    def _rename(self, node, old_name, new_name):
+        """Move a node to its new name in the index"""
+        self._forget_name(node, old_name)
+        self._add_name(node, new_name)
+
+    def _add_name(self, node, name):
+        """Add one node to the index entry of a name"""
+        # Unique names map straight to their node; only clashes need a dict
+        entry = self._names.get(name)
+        if entry is None:
+            self._names[name] = node
+        elif isinstance(entry, dict):
+            entry[node] = None
+        elif entry is not node:
+            self._names[name] = {entry: None, node: None}
+
+    def _forget_name(self, node, name):
+        """Remove one node from the index entry of a name"""
+        entry = self._names.get(name)
+        if entry is node:
+            del self._names[name]
+        elif isinstance(entry, dict):
+            entry.pop(node, None)
+            if len(entry) == 1:
+                self._names[name] = next(iter(entry))
+
+    def geometry_arrays(self):
+        """Get the geometry of every node as NumPy arrays (see geometry.py)"""
+        from geometry import geometry_arrays
+        return geometry_arrays(self)
+
+    def apply_geometry(self, arrays, absolute=True, integer=True):
+        """Write geometry arrays back into the nodes (see geometry.py)"""
+        from geometry import apply_geometry
+        apply_geometry(arrays, absolute, integer)
 
     def to_dict(self):
         """Convert layout to dictionary for JSON serialization"""
@@ -279,12 +716,21 @@ class UILayout:
             json.dump(self.to_dict(), f, indent=2)
 
     @staticmethod
-    def load_from_json(filename):
-        """Load layout from JSON file"""
-        import json
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return UILayout.from_dict(data)
+    def load_from_json(filename, progress=None, cancel=None):
+        """Load layout from JSON file (streamed, see streaming_loader.py)"""
+        from streaming_loader import load_layout
+        return load_layout(filename, progress, cancel)
+
+    def save_to_binary(self, filename):
+        """Save layout to a binary project file (see binary_format.py)"""
+        from binary_format import save
+        save(self, filename)
+
+    @staticmethod
+    def load_from_binary(filename):
+        """Load layout from a binary project file"""
+        from binary_format import load
+        return load(filename)
 
     def __repr__(self):
         return f"UILayout({self.name})"